@@ -1,66 +1,392 @@
-from ChessBoard import ChessBoard
+import time
+from concurrent.futures import ProcessPoolExecutor
+from ChessBoard import ChessBoard, SIDE_TAGS, KING, KNIGHT, ROOK, CANNON
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from OpeningBook import open_book
+from Tablebase import open_tablebase
+
+MAX_SEARCH_DEPTH = 64  # 限时模式下迭代加深的最大深度
+CHECK_TIME_INTERVAL = 1024  # 每搜索这么多个节点检查一次是否超时
+
+# 着法排序的优先级：置换表/主要变例着法 > 吃子 > 杀手着法 > 历史表分值
+TT_MOVE_ORDER = 1 << 30
+CAPTURE_ORDER = 1 << 29
+KILLER_ORDER = 1 << 28
+# MVV-LVA 使用的棋子价值，按棋子种类编号索引：将帅、士、象、马、车、炮、兵卒
+ORDER_VALUES = (100, 2, 2, 4, 9, 5, 1)
+# 静态搜索的 delta 剪枝余量：吃掉的棋子价值加上这个余量仍然不能改善分值时，不再搜索这个吃子
+DELTA_MARGIN = 20
+# 静态搜索中被将军时不能停住（stand-pat），改为搜索全部着法应将；一条变化中最多这样展开这么多次，之后照常停住，
+# 避免连续将军让静态搜索无限延伸
+QUIESCENCE_CHECK_PLIES = 2
+# 空着裁剪：剩余深度至少为 NULL_MOVE_MIN_DEPTH 时尝试，深度超过 NULL_MOVE_DEEP_DEPTH 时多减一层（自适应的 R）。
+# 走棋方的车、马、炮少于 NULL_MOVE_MIN_PIECES 个时视为残局，残局中常有等着，不使用空着裁剪
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP_REDUCTION = 3
+NULL_MOVE_DEEP_DEPTH = 6
+NULL_MOVE_MIN_PIECES = 2
+# 后期着法缩减：剩余深度至少为 LMR_MIN_DEPTH 时，排在前 LMR_FULL_DEPTH_MOVES 个之后的非吃子、非杀手着法少搜一层
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+LMR_REDUCTION = 1
+
+
+class SearchTimeout(Exception):
+    """搜索超出时间限制时抛出，用于从递归中直接退出。"""
+    pass
+
+
+class AlphaBetaStats:
+    """一次 make_move 的搜索统计，只在 AlphaBetaBot 开启 collect_stats 时收集。
+
+    并行搜索时 nodes 包含各工作进程的节点数，其余计数只统计主进程中的搜索（第一轮迭代）。
+    """
+
+    def __init__(self):
+        self.nodes = 0  # 搜索的节点数
+        self.beta_cutoffs = 0  # 发生截断的节点数
+        self.first_move_cutoffs = 0  # 第一个着法就引起截断的节点数
+        self.tt_probes = 0  # 查询置换表的次数
+        self.tt_hits = 0  # 置换表中找到当前局面的次数
+        self.tt_cutoffs = 0  # 直接使用置换表分值返回的次数
+        self.pvs_researches = 0  # 主要变例搜索中零窗口搜索失败、需要用完整窗口重新搜索的次数
+        self.null_move_tries = 0  # 尝试空着的次数
+        self.null_move_cutoffs = 0  # 空着搜索直接引起截断的次数
+        self.lmr_reductions = 0  # 缩减深度搜索的着法数
+        self.lmr_researches = 0  # 缩减搜索的分值超过 alpha、需要按完整深度重新搜索的次数
+        self.depth_reached = 0  # 完整搜索完的最大深度
+        self.iteration_nodes = []  # 迭代加深中每一轮的节点数
+        self.best_move = None  # 最后一轮完整搜索的最佳着法，(起点坐标, 终点坐标)
+        self.best_score = None
+        self.elapsed = 0.0  # 到目前为止的搜索时间，单位秒
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """第一个着法即截断的比例，反映着法排序的质量。"""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """有效分支因子：最后两轮迭代的节点数之比。"""
+        if len(self.iteration_nodes) < 2 or self.iteration_nodes[-2] == 0:
+            return 0.0
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    def as_dict(self) -> dict:
+        """转换为可以直接序列化为 JSON 的字典。"""
+        return {
+            'nodes': self.nodes,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': self.tt_hit_rate,
+            'tt_cutoffs': self.tt_cutoffs,
+            'pvs_researches': self.pvs_researches,
+            'null_move_tries': self.null_move_tries,
+            'null_move_cutoffs': self.null_move_cutoffs,
+            'lmr_reductions': self.lmr_reductions,
+            'lmr_researches': self.lmr_researches,
+            'depth_reached': self.depth_reached,
+            'iteration_nodes': self.iteration_nodes,
+            'branching_factor': self.branching_factor,
+            'best_move': self.best_move,
+            'best_score': self.best_score,
+            'elapsed': self.elapsed,
+            'nodes_per_second': self.nodes / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
+
 class AlphaBetaBot:
-    def __init__(self, chessboard: ChessBoard, side: str, depth: int):
+    def __init__(self, chessboard: ChessBoard, side: str, depth: int, tt_size_mb: float = 16, tt_replacement: str = 'depth',
+                 workers: int = 1, collect_stats: bool = False, on_iteration=None, book=None,
+                 tablebase=None, quiescence: bool = False, pvs: bool = False, null_move: bool = False,
+                 lmr: bool = False, tt_exact_depth: bool = False):
         self.chessboard = chessboard
         self.side = side
         self.depth = depth  # 搜索深度
+        # 是否在叶子节点继续做只搜索吃子的静态搜索，以减少水平线效应
+        self.quiescence = quiescence
+        # 三种选择性搜索技术，可以分别开关以比较各自减少的节点数。默认全部关闭，此时固定深度搜索的结果与
+        # 完整的 Alpha-Beta 搜索相同（置换表中更深的条目可能给出更准确的分值），并行搜索与 tt_exact_depth=True 的串行搜索的
+        # 着法也相同；开启后着法可能不同。
+        # pvs：主要变例搜索，第一个着法之后的着法先用零窗口搜索，失败时再用完整窗口重新搜索；
+        # null_move：空着裁剪，让对方连走两步仍然不低于 beta 时直接截断（被将军和残局中不使用）；
+        # lmr：后期着法缩减，排序靠后的平静着法少搜一层，分值超过 alpha 时按完整深度重新搜索
+        self.pvs = pvs
+        self.null_move = null_move
+        self.lmr = lmr
+        # 开局库，可以是 OpeningBook 或文件路径；当前局面在开局库中时直接走库中的移动，不再搜索
+        self.book = open_book(book)
+        # 残局库，可以是 Tablebase 或残局库目录；根节点在库中时直接按库走棋，搜索到的叶子在库中时用库中的结果代替估值
+        self.tablebase = open_tablebase(tablebase)
+        # 置换表在整盘棋中保留，多次 make_move 之间共享搜索结果
+        self.tt_size_mb = tt_size_mb
+        self.tt_replacement = tt_replacement
+        self.tt = TranspositionTable(tt_size_mb, tt_replacement)
+        # 为 True 时置换表的分值只在深度相同时使用，使固定深度搜索的结果与搜索顺序无关。并行搜索（主进程和工作进程）
+        # 总是开启它，使合并结果不受根着法分配方式的影响；串行搜索默认关闭，更深的条目同样可以截断
+        self.tt_exact_depth = tt_exact_depth or workers > 1
+        # 并行搜索的进程数，为 1 时在当前进程内串行搜索；进程池在第一次需要时创建，并在整盘棋中复用
+        self.workers = workers
+        self.executor = None
+        # 历史表：按移动编码索引，记录着法引起截断的累计权重，同样在整盘棋中保留
+        self.history = [0] * 65536
+        self.killers = [[0, 0] for _ in range(MAX_SEARCH_DEPTH + 1)]  # 每层两个杀手着法
+        self.nodes = 0  # 最近一次 find_best_move 搜索的节点数，走开局库或残局库中的移动时为 0
+        self.deadline = None  # 限时模式下的截止时间（time.perf_counter 的时刻）
+        self.stopped = False  # 由 stop 设置，要求当前搜索尽快结束
+        # 搜索统计：开启后每次 make_move 的统计保存在 last_stats 中；on_iteration(stats) 在迭代加深的每一轮结束时调用。
+        # 未开启时 self.stats 为 None，搜索中只多一次属性检查
+        self.collect_stats = collect_stats or on_iteration is not None
+        self.on_iteration = on_iteration
+        self.stats = None
+        self.last_stats = None
 
-    def evaluate_board(self, board: ChessBoard) -> int:
-        # 定义棋子价值
-        piece_value = {
-            '将': 900, '帅': 900,
-            '车': 90, '炮': 50,
-            '马': 40, '象': 20, '士': 20,
-            '卒': 10, '兵': 10
-        }
-        
-        if board.winner == self.side:
+    def evaluate_board(self, board: ChessBoard, side: str = None) -> int:
+        """以 side 的视角评估局面，默认为本方。"""
+        side = side or self.side
+        if board.winner == side:
             return float('inf')
-        if board.winner == self.opposite_side():
+        if board.winner is not None:
             return float('-inf')
-        
-        # 评估棋盘
-        score = 0
-        for row in board.board:
-            for piece in row:
-                if piece is not None:
-                    value = piece_value[piece.name]
-                    if piece.side == self.side:
-                        score += value
-                    else:
-                        score -= value
 
-        return score
+        # 子力与位置分值由棋盘在走子时增量维护
+        return board.evaluate(side)
+
+    def order_moves(self, board: ChessBoard, moves: list, tt_move: int, ply: int):
+        """对着法就地排序：置换表着法最先，然后是按 MVV-LVA 排序的吃子、杀手着法，其余按历史表分值排序。
+
+        Args:
+            board (ChessBoard): 当前棋盘。
+            moves (list): generate_moves 返回的着法列表。
+            tt_move (int): 置换表或上一轮迭代记录的最佳着法，0 表示没有。
+            ply (int): 当前节点距根节点的层数。
+        """
+        squares = board.squares
+        killer_1, killer_2 = self.killers[ply]
+        history = self.history
+
+        def order_key(move):
+            if move == tt_move:
+                return TT_MOVE_ORDER
+            victim = squares[move & 0xFF]
+            if victim != 0:
+                return CAPTURE_ORDER + ORDER_VALUES[victim & 7] * 16 - ORDER_VALUES[squares[move >> 8] & 7]
+            if move == killer_1:
+                return KILLER_ORDER + 1
+            if move == killer_2:
+                return KILLER_ORDER
+            return history[move]
+
+        moves.sort(key=order_key, reverse=True)
+
+    def record_cutoff(self, board: ChessBoard, move: int, depth: int, ply: int):
+        """记录引起截断的非吃子着法，更新杀手着法和历史表。"""
+        if board.squares[move & 0xFF] != 0:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] += depth * depth
 
-    def alphabeta(self, board: ChessBoard, depth: int, alpha: int, beta: int, maximizingPlayer: bool) -> int:
+    def record_cutoff_stats(self, stats: AlphaBetaStats, moves: list, move: int):
+        """统计一次截断，以及截断是否由第一个着法引起。"""
+        stats.beta_cutoffs += 1
+        if move == moves[0]:
+            stats.first_move_cutoffs += 1
+
+    def negamax(self, board: ChessBoard, depth: int, alpha, beta, side: str, ply: int = 1, null_allowed: bool = True):
         """
-        Alpha-Beta剪枝算法的实现。
+        负极大值形式的 Alpha-Beta 搜索（fail-soft）。
+        在同一个棋盘对象上通过 make_move/unmake_move 前进和回退，不复制棋盘。
+        分值始终以走棋方 side 的视角计算，置换表中保存的也是走棋方视角的分值。
+
+        按开关使用主要变例搜索、空着裁剪和后期着法缩减，见 __init__。
+        null_allowed 为 False 表示上一步是空着，本节点不再尝试空着。
         """
-        if depth == 0:
-            return self.evaluate_board(board)
-
-        if maximizingPlayer:
-            maxEval = float('-inf')
-            for move in board.get_legal_moves(self.side):
-                new_board = board.copy()
-                new_board.move_piece_with_coords(move[0], move[1])
-                eval = self.alphabeta(new_board, depth - 1, alpha, beta, False)
-                maxEval = max(maxEval, eval)
-                alpha = max(alpha, eval)
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CHECK_TIME_INTERVAL == 0 \
+                and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if depth <= 0:
+            if self.tablebase is not None and board.winner is None:
+                score = self.probe_tablebase(board, side)
+                if score is not None:
+                    return score
+            if self.quiescence:
+                return self.quiescence_search(board, alpha, beta, side)
+            return self.evaluate_board(board, side)
+
+        key = board.hash_key(side)
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = 0
+        entry = self.tt.probe(key)
+        stats = self.stats
+        if stats is not None:
+            stats.tt_probes += 1
+        if entry is not None:
+            tt_depth, tt_score, tt_flag, tt_move = entry
+            if stats is not None:
+                stats.tt_hits += 1
+            if tt_depth == depth or tt_depth > depth and not self.tt_exact_depth:
+                if tt_flag == EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return tt_score
+                elif tt_flag == LOWER_BOUND:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
                 if beta <= alpha:
-                    break
-            return maxEval
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return tt_score
+
+        other = 'black' if side == 'red' else 'red'
+        in_check = None
+        if self.null_move and null_allowed and depth >= NULL_MOVE_MIN_DEPTH and beta != float('inf') \
+                and board.winner is None and board.evaluate(side) >= beta and self.has_null_move_material(board, side):
+            in_check = board.is_in_check(side)
+            if not in_check:
+                # 空着：棋盘上不需要走子，直接让对方在同一局面下走棋
+                reduction = NULL_MOVE_DEEP_REDUCTION if depth > NULL_MOVE_DEEP_DEPTH else NULL_MOVE_REDUCTION
+                score = -self.negamax(board, depth - 1 - reduction, -beta, -beta + 1, other, ply + 1, False)
+                if stats is not None:
+                    stats.null_move_tries += 1
+                if score >= beta:
+                    if stats is not None:
+                        stats.null_move_cutoffs += 1
+                    # 空着得到的必胜分值并不可靠，只返回 beta
+                    return beta if score == float('inf') else score
+
+        moves = board.generate_moves(side)
+        self.order_moves(board, moves, tt_move, ply)
+        reduce = self.lmr and depth >= LMR_MIN_DEPTH
+        if reduce:
+            if in_check is None:
+                in_check = board.is_in_check(side)
+            reduce = not in_check
+        squares = board.squares
+        killers = self.killers[ply]
+        best = float('-inf')
+        best_move = None
+        for index, move in enumerate(moves):
+            quiet = squares[move & 0xFF] == 0
+            undo_token = board.make_move(move)
+            if index == 0 or alpha == float('-inf'):
+                score = -self.negamax(board, depth - 1, -beta, -alpha, other, ply + 1)
+            else:
+                score = None
+                if reduce and index >= LMR_FULL_DEPTH_MOVES and quiet and move != killers[0] and move != killers[1]:
+                    score = -self.negamax(board, depth - 1 - LMR_REDUCTION, -alpha - 1, -alpha, other, ply + 1)
+                    if stats is not None:
+                        stats.lmr_reductions += 1
+                    if score > alpha:
+                        score = None
+                        if stats is not None:
+                            stats.lmr_researches += 1
+                if score is None:
+                    if self.pvs:
+                        score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, other, ply + 1)
+                        if alpha < score < beta:
+                            if stats is not None:
+                                stats.pvs_researches += 1
+                            score = -self.negamax(board, depth - 1, -beta, -alpha, other, ply + 1)
+                    else:
+                        score = -self.negamax(board, depth - 1, -beta, -alpha, other, ply + 1)
+            board.unmake_move(undo_token)
+            if score > best or best_move is None:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.record_cutoff(board, move, depth, ply)
+                if stats is not None:
+                    self.record_cutoff_stats(stats, moves, move)
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER_BOUND
+        elif best >= beta_orig:
+            flag = LOWER_BOUND
         else:
-            minEval = float('inf')
-            for move in board.get_legal_moves(self.opposite_side()):
-                new_board = board.copy()
-                new_board.move_piece_with_coords(move[0], move[1])
-                eval = self.alphabeta(new_board, depth - 1, alpha, beta, True)
-                minEval = min(minEval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return minEval
+            flag = EXACT
+        self.tt.store(key, depth, best, flag, best_move or 0)
+        return best
+
+    def has_null_move_material(self, board: ChessBoard, side: str) -> bool:
+        """走棋方是否还有足够的车、马、炮，使空着裁剪的前提（走一步总比不走好）大体成立。"""
+        tag = SIDE_TAGS[side]
+        squares = board.squares
+        pieces = squares.count(tag | ROOK) + squares.count(tag | KNIGHT) + squares.count(tag | CANNON)
+        return pieces >= NULL_MOVE_MIN_PIECES
+
+    def quiescence_search(self, board: ChessBoard, alpha, beta, side: str, check_plies: int = QUIESCENCE_CHECK_PLIES):
+        """静态搜索：只搜索吃子，直到局面平静。分值以走棋方 side 的视角计算。
+
+        走棋方可以不吃子，因此静态估值（stand-pat）是走棋方分值的下限，达到截断条件时直接返回；
+        吃掉的棋子价值加上 DELTA_MARGIN 仍然无法改善分值的吃子不再搜索（delta 剪枝），但吃将帅总是搜索。
+        被将军时不走就会被吃掉将帅，静态估值不再是下限：这时不停住，搜索全部着法，没有应将的着法会在下一层被吃将帅。
+        check_plies 为这条变化中还允许这样展开的次数，用完后被将军也照常停住。
+        """
+        stand_pat = self.evaluate_board(board, side)
+        if board.winner is not None:
+            return stand_pat
+        in_check = check_plies > 0 and board.is_in_check(side)
+        squares = board.squares
+        if in_check:
+            moves = board.generate_moves(side)
+            check_plies -= 1
+            best = float('-inf')
+        else:
+            if stand_pat >= beta:
+                return stand_pat
+            moves = board.generate_captures(side)
+            if not moves:
+                return stand_pat
+            best = stand_pat
+            alpha = max(alpha, stand_pat)
+        eval_table = board.eval_table
+        moves.sort(key=lambda move: (ORDER_VALUES[squares[move & 0xFF] & 7] * 16 if squares[move & 0xFF] else 0)
+                   - ORDER_VALUES[squares[move >> 8] & 7], reverse=True)
+        other = 'black' if side == 'red' else 'red'
+        for move in moves:
+            victim = squares[move & 0xFF]
+            if not in_check and victim & 7 != KING \
+                    and stand_pat + eval_table[victim][move & 0xFF] + DELTA_MARGIN <= alpha:
+                continue
+            self.nodes += 1
+            if self.deadline is not None and self.nodes % CHECK_TIME_INTERVAL == 0 \
+                    and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            undo_token = board.make_move(move)
+            score = -self.quiescence_search(board, -beta, -alpha, other, check_plies)
+            board.unmake_move(undo_token)
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best
+
+    def probe_tablebase(self, board: ChessBoard, side: str):
+        """查询残局库，返回走棋方 side 视角的分值：必胜为正无穷，必败为负无穷，和棋为 0；不在库中时返回 None。"""
+        score = self.tablebase.probe(board, side)
+        if score is None:
+            return None
+        if score == 0:
+            return 0
+        return float('inf') if score > 0 else float('-inf')
 
     def opposite_side(self) -> str:
         """
@@ -68,21 +394,233 @@ class AlphaBetaBot:
         """
         return 'black' if self.side == 'red' else 'red'
 
-    def make_move(self):
+    def order_root_moves(self, board: ChessBoard, moves: list, best_move: int):
+        """对根节点着法就地排序：上一轮的最佳着法最先，然后是按 MVV-LVA 排序的吃子，其余保持原有顺序。
+
+        根节点的顺序只取决于局面和上一轮的结果，不受历史表影响，因此串行搜索和根节点分裂的并行搜索
+        在同一深度下总是以相同的顺序比较根着法。
+        """
+        squares = board.squares
+
+        def order_key(move):
+            if move == best_move:
+                return TT_MOVE_ORDER
+            victim = squares[move & 0xFF]
+            if victim != 0:
+                return CAPTURE_ORDER + ORDER_VALUES[victim & 7] * 16 - ORDER_VALUES[squares[move >> 8] & 7]
+            return 0
+
+        moves.sort(key=order_key, reverse=True)
+
+    def search_root(self, board: ChessBoard, moves: list, depth: int) -> tuple:
         """
-        执行一个移动。使用Alpha-Beta算法找到最佳移动。
+        对根节点的着法按给定顺序做一轮固定深度的搜索。
+
+        Returns:
+            tuple: (最佳分值, 最佳着法)。分值相同时取排在前面的着法。
         """
         best_score = float('-inf')
         best_move = None
-        for move in self.chessboard.get_legal_moves(self.side):
-            new_board = self.chessboard.copy()
-            new_board.move_piece_with_coords(move[0], move[1])
-            score = self.alphabeta(new_board, self.depth - 1, float('-inf'), float('inf'), False)
-            if score > best_score:
+        other = self.opposite_side()
+        for move in moves:
+            undo_token = board.make_move(move)
+            if self.pvs and abs(best_score) != float('inf'):
+                score = -self.negamax(board, depth - 1, -best_score - 1, -best_score, other)
+                if score > best_score:
+                    if self.stats is not None:
+                        self.stats.pvs_researches += 1
+                    score = -self.negamax(board, depth - 1, float('-inf'), -best_score, other)
+            else:
+                score = -self.negamax(board, depth - 1, float('-inf'), -best_score, other)
+            board.unmake_move(undo_token)
+            if score > best_score or best_move is None:
                 best_score = score
                 best_move = move
+        return best_score, best_move
 
-        if best_move:
-            self.chessboard.move_piece_with_coords(best_move[0], best_move[1])
-        else:
+    def search_root_parallel(self, board: ChessBoard, moves: list, depth: int, time_limit: float = None) -> tuple:
+        """
+        根节点分裂的并行搜索：把根着法交错分给各工作进程，每个进程按顺序搜索自己的一份，
+        最后合并为分值最高、分值相同时在根着法顺序中最靠前的着法，与 tt_exact_depth=True 时 search_root 的结果一致。
+
+        Args:
+            time_limit (float): 剩余的搜索时间，单位秒，为 None 时不限时。
+
+        Returns:
+            tuple: (最佳分值, 最佳着法)。
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_search_worker,
+                initargs=(self.worker_options(),),
+            )
+        futures = [
+            self.executor.submit(_search_root_chunk, board, self.side, moves[i::self.workers], depth,
+                                 self.tt.generation, time_limit)
+            for i in range(min(self.workers, len(moves)))
+        ]
+        results = [future.result() for future in futures]
+        if None in results:
+            raise SearchTimeout()
+        self.nodes += sum(nodes for _, _, nodes in results)
+        order = {move: index for index, move in enumerate(moves)}
+        best_score, best_move, _ = max(results, key=lambda result: (result[0], -order[result[1]]))
+        return best_score, best_move
+
+    def record_iteration_stats(self, stats: AlphaBetaStats, depth: int, best_score, best_move: int, start_time: float):
+        """迭代加深的一轮结束后更新统计，并调用 on_iteration。"""
+        stats.iteration_nodes.append(self.nodes - sum(stats.iteration_nodes))
+        stats.nodes = self.nodes
+        stats.depth_reached = depth
+        stats.best_score = best_score
+        stats.best_move = ChessBoard.decode_move(best_move)
+        stats.elapsed = time.perf_counter() - start_time
+        if self.on_iteration is not None:
+            self.on_iteration(stats)
+
+    def worker_options(self) -> dict:
+        """并行搜索的工作进程创建 AlphaBetaBot 时使用的参数，与本机器人的搜索设置一致。"""
+        return {
+            'tt_size_mb': self.tt_size_mb,
+            'tt_replacement': self.tt_replacement,
+            'tablebase': self.tablebase.directory if self.tablebase is not None else None,
+            'quiescence': self.quiescence,
+            'pvs': self.pvs,
+            'null_move': self.null_move,
+            'lmr': self.lmr,
+            'tt_exact_depth': True,
+        }
+
+    def close(self):
+        """关闭并行搜索使用的进程池。"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def stop(self):
+        """请求正在进行的搜索尽快结束，可以从其他线程调用。
+
+        搜索在下一次检查超时时退出，返回已经完整搜索完的最后一轮的最佳着法。并行搜索中已经分派给
+        工作进程的一轮不会被打断。调用方在开始下一次搜索前需要把 stopped 恢复为 False。
+        """
+        self.stopped = True
+        self.deadline = float('-inf')
+
+    def find_best_move(self, time_limit_ms: float = None, max_depth: int = None) -> int:
+        """使用迭代加深的Alpha-Beta算法找到最佳移动，但不执行它。
+
+        Args:
+            time_limit_ms (float): 时间预算，单位毫秒。为 None 时不限时，直到搜索完 max_depth 或者被 stop 打断。
+            max_depth (int): 迭代加深的最大深度。为 None 时，不限时为 self.depth，限时为 MAX_SEARCH_DEPTH。
+
+        Returns:
+            int: 整数编码的最佳移动。开局库或残局库中有当前局面时直接返回库中的移动。
+        """
+        self.nodes = 0
+        if self.book is not None:
+            book_move = self.book.choose_move(self.chessboard, self.side)
+            if book_move is not None:
+                return book_move
+        if self.tablebase is not None:
+            result = self.tablebase.best_move(self.chessboard, self.side)
+            if result is not None:
+                return result[0]
+
+        start_time = time.perf_counter()
+        self.tt.new_search()
+        stats = self.stats = AlphaBetaStats() if self.collect_stats else None
+        self.killers = [[0, 0] for _ in range(MAX_SEARCH_DEPTH + 1)]
+        self.history = [value >> 1 for value in self.history]  # 历史表逐步衰减，让新局面的信息占主导
+        # 整个搜索只复制一次棋盘，之后就地执行和撤销移动
+        board = self.chessboard.copy()
+        moves = board.generate_moves(self.side)
+        if not moves:
             raise Exception("没有可行的移动。")
+
+        if max_depth is None:
+            max_depth = self.depth if time_limit_ms is None else MAX_SEARCH_DEPTH
+        best_move = None
+        try:
+            for depth in range(1, max_depth + 1):
+                self.order_root_moves(board, moves, best_move)
+                if self.workers > 1 and depth > 1:
+                    time_limit = None
+                    if self.deadline is not None:
+                        time_limit = self.deadline - time.perf_counter()
+                    best_score, best_move = self.search_root_parallel(board, moves, depth, time_limit)
+                else:
+                    best_score, best_move = self.search_root(board, moves, depth)
+                self.tt.store(board.hash_key(self.side), depth, best_score, EXACT, best_move)
+                if stats is not None:
+                    self.record_iteration_stats(stats, depth, best_score, best_move, start_time)
+                if best_score == float('inf') or best_score == float('-inf'):
+                    break  # 胜负已定，无需继续加深
+                if time_limit_ms is not None:
+                    # 第一轮总是完整搜索，保证有着法可走；之后的轮次受时间限制
+                    self.deadline = start_time + time_limit_ms / 1000
+                    if time.perf_counter() > self.deadline:
+                        break
+                if self.stopped:
+                    break
+        except SearchTimeout:
+            pass  # 超时后本轮结果不完整，沿用上一轮的最佳移动
+        finally:
+            self.deadline = None
+            self.stats = None
+
+        if best_move is None:
+            best_move = moves[0]  # 第一轮就被 stop 打断时，走排序最靠前的着法
+        if stats is not None:
+            stats.nodes = self.nodes
+            stats.elapsed = time.perf_counter() - start_time
+            self.last_stats = stats
+        return best_move
+
+    def make_move(self, time_limit_ms: float = None):
+        """
+        执行一个移动。使用迭代加深的Alpha-Beta算法找到最佳移动。
+
+        Args:
+            time_limit_ms (float): 每步的时间预算，单位毫秒。为 None 时搜索到 self.depth 为止；
+                否则不断加深，直到时间用完，返回最后一轮完整搜索得到的最佳移动。
+
+        当 workers 大于 1 时，除第一轮外的每一轮都使用根节点分裂的并行搜索，
+        在不限时的情况下与 workers=1、tt_exact_depth=True 的串行搜索得到相同的着法。
+
+        开启 collect_stats 时，本次搜索的 AlphaBetaStats 保存在 self.last_stats 中。
+        """
+        best_move = ChessBoard.decode_move(self.find_best_move(time_limit_ms))
+        self.chessboard.move_piece_with_coords(best_move[0], best_move[1])
+        return best_move
+
+# 并行搜索工作进程中的状态：每个进程为每一方保留一个 AlphaBetaBot，使置换表和历史表在多次任务之间复用
+_worker_bots = {}
+_worker_options = {}
+
+
+def _init_search_worker(options: dict):
+    _worker_options.update(options)
+
+
+def _search_root_chunk(board: ChessBoard, side: str, moves: list, depth: int, generation: int, time_limit: float = None):
+    """工作进程入口：按顺序搜索分到的根着法。generation 为主进程置换表的代数，变化时说明开始了新的一步。
+
+    Returns:
+        tuple: (最佳分值, 最佳着法, 搜索节点数)，超时返回 None。
+    """
+    bot = _worker_bots.get(side)
+    if bot is None:
+        bot = _worker_bots[side] = AlphaBetaBot(board, side, depth, **_worker_options)
+    if bot.tt.generation != generation:
+        bot.tt.generation = generation
+        bot.history = [value >> 1 for value in bot.history]
+    bot.nodes = 0
+    if time_limit is not None:
+        bot.deadline = time.perf_counter() + time_limit
+    try:
+        best_score, best_move = bot.search_root(board, moves, depth)
+    except SearchTimeout:
+        return None
+    finally:
+        bot.deadline = None
+    return best_score, best_move, bot.nodes
@@ -0,0 +1,250 @@
+import argparse
+import ast
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from ChessBoard import ChessBoard
+from RandomBot import RandomBot
+from MCTSBot import MCTSBot
+from AlphaBetaBot import AlphaBetaBot
+from GameRecord import GameWriter
+
+# 可以参加对局的机器人，键为命令行中使用的名称
+BOT_CLASSES = {'random': RandomBot, 'mcts': MCTSBot, 'alphabeta': AlphaBetaBot}
+DEFAULT_BOT_OPTIONS = {'alphabeta': {'depth': 3}}
+DEFAULT_MAX_PLIES = 400  # 单盘的最大步数，达到后判和
+REPETITION_LIMIT = 3  # 同一局面（包括走棋方）出现这么多次后判和
+
+
+def parse_bot_spec(spec: str) -> tuple:
+    """解析机器人描述，格式为 "名称" 或 "名称:参数=值,参数=值"，例如 "alphabeta:depth=4,tt_size_mb=32".
+
+    参数值按 Python 字面量解析（数字、字符串、None 等），无法解析时当作字符串。
+
+    Returns:
+        tuple: (名称, 参数字典)。
+    """
+    name, _, arguments = spec.partition(':')
+    name = name.strip().lower()
+    if name not in BOT_CLASSES:
+        raise ValueError(f"未知的机器人: {name}，可选: {', '.join(BOT_CLASSES)}")
+    options = dict(DEFAULT_BOT_OPTIONS.get(name, {}))
+    for argument in filter(None, (a.strip() for a in arguments.split(','))):
+        key, separator, value = argument.partition('=')
+        if not separator:
+            raise ValueError(f"参数格式应为 key=value: {argument}")
+        try:
+            options[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[key.strip()] = value.strip()
+    return name, options
+
+
+def create_bot(spec: tuple, chessboard: ChessBoard, side: str):
+    """根据 parse_bot_spec 的结果创建机器人。"""
+    name, options = spec
+    return BOT_CLASSES[name](chessboard, side, **options)
+
+
+def _search_nodes(bot) -> int:
+    """返回机器人最近一步实际搜索的节点数：Alpha-Beta 为搜索的节点数，MCTS 为完成的迭代次数，
+    走开局库或残局库中的移动时为 0，随机机器人为 0。"""
+    if isinstance(bot, AlphaBetaBot):
+        return bot.nodes
+    if isinstance(bot, MCTSBot):
+        return bot.iterations
+    return 0
+
+
+def play_game(red_spec: tuple, black_spec: tuple, max_plies: int = DEFAULT_MAX_PLIES, seed: int = None) -> dict:
+    """从初始局面下完一盘棋，不打印任何内容。
+
+    吃掉对方将帅或者对方没有可行的移动（困毙或被将死）时获胜；达到最大步数或同一局面重复出现 REPETITION_LIMIT 次时判和。
+
+    Args:
+        red_spec (tuple): 红方机器人，parse_bot_spec 的结果。
+        black_spec (tuple): 黑方机器人。
+        max_plies (int): 最大步数。
+        seed (int): 随机种子，为 None 时不设置。
+
+    Returns:
+        dict: 对局结果，包括胜者（和棋为 None）、结束原因、步数、按顺序的移动（整数编码），
+            以及双方的走棋次数、思考时间和搜索节点数。
+    """
+    if seed is not None:
+        random.seed(seed)
+    start_time = time.perf_counter()
+    chessboard = ChessBoard()
+    chessboard.set_initial_pieces()
+    bots = {'red': create_bot(red_spec, chessboard, 'red'), 'black': create_bot(black_spec, chessboard, 'black')}
+    moves = {'red': 0, 'black': 0}
+    move_time = {'red': 0.0, 'black': 0.0}
+    nodes = {'red': 0, 'black': 0}
+    repetitions = {}
+    history = []
+    side = 'red'
+    plies = 0
+    reason = 'max_plies'
+    winner = None
+    try:
+        while plies < max_plies:
+            key = chessboard.hash_key(side)
+            repetitions[key] = repetitions.get(key, 0) + 1
+            if repetitions[key] >= REPETITION_LIMIT:
+                reason = 'repetition'
+                break
+            if not chessboard.generate_moves(side):
+                reason = 'no_moves'
+                winner = 'black' if side == 'red' else 'red'
+                break
+            bot = bots[side]
+            move_start = time.perf_counter()
+            history.append(ChessBoard.encode_move(bot.make_move()))
+            move_time[side] += time.perf_counter() - move_start
+            moves[side] += 1
+            nodes[side] += _search_nodes(bot)
+            plies += 1
+            if chessboard.winner is not None:
+                reason = 'king_captured'
+                winner = chessboard.winner
+                break
+            side = 'black' if side == 'red' else 'red'
+    finally:
+        for bot in bots.values():
+            if hasattr(bot, 'close'):
+                bot.close()
+    return {
+        'winner': winner,
+        'reason': reason,
+        'plies': plies,
+        'history': history,
+        'moves': moves,
+        'move_time': move_time,
+        'nodes': nodes,
+        'elapsed': time.perf_counter() - start_time,
+    }
+
+
+def _play_game_task(task: tuple) -> dict:
+    """工作进程入口。"""
+    return play_game(*task)
+
+
+def run_arena(bot_a: str, bot_b: str, games: int, workers: int = 1, max_plies: int = DEFAULT_MAX_PLIES,
+              swap_sides: bool = True, seed: int = None, record: str = None) -> dict:
+    """让两个机器人对弈若干盘，汇总结果。
+
+    Args:
+        bot_a (str): 机器人 A 的描述，见 parse_bot_spec。
+        bot_b (str): 机器人 B 的描述。
+        games (int): 对局数。
+        workers (int): 同时对局的进程数，为 1 时在当前进程内依次对局。
+        max_plies (int): 单盘的最大步数。
+        swap_sides (bool): 是否每盘交换双方颜色；否则 A 始终执红。
+        seed (int): 随机种子，第 i 盘使用 seed + i；为 None 时每盘随机选取种子。
+        record (str): 对局记录文件，不为 None 时把每盘棋追加到其中，格式见 GameRecord。
+
+    Returns:
+        dict: 以 A 的视角统计的胜、和、负，每秒对局数，以及双方的平均走棋耗时和每秒搜索节点数。
+    """
+    specs = {'a': parse_bot_spec(bot_a), 'b': parse_bot_spec(bot_b)}
+    tasks = []
+    colors = []
+    for i in range(games):
+        a_color = 'black' if swap_sides and i % 2 == 1 else 'red'
+        red, black = ('a', 'b') if a_color == 'red' else ('b', 'a')
+        game_seed = seed + i if seed is not None else random.getrandbits(64)
+        tasks.append((specs[red], specs[black], max_plies, game_seed))
+        colors.append(a_color)
+
+    start_time = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_game_task, tasks))
+    else:
+        results = [_play_game_task(task) for task in tasks]
+    elapsed = time.perf_counter() - start_time
+    if record is not None:
+        names = {'a': bot_a, 'b': bot_b}
+        with GameWriter(record) as writer:
+            for a_color, result in zip(colors, results):
+                red, black = ('a', 'b') if a_color == 'red' else ('b', 'a')
+                writer.write_game(result['history'], result['winner'] or 'draw', names[red], names[black])
+
+    outcomes = {'wins': 0, 'draws': 0, 'losses': 0}
+    reasons = {}
+    totals = {name: {'moves': 0, 'move_time': 0.0, 'nodes': 0} for name in specs}
+    for a_color, result in zip(colors, results):
+        b_color = 'black' if a_color == 'red' else 'red'
+        if result['winner'] is None:
+            outcomes['draws'] += 1
+        elif result['winner'] == a_color:
+            outcomes['wins'] += 1
+        else:
+            outcomes['losses'] += 1
+        reasons[result['reason']] = reasons.get(result['reason'], 0) + 1
+        for name, color in (('a', a_color), ('b', b_color)):
+            for field in ('moves', 'move_time', 'nodes'):
+                totals[name][field] += result[field][color]
+
+    bots = {}
+    for name, spec in specs.items():
+        total = totals[name]
+        bots[name] = {
+            'name': spec[0],
+            'options': spec[1],
+            'moves': total['moves'],
+            'avg_move_ms': total['move_time'] * 1000 / total['moves'] if total['moves'] else 0.0,
+            'nodes_per_second': total['nodes'] / total['move_time'] if total['move_time'] > 0 else 0.0,
+        }
+    return {
+        'games': games,
+        'workers': workers,
+        'max_plies': max_plies,
+        'wins': outcomes['wins'],
+        'draws': outcomes['draws'],
+        'losses': outcomes['losses'],
+        'reasons': reasons,
+        'avg_plies': sum(result['plies'] for result in results) / games if games else 0.0,
+        'elapsed': elapsed,
+        'games_per_second': games / elapsed if elapsed > 0 else 0.0,
+        'bot_a': bots['a'],
+        'bot_b': bots['b'],
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="无界面的机器人对战场，结果以 JSON 输出（胜/和/负以机器人 A 的视角统计）。")
+    parser.add_argument('bot_a', help='机器人 A，例如 "alphabeta:depth=3" 或 "mcts:iteration_limit=500"')
+    parser.add_argument('bot_b', help='机器人 B，可选 random / mcts / alphabeta')
+    parser.add_argument('-n', '--games', type=int, default=10, help='对局数')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='同时对局的进程数')
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES, help='单盘最大步数，达到后判和')
+    parser.add_argument('--no-swap', action='store_true', help='不交换颜色，机器人 A 始终执红')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('-o', '--output', default=None, help='把 JSON 结果写入文件，默认输出到标准输出')
+    parser.add_argument('--record', default=None, help='把每盘棋追加到这个对局记录文件（GameRecord 格式）')
+    args = parser.parse_args(argv)
+    # 开始对局之前先创建一次双方的机器人，使未知的机器人或参数、缺少 NumPy（evaluator 参数）等问题作为命令行错误报告，
+    # 而不是在工作进程中途失败
+    for spec in (args.bot_a, args.bot_b):
+        try:
+            bot = create_bot(parse_bot_spec(spec), ChessBoard(), 'red')
+        except (ValueError, TypeError, ImportError, OSError) as error:
+            parser.error(f"{spec}: {error}")
+        if hasattr(bot, 'close'):
+            bot.close()
+
+    summary = run_arena(args.bot_a, args.bot_b, args.games, args.workers, args.max_plies,
+                        swap_sides=not args.no_swap, seed=args.seed, record=args.record)
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("BatchMoveGen 需要 NumPy，请先运行 pip install -r requirements.txt") from error
+from ChessBoard import (ChessBoard, ChessPiece, BOARD_SQUARES, SQUARE_COORDS, PIECE_NAMES, RED_TAG, BLACK_TAG,
+                        KING, ROOK, CANNON, KNIGHT_MOVES, ELEPHANT_MOVES, GUARD_MOVES, KING_MOVES, PAWN_MOVES,
+                        RAYS, KING_FACING_RAY)
+
+# 批量接口中的棋盘编码为形状 (N, 10, 9) 的 int8 数组，第 row 行第 col 列对应 ChessBoard 的 (row, col)。
+# 空位为 0，红方棋子为“种类编号 + 1”（将帅 1、士 2、象 3、马 4、车 5、炮 6、兵 7），黑方棋子取相反数；
+# 格子编号为 row * 9 + col（0~89）。
+RED, BLACK = 1, -1  # 批量接口中表示走棋方的符号
+_NO_BLOCK = 90  # 不需要检查阻挡格子时使用的占位格子，对应占用情况中恒为空的第 91 列
+
+
+def _index(square: int) -> int:
+    """将 ChessBoard 内部数组下标转换为 0~89 的格子编号。"""
+    row, col = SQUARE_COORDS[square]
+    return row * 9 + col
+
+
+def _build_candidates(tag: int) -> tuple:
+    """根据 ChessBoard 的走法表为一方生成所有候选移动。
+
+    Returns:
+        tuple: (跳跃类候选, 直线类候选)。跳跃类为 (起点, 终点, 阻挡格子, 棋子编码) 四个数组；
+            直线类按车、炮、将帅分组，每组为 (棋子编码, 起点, 终点, 中间格子矩阵)，
+            中间格子矩阵形状为 (90, S)，标记起点和终点之间的格子。
+    """
+    leapers = []
+    sliders = []
+    for square in BOARD_SQUARES:
+        src = _index(square)
+        for dest, leg in KNIGHT_MOVES[square]:
+            leapers.append((src, _index(dest), _index(leg), 4))
+        for dest, eye in ELEPHANT_MOVES[tag][square]:
+            leapers.append((src, _index(dest), _index(eye), 3))
+        for dest in GUARD_MOVES[tag][square]:
+            leapers.append((src, _index(dest), _NO_BLOCK, 2))
+        for dest in KING_MOVES[tag][square]:
+            leapers.append((src, _index(dest), _NO_BLOCK, KING + 1))
+        for dest in PAWN_MOVES[tag][square]:
+            leapers.append((src, _index(dest), _NO_BLOCK, 7))
+        for direction, ray in enumerate(RAYS[square]):
+            codes = [ROOK + 1, CANNON + 1]
+            if direction == KING_FACING_RAY[tag]:
+                codes.append(KING + 1)  # 将帅对面
+            for i, dest in enumerate(ray):
+                between = [_index(s) for s in ray[:i]]
+                for code in codes:
+                    sliders.append((src, _index(dest), code, between))
+
+    leaper_arrays = tuple(np.array(column, dtype=np.int64) for column in zip(*leapers))
+    leaper_arrays = leaper_arrays[:3] + (leaper_arrays[3].astype(np.int8),)
+    # 直线类按棋子种类分组，每组只对该种类的候选移动计算掩码
+    slider_groups = []
+    for code in (ROOK + 1, CANNON + 1, KING + 1):
+        group = [s for s in sliders if s[2] == code]
+        between_matrix = np.zeros((90, len(group)), dtype=np.float32)
+        for column, (_, _, _, between) in enumerate(group):
+            between_matrix[between, column] = 1
+        slider_groups.append((
+            code,
+            np.array([s[0] for s in group], dtype=np.int64),
+            np.array([s[1] for s in group], dtype=np.int64),
+            between_matrix,
+        ))
+    return leaper_arrays, tuple(slider_groups)
+
+
+# 按走棋方预先计算的候选移动表
+_CANDIDATES = {RED: _build_candidates(RED_TAG), BLACK: _build_candidates(BLACK_TAG)}
+
+
+def encode_boards(chessboards: list) -> np.ndarray:
+    """将 ChessBoard 列表编码为形状 (N, 10, 9) 的 int8 数组。"""
+    boards = np.zeros((len(chessboards), 90), dtype=np.int8)
+    for i, chessboard in enumerate(chessboards):
+        squares = chessboard.squares
+        for index, square in enumerate(BOARD_SQUARES):
+            piece = squares[square]
+            if piece != 0:
+                boards[i, index] = (piece & 7) + 1 if piece & RED_TAG else -((piece & 7) + 1)
+    return boards.reshape(-1, 10, 9)
+
+
+def decode_board(board: np.ndarray) -> ChessBoard:
+    """将形状为 (10, 9) 的编码还原为 ChessBoard。"""
+    pieces = []
+    flat = np.asarray(board).reshape(90)
+    for index in np.flatnonzero(flat):
+        code = int(flat[index])
+        tag = RED_TAG if code > 0 else BLACK_TAG
+        row, col = divmod(int(index), 9)
+        name = PIECE_NAMES[tag][abs(code) - 1]
+        pieces.append(ChessPiece(name, 'red' if code > 0 else 'black', chr(col + ord('a')) + str(row)))
+    chessboard = ChessBoard()
+    chessboard.place_pieces(pieces)
+    return chessboard
+
+
+def game_results(boards: np.ndarray) -> np.ndarray:
+    """返回每个棋盘的对局结果：1 表示红方已吃掉黑将，-1 表示黑方已吃掉红帅，0 表示对局仍在进行。"""
+    flat = boards.reshape(len(boards), 90)
+    red_king = (flat == KING + 1).any(axis=1)
+    black_king = (flat == -(KING + 1)).any(axis=1)
+    return red_king.astype(np.int8) - black_king.astype(np.int8)
+
+
+def generate_moves_batch(boards: np.ndarray, sides) -> tuple:
+    """为一批棋盘生成走棋方的所有移动，规则与 ChessBoard.get_legal_moves 相同。
+
+    Args:
+        boards (np.ndarray): 形状 (N, 10, 9) 的 int8 棋盘编码。
+        sides: 各棋盘的走棋方，形状 (N,) 的数组（RED=1 或 BLACK=-1），或者对所有棋盘相同的 "red"/"black"。
+
+    Returns:
+        tuple: (board_index, from_square, to_square) 三个等长的 int64 数组，按棋盘编号排序。
+            已经分出胜负的棋盘没有移动。
+    """
+    flat = boards.reshape(len(boards), 90)
+    if isinstance(sides, str):
+        sides = np.full(len(boards), RED if sides == 'red' else BLACK, dtype=np.int8)
+    sides = np.asarray(sides)
+    ongoing = game_results(boards) == 0
+
+    results = []
+    for side in (RED, BLACK):
+        board_ids = np.flatnonzero((sides == side) & ongoing)
+        if len(board_ids) == 0:
+            continue
+        # 转换为本方视角：本方棋子为正，对方棋子为负
+        signed = flat[board_ids].astype(np.int8) * np.int8(side)
+        occupied = np.zeros((len(board_ids), 91), dtype=np.float32)
+        occupied[:, :90] = signed != 0
+        (leap_from, leap_to, leap_block, leap_code), slider_groups = _CANDIDATES[side]
+
+        # 跳跃类：棋子匹配、阻挡格子为空、目标不是本方棋子
+        mask = (signed[:, leap_from] == leap_code) & (occupied[:, leap_block] == 0) & (signed[:, leap_to] <= 0)
+        rows, columns = np.nonzero(mask)
+        results.append((board_ids[rows], leap_from[columns], leap_to[columns]))
+
+        # 直线类：用矩阵乘法一次算出每个候选移动起点和终点之间的棋子数
+        for code, slide_from, slide_to, between in slider_groups:
+            counts = occupied[:, :90] @ between
+            target = signed[:, slide_to]
+            mask = signed[:, slide_from] == code
+            if code == ROOK + 1:
+                mask &= (counts == 0) & (target <= 0)
+            elif code == CANNON + 1:
+                mask &= ((counts == 0) & (target == 0)) | ((counts == 1) & (target < 0))
+            else:
+                mask &= (counts == 0) & (target == -(KING + 1))  # 将帅对面
+            rows, columns = np.nonzero(mask)
+            results.append((board_ids[rows], slide_from[columns], slide_to[columns]))
+
+    if not results:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty.copy(), empty.copy()
+    board_index = np.concatenate([r[0] for r in results])
+    from_square = np.concatenate([r[1] for r in results])
+    to_square = np.concatenate([r[2] for r in results])
+    order = np.argsort(board_index, kind='stable')
+    return board_index[order], from_square[order], to_square[order]
+
+
+def sample_moves(board_index: np.ndarray, from_square: np.ndarray, to_square: np.ndarray, rng=None) -> tuple:
+    """从 generate_moves_batch 的结果中为每个有移动的棋盘均匀随机地选出一个移动。
+
+    Returns:
+        tuple: (board_index, from_square, to_square)，每个棋盘至多一个移动。
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if len(board_index) == 0:
+        return board_index, from_square, to_square
+    boards, starts, counts = np.unique(board_index, return_index=True, return_counts=True)
+    chosen = starts + rng.integers(0, counts)
+    return boards, from_square[chosen], to_square[chosen]
+
+
+def apply_moves(boards: np.ndarray, board_index: np.ndarray, from_square: np.ndarray, to_square: np.ndarray) -> np.ndarray:
+    """在一批棋盘上就地执行移动，每个棋盘至多一个移动，不做合法性校验。
+
+    Returns:
+        np.ndarray: 每个移动吃掉的棋子编码，没有吃子时为 0。吃掉将帅后可以用 game_results 判断胜负。
+    """
+    if len(np.unique(board_index)) != len(board_index):
+        raise ValueError("每个棋盘一次只能执行一个移动。")
+    if not boards.flags.c_contiguous:
+        raise ValueError("棋盘数组必须是 C 连续的，才能就地修改。")
+    flat = boards.reshape(len(boards), 90)
+    captured = flat[board_index, to_square].copy()
+    flat[board_index, to_square] = flat[board_index, from_square]
+    flat[board_index, from_square] = 0
+    return captured
@@ -0,0 +1,333 @@
+import argparse
+import importlib.util
+import json
+import random
+import sys
+import time
+from ChessBoard import ChessBoard
+from AlphaBetaBot import AlphaBetaBot
+from MCTSBot import MCTSBot
+
+# 固定局面的 perft 节点数，用于发现走法生成的正确性回归。
+# 走法为本项目的规则：不检查被将军，吃掉将帅即结束（分出胜负后没有后续走法），将帅对面按吃子处理。
+# 各数值已与最初基于二维列表的 ChessBoard 实现逐一核对。
+PERFT_SUITE = (
+    ('initial', 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w', (44, 1926, 80288)),
+    ('midgame', 'r1bakab1r/9/1cn4c1/p1p1p3p/6p2/2P6/P3P1P1P/1CN1B1NC1/9/R2AKAB1R b', (38, 1451, 54643)),
+    ('cannons', '2bak4/4a4/4b1n2/p3C3p/2p3p2/9/P1c3P1P/4B1N2/4A4/2BAK4 w', (25, 596, 14762)),
+    ('rook_endgame', '3k5/4a4/3a5/9/9/9/9/4R4/9/4K4 w', (18, 71, 1311, 5529)),
+    ('pawns', '4k4/9/3P1P3/9/2p3p2/9/9/9/4A4/3K5 b', (5, 55, 310, 3164)),
+)
+DEFAULT_TOLERANCE = 0.1  # 与基线相比，吞吐量变化超过这个比例才视为变快或变慢
+# 比较选择性搜索技术时使用的 AlphaBetaBot 开关组合
+SEARCH_FEATURES = (
+    ('baseline', {}),
+    ('pvs', {'pvs': True}),
+    ('null_move', {'null_move': True}),
+    ('lmr', {'lmr': True}),
+    ('all', {'pvs': True, 'null_move': True, 'lmr': True}),
+)
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+def _opposite(side: str) -> str:
+    return 'black' if side == 'red' else 'red'
+
+
+def perft(board: ChessBoard, side: str, depth: int) -> int:
+    """统计从当前局面出发走 depth 步能到达的叶子节点数。"""
+    if depth == 0:
+        return 1
+    moves = board.generate_moves(side)
+    if depth == 1:
+        return len(moves)
+    other = _opposite(side)
+    nodes = 0
+    for move in moves:
+        undo_token = board.make_move(move)
+        nodes += perft(board, other, depth - 1)
+        board.unmake_move(undo_token)
+    return nodes
+
+
+def run_perft_suite() -> dict:
+    """对 PERFT_SUITE 中的每个局面逐层计算 perft，并与期望值比较。
+
+    Returns:
+        dict: 局面名称到 {"nodes": [...], "expected": [...], "ok": bool, "nodes_per_second": float} 的映射。
+    """
+    results = {}
+    for name, fen, expected in PERFT_SUITE:
+        board, side = ChessBoard.from_fen(fen)
+        counts = []
+        start_time = time.perf_counter()
+        for depth in range(1, len(expected) + 1):
+            counts.append(perft(board, side, depth))
+        elapsed = time.perf_counter() - start_time
+        results[name] = {
+            'nodes': counts,
+            'expected': list(expected),
+            'ok': counts == list(expected),
+            'nodes_per_second': sum(counts) / elapsed if elapsed > 0 else 0.0,
+        }
+    return results
+
+
+def _suite_boards() -> list:
+    return [ChessBoard.from_fen(fen) for _, fen, _ in PERFT_SUITE]
+
+
+def _best_rate(function, repeat: int) -> float:
+    """多次运行 function（返回完成的工作量），取最快一次的每秒工作量，以减少偶然的干扰。"""
+    best = 0.0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        work = function()
+        elapsed = time.perf_counter() - start_time
+        if elapsed > 0:
+            best = max(best, work / elapsed)
+    return best
+
+
+def bench_legal_moves(repeat: int, rounds: int = 200) -> float:
+    """ChessBoard.get_legal_moves 的吞吐量，单位为每秒生成的移动数。"""
+    boards = _suite_boards()
+
+    def run():
+        moves = 0
+        for _ in range(rounds):
+            for board, side in boards:
+                moves += len(board.get_legal_moves(side))
+        return moves
+    return _best_rate(run, repeat)
+
+
+def bench_strictly_legal_moves(repeat: int, rounds: int = 200) -> float:
+    """ChessBoard.get_strictly_legal_moves 的吞吐量，单位为每秒生成的移动数。"""
+    boards = _suite_boards()
+
+    def run():
+        moves = 0
+        for _ in range(rounds):
+            for board, side in boards:
+                moves += len(board.get_strictly_legal_moves(side))
+        return moves
+    return _best_rate(run, repeat)
+
+
+def bench_move_piece(repeat: int, rounds: int = 20) -> float:
+    """ChessBoard.move_piece（带合法性校验的走子）的吞吐量，单位为每秒走子数。每次走子前复制棋盘。"""
+    cases = []
+    for board, side in _suite_boards():
+        for move in board.get_legal_moves(side):
+            src, dest = ChessBoard.coords_to_alphanumeric(move)
+            cases.append((board, src, dest))
+
+    def run():
+        for _ in range(rounds):
+            for board, src, dest in cases:
+                board.copy().move_piece(src, dest)
+        return rounds * len(cases)
+    return _best_rate(run, repeat)
+
+
+def bench_make_unmake(repeat: int, rounds: int = 200) -> float:
+    """ChessBoard.make_move/unmake_move 的吞吐量，单位为每秒执行并撤销的移动数。"""
+    cases = [(board, board.generate_moves(side)) for board, side in _suite_boards()]
+
+    def run():
+        count = 0
+        for _ in range(rounds):
+            for board, moves in cases:
+                for move in moves:
+                    board.unmake_move(board.make_move(move))
+                count += len(moves)
+        return count
+    return _best_rate(run, repeat)
+
+
+def bench_copy(repeat: int, rounds: int = 5000) -> float:
+    """ChessBoard.copy 的吞吐量，单位为每秒复制次数。"""
+    boards = [board for board, _ in _suite_boards()]
+
+    def run():
+        for _ in range(rounds):
+            for board in boards:
+                board.copy()
+        return rounds * len(boards)
+    return _best_rate(run, repeat)
+
+
+def bench_alphabeta(repeat: int, depth: int = 3) -> float:
+    """AlphaBetaBot 固定深度搜索的吞吐量，单位为每秒搜索节点数。每个局面使用新的机器人，保证结果可重复。"""
+    def run():
+        nodes = 0
+        for board, side in _suite_boards():
+            bot = AlphaBetaBot(board, side, depth, tt_size_mb=4)
+            bot.make_move()
+            nodes += bot.nodes
+        return nodes
+    return _best_rate(run, repeat)
+
+
+def bench_playouts(repeat: int, playouts: int = 100) -> float:
+    """MCTSBot.simulate_random_game 的吞吐量，单位为每秒模拟次数。"""
+    boards = _suite_boards()
+
+    def run():
+        random.seed(0)
+        for board, side in boards:
+            bot = MCTSBot(board, side)
+            for _ in range(playouts):
+                bot.simulate_random_game(board, side)
+        return playouts * len(boards)
+    return _best_rate(run, repeat)
+
+
+def bench_batched_leaves(repeat: int, iterations: int = 512) -> float:
+    """MCTSBot 批量叶子估值（默认的线性估值器）的吞吐量，单位为每秒迭代数。需要 NumPy。"""
+    from LeafEvaluator import LinearEvaluator
+    evaluator = LinearEvaluator.from_eval_table()
+    boards = _suite_boards()
+
+    def run():
+        random.seed(0)
+        for board, side in boards:
+            MCTSBot(board, side, evaluator=evaluator).search_batched(board, iterations)
+        return iterations * len(boards)
+    return _best_rate(run, repeat)
+
+
+def measure_search_features(depth: int = 4, quiescence: bool = True) -> dict:
+    """在 PERFT_SUITE 的各局面上用固定深度搜索，比较 SEARCH_FEATURES 中各开关组合的节点数。
+
+    Returns:
+        dict: 组合名称到 {"nodes": 总节点数, "ratio": 相对 baseline 的节点数之比, "elapsed": 秒,
+            "moves": 各局面选择的着法} 的映射。
+    """
+    results = {}
+    for name, options in SEARCH_FEATURES:
+        nodes = 0
+        moves = {}
+        start_time = time.perf_counter()
+        for position, fen, _ in PERFT_SUITE:
+            board, side = ChessBoard.from_fen(fen)
+            bot = AlphaBetaBot(board, side, depth, tt_size_mb=4, quiescence=quiescence, **options)
+            moves[position] = ''.join(ChessBoard.coords_to_alphanumeric(bot.make_move()))
+            nodes += bot.nodes
+        results[name] = {'nodes': nodes, 'elapsed': time.perf_counter() - start_time, 'moves': moves}
+    for result in results.values():
+        result['ratio'] = result['nodes'] / results['baseline']['nodes']
+    return results
+
+
+# 吞吐量指标：名称 -> (测量函数, 单位)，数值越大越好
+THROUGHPUT_BENCHMARKS = {
+    'legal_moves_per_second': (bench_legal_moves, 'moves/s'),
+    'strictly_legal_moves_per_second': (bench_strictly_legal_moves, 'moves/s'),
+    'move_piece_per_second': (bench_move_piece, 'moves/s'),
+    'make_unmake_per_second': (bench_make_unmake, 'moves/s'),
+    'copy_per_second': (bench_copy, 'copies/s'),
+    'alphabeta_nodes_per_second': (bench_alphabeta, 'nodes/s'),
+    'playouts_per_second': (bench_playouts, 'playouts/s'),
+    'batched_leaves_per_second': (bench_batched_leaves, 'iterations/s'),
+}
+# 需要 NumPy 的吞吐量测试；没有安装 NumPy 时，不指定测试的运行会跳过它们
+NUMPY_BENCHMARKS = ('batched_leaves_per_second',)
+
+
+def run_benchmarks(repeat: int = 3, names: list = None) -> dict:
+    """运行 perft 正确性检查和吞吐量测试。
+
+    Args:
+        repeat (int): 每项吞吐量测试的重复次数，取最快的一次。
+        names (list): 只运行这些吞吐量测试，为 None 时全部运行（没有 NumPy 时跳过 NUMPY_BENCHMARKS）。
+
+    Returns:
+        dict: {"perft": run_perft_suite 的结果, "throughput": 指标名称到每秒工作量的映射, "python": 版本号}。
+    """
+    throughput = {}
+    for name, (function, _) in THROUGHPUT_BENCHMARKS.items():
+        if names is None and name in NUMPY_BENCHMARKS and not HAS_NUMPY:
+            continue
+        if names is None or name in names:
+            throughput[name] = function(repeat)
+    return {
+        'perft': run_perft_suite(),
+        'throughput': throughput,
+        'python': sys.version.split()[0],
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> dict:
+    """将吞吐量与基线比较。
+
+    Args:
+        results (dict): run_benchmarks 的结果。
+        baseline (dict): 之前保存的 run_benchmarks 结果。
+        tolerance (float): 允许的相对变化，超过时标记为 "faster" 或 "slower"，否则为 "same"。
+
+    Returns:
+        dict: 指标名称到 {"baseline", "current", "ratio", "status"} 的映射，只包含双方都有的指标。
+    """
+    comparison = {}
+    for name, current in results['throughput'].items():
+        previous = baseline.get('throughput', {}).get(name)
+        if not previous:
+            continue
+        ratio = current / previous
+        if ratio > 1 + tolerance:
+            status = 'faster'
+        elif ratio < 1 - tolerance:
+            status = 'slower'
+        else:
+            status = 'same'
+        comparison[name] = {'baseline': previous, 'current': current, 'ratio': ratio, 'status': status}
+    return comparison
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="走法生成的 perft 检查与走子、搜索、模拟的吞吐量测试。")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='结果 JSON 文件')
+    parser.add_argument('-b', '--baseline', default=None, help='用于比较的基线 JSON 文件，即之前某次运行时 -o 写出的结果')
+    parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE, help='吞吐量允许的相对变化')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='每项测试的重复次数，取最快的一次')
+    parser.add_argument('--only', nargs='*', choices=list(THROUGHPUT_BENCHMARKS), default=None,
+                        help='只运行指定的吞吐量测试')
+    parser.add_argument('--search-features', type=int, default=None, metavar='DEPTH',
+                        help='另外以这个深度比较 PVS、空着裁剪和后期着法缩减的节点数')
+    args = parser.parse_args(argv)
+    if args.only and not HAS_NUMPY and set(args.only) & set(NUMPY_BENCHMARKS):
+        parser.error(f"{', '.join(NUMPY_BENCHMARKS)} 需要 NumPy，请先运行 pip install -r requirements.txt")
+
+    results = run_benchmarks(args.repeat, args.only)
+    if args.search_features is not None:
+        results['search_features'] = measure_search_features(args.search_features)
+    failed = False
+    for name, result in results['perft'].items():
+        mark = 'ok' if result['ok'] else 'MISMATCH'
+        print(f"perft {name:<14} {result['nodes']} {mark}")
+        failed |= not result['ok']
+    if args.only is None and not HAS_NUMPY:
+        print(f"未安装 NumPy，跳过 {', '.join(NUMPY_BENCHMARKS)}")
+    for name, value in results['throughput'].items():
+        print(f"{name:<32} {value:>14,.0f} {THROUGHPUT_BENCHMARKS[name][1]}")
+    for name, item in results.get('search_features', {}).items():
+        print(f"search {name:<25} {item['nodes']:>14,} nodes {item['ratio']:6.2f}x {item['elapsed']:8.2f}s")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        results['comparison'] = compare_with_baseline(results, baseline, args.tolerance)
+        for name, item in results['comparison'].items():
+            print(f"{name:<32} {item['ratio']:6.2f}x {item['status']}")
+            failed |= item['status'] == 'slower'
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    # perft 不一致或者有指标比基线慢时返回非零，便于在脚本中使用
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
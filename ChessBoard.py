@@ -1,4 +1,237 @@
+import random
+
+# 棋盘内部使用 16x16 的一维填充数组（mailbox）表示，第 row 行第 col 列对应下标
+# (row + 3) * 16 + col + 3。棋盘四周的填充格标记为 OFFBOARD，走子越界时会自然地被当作障碍。
+BOARD_WIDTH = 16
+BOARD_OFFSET = 3
+
+# 棋子种类编号
+KING, GUARD, ELEPHANT, KNIGHT, ROOK, CANNON, PAWN = range(7)
+# 棋子编码为“所属方标记 | 种类编号”，0 表示空位
+RED_TAG, BLACK_TAG = 8, 16
+SIDE_MASK = RED_TAG | BLACK_TAG  # tag ^ SIDE_MASK 即为对方的标记
+OFFBOARD = 32
+SIDES = ('red', 'black')
+SIDE_TAGS = {'red': RED_TAG, 'black': BLACK_TAG}
+
+# 棋子名称到棋子种类编号的映射，红黑双方同类棋子共用一个编号
+PIECE_KINDS = {
+    '帅': KING, '将': KING, '士': GUARD, '仕': GUARD, '象': ELEPHANT, '相': ELEPHANT,
+    '马': KNIGHT, '车': ROOK, '炮': CANNON, '兵': PAWN, '卒': PAWN,
+}
+PIECE_NAMES = {
+    RED_TAG: ('帅', '士', '象', '马', '车', '炮', '兵'),
+    BLACK_TAG: ('将', '士', '象', '马', '车', '炮', '卒'),
+}
+# FEN 中按棋子种类编号排列的字母，红方大写、黑方小写
+FEN_LETTERS = 'kabnrcp'
+
+
+def coords_to_square(row: int, col: int) -> int:
+    """将 (row, col) 坐标转换为内部数组下标。"""
+    return (row + BOARD_OFFSET) * BOARD_WIDTH + col + BOARD_OFFSET
+
+
+def square_to_coords(square: int) -> tuple:
+    """将内部数组下标转换为 (row, col) 坐标。"""
+    return (square >> 4) - BOARD_OFFSET, (square & 15) - BOARD_OFFSET
+
+
+# 棋盘内的 90 个格子，按行优先顺序排列
+BOARD_SQUARES = tuple(coords_to_square(row, col) for row in range(10) for col in range(9))
+SQUARE_COORDS = [None] * 256
+for _square in BOARD_SQUARES:
+    SQUARE_COORDS[_square] = square_to_coords(_square)
+
+_EMPTY_SQUARES = bytearray([OFFBOARD]) * 256
+for _square in BOARD_SQUARES:
+    _EMPTY_SQUARES[_square] = 0
+
+# 各方的九宫和本方半场（过河前的区域），按格子下标索引
+IN_PALACE = {RED_TAG: bytearray(256), BLACK_TAG: bytearray(256)}
+IN_OWN_HALF = {RED_TAG: bytearray(256), BLACK_TAG: bytearray(256)}
+for _square in BOARD_SQUARES:
+    _row, _col = SQUARE_COORDS[_square]
+    IN_PALACE[RED_TAG][_square] = _row <= 2 and 3 <= _col <= 5
+    IN_PALACE[BLACK_TAG][_square] = _row >= 7 and 3 <= _col <= 5
+    IN_OWN_HALF[RED_TAG][_square] = _row <= 4
+    IN_OWN_HALF[BLACK_TAG][_square] = _row >= 5
+FORWARD = {RED_TAG: BOARD_WIDTH, BLACK_TAG: -BOARD_WIDTH}  # 红方向下（行号增大），黑方向上
+
+
+def _build_move_tables():
+    """在导入时为每个格子预先计算各棋子的走法表，表中只包含棋盘内的目标格子。"""
+    on_board = bytearray(256)
+    for square in BOARD_SQUARES:
+        on_board[square] = 1
+    knight_moves = [()] * 256
+    elephant_moves = {RED_TAG: [()] * 256, BLACK_TAG: [()] * 256}
+    guard_moves = {RED_TAG: [()] * 256, BLACK_TAG: [()] * 256}
+    king_moves = {RED_TAG: [()] * 256, BLACK_TAG: [()] * 256}
+    pawn_moves = {RED_TAG: [()] * 256, BLACK_TAG: [()] * 256}
+    rays = [()] * 256
+    for square in BOARD_SQUARES:
+        # 马：(目标格子, 马脚格子)
+        knight_moves[square] = tuple(
+            (square + delta, square + leg)
+            for delta, leg in ((-33, -16), (-31, -16), (31, 16), (33, 16), (-18, -1), (-14, 1), (14, -1), (18, 1))
+            if on_board[square + delta]
+        )
+        # 车和炮：右、下、左、上四个方向的射线，按由近到远排列
+        ray_list = []
+        for delta in (1, BOARD_WIDTH, -1, -BOARD_WIDTH):
+            ray = []
+            dest = square + delta
+            while on_board[dest]:
+                ray.append(dest)
+                dest += delta
+            ray_list.append(tuple(ray))
+        rays[square] = tuple(ray_list)
+        for tag in (RED_TAG, BLACK_TAG):
+            # 相（象）：(目标格子, 象眼格子)，不能过河
+            elephant_moves[tag][square] = tuple(
+                (square + delta, square + delta // 2) for delta in (34, 30, -30, -34)
+                if IN_OWN_HALF[tag][square + delta]
+            )
+            # 士和将（帅）只能在本方九宫内移动
+            guard_moves[tag][square] = tuple(
+                square + delta for delta in (-17, -15, 15, 17) if IN_PALACE[tag][square + delta]
+            )
+            king_moves[tag][square] = tuple(
+                square + delta for delta in (1, -1, BOARD_WIDTH, -BOARD_WIDTH) if IN_PALACE[tag][square + delta]
+            )
+            # 兵（卒）：向前一步，过河后可以左右移动
+            dests = [square + FORWARD[tag]]
+            if not IN_OWN_HALF[tag][square]:
+                dests += [square - 1, square + 1]
+            pawn_moves[tag][square] = tuple(dest for dest in dests if on_board[dest])
+    return knight_moves, elephant_moves, guard_moves, king_moves, pawn_moves, rays
+
+
+KNIGHT_MOVES, ELEPHANT_MOVES, GUARD_MOVES, KING_MOVES, PAWN_MOVES, RAYS = _build_move_tables()
+# 将帅对面检查所沿的射线方向：红方向下，黑方向上（对应 RAYS 中的下标）
+KING_FACING_RAY = {RED_TAG: 1, BLACK_TAG: 3}
+# 炮的射线按右、左、下、上排列，使走法顺序与最初基于二维列表的实现一致
+CANNON_RAYS = [(rays[0], rays[2], rays[1], rays[3]) if rays else () for rays in RAYS]
+
+
+def _build_attack_tables():
+    """由走法表反向构造攻击表，用于从被攻击的格子出发寻找攻击者。"""
+    knight_attacks = [[] for _ in range(256)]
+    pawn_attacks = {RED_TAG: [[] for _ in range(256)], BLACK_TAG: [[] for _ in range(256)]}
+    for square in BOARD_SQUARES:
+        # 马：(马所在格子, 马脚格子)，马脚是马的邻格、被攻击格子的斜邻格
+        for dest, leg in KNIGHT_MOVES[square]:
+            knight_attacks[dest].append((square, leg))
+        # 兵（卒）：按兵所属方索引，能走到该格子的兵所在的格子
+        for tag in (RED_TAG, BLACK_TAG):
+            for dest in PAWN_MOVES[tag][square]:
+                pawn_attacks[tag][dest].append(square)
+    knight_attacks = [tuple(attacks) for attacks in knight_attacks]
+    pawn_attacks = {tag: [tuple(attacks) for attacks in table] for tag, table in pawn_attacks.items()}
+    return knight_attacks, pawn_attacks
+
+
+KNIGHT_ATTACKS, PAWN_ATTACKS = _build_attack_tables()
+PALACE_SQUARES = {tag: tuple(square for square in BOARD_SQUARES if IN_PALACE[tag][square]) for tag in (RED_TAG, BLACK_TAG)}
+# 格子的四个斜邻格，即攻击该格子的马的马脚可能所在的位置
+DIAGONAL_NEIGHBORS = [frozenset()] * 256
+for _square in BOARD_SQUARES:
+    DIAGONAL_NEIGHBORS[_square] = frozenset(_square + delta for delta in (-17, -15, 15, 17))
+
+# Zobrist 随机数表：ZOBRIST_KEYS[棋子编码][格子下标]，使用固定种子保证各进程一致
+_zobrist_random = random.Random(0x5A0B715)
+ZOBRIST_KEYS = [[0] * 256 for _ in range(OFFBOARD)]
+for _tag in (RED_TAG, BLACK_TAG):
+    for _kind in range(7):
+        for _square in BOARD_SQUARES:
+            ZOBRIST_KEYS[_tag | _kind][_square] = _zobrist_random.getrandbits(64)
+ZOBRIST_SIDE_KEY = _zobrist_random.getrandbits(64)  # 黑方走棋时异或该值
+
+# 默认的棋子价值，按棋子种类编号索引：将帅、士、象、马、车、炮、兵卒
+PIECE_VALUES = (900, 20, 20, 40, 90, 50, 10)
+# 默认的位置分值表，按棋子种类编号索引，每张表以红方视角按 row * 9 + col 排列（第 0 行是红方底线），
+# 黑方使用上下翻转后的同一张表
+PIECE_SQUARE_TABLES = (
+    (0,) * 90,  # 将帅
+    (0,) * 90,  # 士
+    (0,) * 90,  # 象
+    (  # 马：靠近中心、跃过河界后更灵活
+        0, -2, 0, 0, 0, 0, 0, -2, 0,
+        0, 0, 0, 0, -4, 0, 0, 0, 0,
+        0, 1, 2, 2, 1, 2, 2, 1, 0,
+        0, 1, 3, 2, 3, 2, 3, 1, 0,
+        1, 2, 3, 4, 3, 4, 3, 2, 1,
+        1, 4, 4, 5, 4, 5, 4, 4, 1,
+        2, 4, 6, 6, 5, 6, 6, 4, 2,
+        2, 5, 6, 7, 6, 7, 6, 5, 2,
+        2, 3, 6, 4, 3, 4, 6, 3, 2,
+        1, 2, 2, 3, 1, 3, 2, 2, 1,
+    ),
+    (  # 车：占据对方半场和肋道
+        -2, 2, 1, 3, 0, 3, 1, 2, -2,
+        2, 3, 2, 4, 0, 4, 2, 3, 2,
+        0, 2, 1, 3, 3, 3, 1, 2, 0,
+        1, 3, 2, 4, 4, 4, 2, 3, 1,
+        2, 4, 3, 5, 5, 5, 3, 4, 2,
+        2, 4, 3, 5, 5, 5, 3, 4, 2,
+        3, 5, 4, 6, 6, 6, 4, 5, 3,
+        3, 4, 4, 6, 6, 6, 4, 4, 3,
+        3, 5, 4, 6, 7, 6, 4, 5, 3,
+        3, 4, 3, 6, 6, 6, 3, 4, 3,
+    ),
+    (  # 炮：中路和对方底线附近威胁较大
+        0, 0, 1, 2, 2, 2, 1, 0, 0,
+        0, 1, 2, 2, 2, 2, 2, 1, 0,
+        1, 0, 2, 1, 3, 1, 2, 0, 1,
+        0, 0, 0, 0, 1, 0, 0, 0, 0,
+        0, 0, 0, 0, 2, 0, 0, 0, 0,
+        0, 0, 1, 0, 2, 0, 1, 0, 0,
+        0, 0, 0, 0, 2, 0, 0, 0, 0,
+        1, 1, 0, 1, 3, 1, 0, 1, 1,
+        2, 2, 1, 0, 2, 0, 1, 2, 2,
+        3, 2, 0, 1, 2, 1, 0, 2, 3,
+    ),
+    (  # 兵卒：过河后价值上升，接近九宫时最高，沉底后作用减弱
+        0, 0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 1, 0, 0, 0, 0,
+        0, 0, 1, 0, 2, 0, 1, 0, 0,
+        2, 3, 4, 5, 6, 5, 4, 3, 2,
+        4, 6, 8, 9, 10, 9, 8, 6, 4,
+        4, 6, 8, 10, 12, 10, 8, 6, 4,
+        4, 6, 8, 10, 12, 10, 8, 6, 4,
+        0, 1, 2, 3, 4, 3, 2, 1, 0,
+    ),
+)
+
+
+def build_eval_table(piece_values=PIECE_VALUES, piece_square_tables=PIECE_SQUARE_TABLES) -> list:
+    """将棋子价值和位置分值表合并为按 [棋子编码][格子下标] 索引的分值表，供增量评估使用。
+
+    Args:
+        piece_values (tuple): 按棋子种类编号索引的棋子价值。
+        piece_square_tables (tuple): 按棋子种类编号索引的位置分值表，格式同 PIECE_SQUARE_TABLES。
+
+    Returns:
+        list: 分值表，eval_table[code][square] 为该棋子位于该格子时为所属方贡献的分值。
+    """
+    eval_table = [[0] * 256 for _ in range(OFFBOARD)]
+    for kind in range(7):
+        for square in BOARD_SQUARES:
+            row, col = SQUARE_COORDS[square]
+            eval_table[RED_TAG | kind][square] = piece_values[kind] + piece_square_tables[kind][row * 9 + col]
+            eval_table[BLACK_TAG | kind][square] = piece_values[kind] + piece_square_tables[kind][(9 - row) * 9 + col]
+    return eval_table
+
+
+DEFAULT_EVAL_TABLE = build_eval_table()
+
+
 class ChessPiece:
+    __slots__ = ('name', 'side', 'position')
+
     def __init__(self, name, side, position):
         self.name = name  # 棋子名称
         self.side = side  # 所属方，'red' 或 'black'
@@ -13,11 +246,37 @@ class ChessPiece:
 
 class ChessBoard:
     def __init__(self):
-        # 初始化棋盘，使用二维数组表示，None表示空位
-        self.board = [[None for _ in range(9)] for _ in range(10)]
+        # 初始化棋盘，使用一维填充数组保存棋子编码，0 表示空位
+        self.squares = bytearray(_EMPTY_SQUARES)
         self.winner = None
+        self.zobrist = 0  # 当前局面（不含走棋方）的 64 位 Zobrist 键值，随移动增量更新
+        # 双方的子力与位置分值之和，随移动增量更新，评估局面时无需扫描棋盘
+        self.eval_table = DEFAULT_EVAL_TABLE
+        self.red_score = 0
+        self.black_score = 0
         # 初始化棋子，这里省略了棋子的放置代码，参考之前的初始化方法
 
+    @property
+    def board(self) -> list:
+        """棋盘的 10x9 二维视图，元素为 ChessPiece 或 None。
+
+        每次访问都会根据内部数组重新生成，修改返回的列表不会影响棋盘，
+        需要改变局面时请使用 place_pieces、move_piece 或 make_move。
+        """
+        squares = self.squares
+        rows = []
+        for row in range(10):
+            cells = []
+            for col in range(9):
+                piece = squares[coords_to_square(row, col)]
+                if piece == 0:
+                    cells.append(None)
+                else:
+                    side = 'red' if piece & RED_TAG else 'black'
+                    cells.append(ChessPiece(PIECE_NAMES[piece & SIDE_MASK][piece & 7], side, chr(col + ord('a')) + str(row)))
+            rows.append(cells)
+        return rows
+
     def set_initial_pieces(self):
         """设置初始棋子。
         """
@@ -49,7 +308,53 @@ class ChessBoard:
         """
         for piece in pieces:
             col, row = ord(piece.position[0]) - ord('a'), int(piece.position[1])
-            self.board[row][col] = piece
+            square = coords_to_square(row, col)
+            code = SIDE_TAGS[piece.side] | PIECE_KINDS[piece.name]
+            if self.squares[square] != 0:
+                self._remove_piece_score(self.squares[square], square)
+                self.zobrist ^= ZOBRIST_KEYS[self.squares[square]][square]
+            self.squares[square] = code
+            self.zobrist ^= ZOBRIST_KEYS[code][square]
+            if code & RED_TAG:
+                self.red_score += self.eval_table[code][square]
+            else:
+                self.black_score += self.eval_table[code][square]
+
+    def _remove_piece_score(self, piece: int, square: int):
+        """从所属方的分值中扣除位于 square 的棋子的分值。"""
+        if piece & RED_TAG:
+            self.red_score -= self.eval_table[piece][square]
+        else:
+            self.black_score -= self.eval_table[piece][square]
+
+    def set_evaluation(self, piece_values=PIECE_VALUES, piece_square_tables=PIECE_SQUARE_TABLES):
+        """更换该棋盘使用的棋子价值和位置分值表，并按当前局面重新计算双方分值。
+
+        Args:
+            piece_values (tuple): 按棋子种类编号索引的棋子价值。
+            piece_square_tables (tuple): 按棋子种类编号索引的位置分值表，格式同 PIECE_SQUARE_TABLES。
+        """
+        self.eval_table = build_eval_table(piece_values, piece_square_tables)
+        self.red_score = self.black_score = 0
+        for square in BOARD_SQUARES:
+            piece = self.squares[square]
+            if piece & RED_TAG:
+                self.red_score += self.eval_table[piece][square]
+            elif piece:
+                self.black_score += self.eval_table[piece][square]
+
+    def evaluate(self, side: str) -> int:
+        """以指定方的视角返回当前的子力与位置分值之差，时间复杂度 O(1)。
+
+        Args:
+            side (str): 评估视角，"black" 或 "red"。
+
+        Returns:
+            int: 本方分值减去对方分值。
+        """
+        if side == 'red':
+            return self.red_score - self.black_score
+        return self.black_score - self.red_score
             
     def print_board(self):
         """打印棋盘状态。
@@ -83,27 +388,15 @@ class ChessBoard:
         if self.winner is not None:
             return []
         col, row = ord(position[0]) - ord('a'), int(position[1])
-        piece = self.board[row][col]
-        if piece is None:
+        if not (0 <= row < 10 and 0 <= col < 9):
+            return []
+        square = coords_to_square(row, col)
+        piece = self.squares[square]
+        if piece == 0:
             return []  # 如果指定位置没有棋子，则返回空列表
 
         # 根据棋子类型调用对应的移动逻辑
-        if piece.name == '车':
-            return self._get_rook_moves(row, col)
-        elif piece.name == '马':
-            return self._get_knight_moves(row, col)
-        elif piece.name == '象' or piece.name == '相':
-            return self._get_elephant_moves(row, col)
-        elif piece.name == '士' or piece.name == '仕':
-            return self._get_guard_moves(row, col)
-        elif piece.name == '将' or piece.name == '帅':
-            return self._get_king_moves(row, col)
-        elif piece.name == '炮':
-            return self._get_cannon_moves(row, col)
-        elif piece.name == '兵' or piece.name == '卒':
-            return self._get_pawn_moves(row, col)
-        else:
-            return []
+        return [SQUARE_COORDS[dest] for dest in _MOVE_GENERATORS[piece & 7](self, square, piece & SIDE_MASK)]
 
     def get_possible_moves_with_coords(self, position: tuple) -> list:
         """根据行列坐标获取指定位置的棋子的可能移动位置。该函数是 get_possible_moves 方法的包装。
@@ -116,168 +409,91 @@ class ChessBoard:
         """
         position_str = self.coords_to_alphanumeric([position])[0]
         return self.get_possible_moves(position_str)
-    
-    def _get_rook_moves(self, row, col):
+
+    # 以下各棋子的走法函数接收格子下标和本方标记，遍历预先计算的走法表，返回目标格子下标的列表
+
+    def _get_rook_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # 右、下、左、上
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 10 and 0 <= c < 9:
-                if self.board[r][c] is None:
-                    possible_moves.append((r, c))  # 添加空位置
+        for ray in RAYS[square]:
+            for dest in ray:
+                target = squares[dest]
+                if target == 0:
+                    possible_moves.append(dest)  # 添加空位置
                 else:
-                    if self.board[r][c].side != self.board[row][col].side:
-                        possible_moves.append((r, c))  # 可以吃掉对方棋子
+                    if not target & tag:
+                        possible_moves.append(dest)  # 可以吃掉对方棋子
                     break  # 遇到任何棋子停止检查这个方向
-                r += dr
-                c += dc
         return possible_moves
 
-    def _get_knight_moves(self, row, col):
+    def _get_knight_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        current_piece = self.board[row][col]
-        # 马的移动向量和对应的马脚位置
-        move_vectors = [(-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2)]
-        leg_positions = [(-1, 0), (-1, 0), (1, 0), (1, 0), (0, -1), (0, 1), (0, -1), (0, 1)]
-
-        for i, (dr, dc) in enumerate(move_vectors):
-            leg_row, leg_col = row + leg_positions[i][0], col + leg_positions[i][1]
-            new_row, new_col = row + dr, col + dc
-            
-            # print(row, col, leg_row, leg_col, new_row, new_col)
-            # 检查马脚位置和目标位置是否合法：马脚位置不能有棋子，目标位置不能越界、不能有己方棋子
-            if 0 <= new_row < 10 and 0 <= new_col < 9 and self.board[leg_row][leg_col] is None:
-                target_piece = self.board[new_row][new_col]
-                if target_piece is None or target_piece.side != current_piece.side:
-                    possible_moves.append((new_row, new_col))
-
+        for dest, leg in KNIGHT_MOVES[square]:
+            # 马脚位置不能有棋子，目标位置不能有己方棋子
+            if squares[leg] == 0 and not squares[dest] & tag:
+                possible_moves.append(dest)
         return possible_moves
 
-    def _get_elephant_moves(self, row, col):
+    def _get_elephant_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        current_piece = self.board[row][col]
-        directions = [(2, 2), (2, -2), (-2, 2), (-2, -2)]  # 定义“相”或“象”移动的四个方向
-        river_boundary = 4 if current_piece.side == 'red' else 5  # 定义楚河汉界
-
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            middle_row, middle_col = row + dr // 2, col + dc // 2  # 计算“田”字中心的位置
-            # 检查目标位置和“田”字中心的位置是否合法
-            if 0 <= new_row < 10 and 0 <= new_col < 9 and self.board[middle_row][middle_col] is None:
-                if current_piece.side == 'red' and new_row <= river_boundary or \
-                current_piece.side == 'black' and new_row >= river_boundary:
-                    target_piece = self.board[new_row][new_col]
-                    if target_piece is None or target_piece.side != current_piece.side:
-                        possible_moves.append((new_row, new_col))
-
+        for dest, eye in ELEPHANT_MOVES[tag][square]:
+            # “田”字中心不能有棋子，目标位置不能有己方棋子
+            if squares[eye] == 0 and not squares[dest] & tag:
+                possible_moves.append(dest)
         return possible_moves
 
-    def _get_guard_moves(self, row, col):
-        side = self.board[row][col].side
+    def _get_guard_moves(self, square, tag):
+        squares = self.squares
         moves = []
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]  # 斜线移动的四个方向
-        # 红方和黑方的九宫格范围
-        palace_bounds = {
-            'red': ((0, 2), (3, 5)),
-            'black': ((7, 9), (3, 5))
-        }
-        row_bounds, col_bounds = palace_bounds[side]
-
-        for drow, dcol in directions:
-            new_row, new_col = row + drow, col + dcol
-            # 检查是否在九宫内以及是否有己方棋子
-            if row_bounds[0] <= new_row <= row_bounds[1] and col_bounds[0] <= new_col <= col_bounds[1]:
-                target_piece = self.board[new_row][new_col]
-                if target_piece is None or target_piece.side != side:
-                    moves.append((new_row, new_col))
-        
+        for dest in GUARD_MOVES[tag][square]:
+            if not squares[dest] & tag:
+                moves.append(dest)
         return moves
 
-    def _get_king_moves(self, row, col):
+    def _get_king_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        current_piece = self.board[row][col]
-        # 定义移动方向：上、下、左、右
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        # 定义九宫格范围
-        king_zone = {
-            'red': (0, 2, 3, 5),
-            'black': (7, 9, 3, 5)
-        }
-        # 获取当前棋子的九宫格范围
-        zone = king_zone[current_piece.side]
-
-        # 检查水平和垂直方向移动一格的合法性
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if zone[0] <= new_row <= zone[1] and zone[2] <= new_col <= zone[3]:
-                target_piece = self.board[new_row][new_col]
-                if target_piece is None or target_piece.side != current_piece.side:
-                    possible_moves.append((new_row, new_col))
+        for dest in KING_MOVES[tag][square]:
+            if not squares[dest] & tag:
+                possible_moves.append(dest)
 
         # 检查垂直方向上是否直接对面对方的“将”或“帅”
-        direction_to_check = 1 if current_piece.side == 'red' else -1  # 红方向下检查，黑方向上检查
-        for i in range(1, 10):  # 最多检查棋盘的高度
-            check_row = row + i * direction_to_check
-            if check_row < 0 or check_row > 9:  # 超出棋盘范围
-                break
-            target_piece = self.board[check_row][col]
-            if target_piece is not None:
-                if target_piece.name in ['帅', '将'] and target_piece.side != current_piece.side:
-                    possible_moves.append((check_row, col))  # 直接对面对方的“将”或“帅”，可以移动
+        for dest in RAYS[square][KING_FACING_RAY[tag]]:
+            target = squares[dest]
+            if target != 0:
+                if target == (tag ^ SIDE_MASK) | KING:
+                    possible_moves.append(dest)  # 直接对面对方的“将”或“帅”，可以移动
                 break  # 遇到任何棋子都停止检查
-
         return possible_moves
 
-    def _get_cannon_moves(self, row, col):
+    def _get_cannon_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        current_piece = self.board[row][col]
-
-        # 检查横向和纵向的移动
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # 右、左、下、上
-        for dr, dc in directions:
-            obstacle_found = False  # 标记是否找到跳板（障碍）
-            for step in range(1, 10):  # 假设棋盘最大不超过10步
-                new_row, new_col = row + step * dr, col + step * dc
-                # 检查新位置是否超出棋盘
-                if not (0 <= new_row < 10 and 0 <= new_col < 9):
-                    break  # 超出棋盘范围
-
-                target_piece = self.board[new_row][new_col]
-                if target_piece is None:
-                    if not obstacle_found:  # 如果还没有找到障碍，可以移动
-                        possible_moves.append((new_row, new_col))
-                else:
-                    if not obstacle_found:
-                        obstacle_found = True  # 找到第一个障碍
-                    else:  # 如果已经找到障碍，检查这个位置的棋子是否为敌方棋子
-                        if target_piece.side != current_piece.side:
-                            possible_moves.append((new_row, new_col))  # 可以跳吃
-                        break  # 无论是否跳吃成功，之后的位置都不再考虑
-
+        for ray in CANNON_RAYS[square]:
+            dests = iter(ray)
+            for dest in dests:
+                if squares[dest] != 0:
+                    break  # 找到跳板
+                possible_moves.append(dest)  # 还没有找到跳板，可以移动
+            else:
+                continue
+            # 越过跳板后的第一个棋子如果是对方的，可以跳吃
+            for dest in dests:
+                target = squares[dest]
+                if target != 0:
+                    if not target & tag:
+                        possible_moves.append(dest)
+                    break
         return possible_moves
 
-    def _get_pawn_moves(self, row, col):
+    def _get_pawn_moves(self, square, tag):
+        squares = self.squares
         possible_moves = []
-        current_piece = self.board[row][col]
-        move_direction = 1 if current_piece.side == 'red' else -1  # 红方向下，黑方向上
-
-        # 楚河汉界的定义：红方的楚河汉界是第5行（从0开始计数），黑方的是第4行
-        river_boundary = 4 if current_piece.side == 'red' else 5
-
-        # 前进一步的移动
-        forward_row = row + move_direction
-        if 0 <= forward_row < 10:
-            if self.board[forward_row][col] is None or self.board[forward_row][col].side != current_piece.side:
-                possible_moves.append((forward_row, col))
-
-        # 楚河汉界后的左右移动
-        if (current_piece.side == 'red' and row > river_boundary) or (current_piece.side == 'black' and row < river_boundary):
-            for side_step in [-1, 1]:  # 左移和右移
-                side_col = col + side_step
-                if 0 <= side_col < 9:
-                    if self.board[row][side_col] is None or self.board[row][side_col].side != current_piece.side:
-                        possible_moves.append((row, side_col))
-
+        for dest in PAWN_MOVES[tag][square]:
+            if not squares[dest] & tag:
+                possible_moves.append(dest)
         return possible_moves
     
     def move_piece(self, src: str, dest: str) -> bool:
@@ -298,8 +514,7 @@ class ChessBoard:
             # print("Invalid move: Out of bounds")
             return False
         
-        moving_piece = self.board[src_row][src_col]
-        if moving_piece is None:
+        if self.squares[coords_to_square(src_row, src_col)] == 0:
             # print("Invalid move: No piece at source")
             return False
         
@@ -310,17 +525,67 @@ class ChessBoard:
             return False
         
         # 执行移动
-        target_piece = self.board[dest_row][dest_col]
-        self.board[dest_row][dest_col] = moving_piece
-        self.board[src_row][src_col] = None
+        self.make_move(((src_row, src_col), (dest_row, dest_col)))
         # print(f"Moved {moving_piece.name} from {src} to {dest}")
-        
-        # 检查是否吃掉了对方的将/帅
-        if target_piece is not None:
-            if target_piece.name == '将' or target_piece.name == '帅':
-                self.winner = 'black' if target_piece.side == 'red' else 'red'
-                # print(f"{self.winner} wins!")
         return True
+
+    def make_move(self, move) -> tuple:
+        """就地执行一个移动，不做合法性校验，供搜索使用。
+
+        Args:
+            move (int | tuple): generate_moves 返回的整数编码移动，或 get_legal_moves 返回的 (src, dest) 元组。
+
+        Returns:
+            tuple: 撤销令牌，传给 unmake_move 即可恢复到移动前的局面。
+        """
+        if type(move) is tuple:
+            move = self.encode_move(move)
+        src, dest = move >> 8, move & 0xFF
+        squares = self.squares
+        moving_piece = squares[src]
+        target_piece = squares[dest]
+        undo_token = (move, target_piece, self.winner, self.zobrist, self.red_score, self.black_score)
+        squares[dest] = moving_piece
+        squares[src] = 0
+        keys = ZOBRIST_KEYS[moving_piece]
+        self.zobrist ^= keys[src] ^ keys[dest]
+        scores = self.eval_table[moving_piece]
+        if moving_piece & RED_TAG:
+            self.red_score += scores[dest] - scores[src]
+        else:
+            self.black_score += scores[dest] - scores[src]
+
+        if target_piece != 0:
+            self.zobrist ^= ZOBRIST_KEYS[target_piece][dest]
+            self._remove_piece_score(target_piece, dest)
+            # 检查是否吃掉了对方的将/帅
+            if target_piece & 7 == KING:
+                self.winner = 'black' if target_piece & RED_TAG else 'red'
+                # print(f"{self.winner} wins!")
+        return undo_token
+
+    def unmake_move(self, undo_token: tuple):
+        """撤销 make_move 执行的移动，恢复被吃的棋子、winner、Zobrist 键值和双方分值。
+
+        Args:
+            undo_token (tuple): make_move 返回的撤销令牌，必须按后进先出的顺序撤销。
+        """
+        move, target_piece, self.winner, self.zobrist, self.red_score, self.black_score = undo_token
+        src, dest = move >> 8, move & 0xFF
+        squares = self.squares
+        squares[src] = squares[dest]
+        squares[dest] = target_piece
+
+    def hash_key(self, side: str) -> int:
+        """获取包含走棋方的局面键值，用于置换表等按局面索引的结构。
+
+        Args:
+            side (str): 轮到走棋的一方，"black" 或 "red"。
+
+        Returns:
+            int: 64 位局面键值。
+        """
+        return self.zobrist ^ ZOBRIST_SIDE_KEY if side == 'black' else self.zobrist
     
     def move_piece_with_coords(self, src_coords: tuple, dest_coords: tuple) -> bool:
         """根据行列坐标移动棋子。该函数是 move_piece 方法的包装。
@@ -343,16 +608,266 @@ class ChessBoard:
         Returns:
             list: 该颜色方的所有棋子的坐标元组列表，每个元组为(row, col)。
         """
-        positions = []
-        len_row = len(self.board)
-        len_col = len(self.board[0])
-        for row in range(len_row):
-            for col in range(len_col):
-                piece = self.board[row][col]
-                if piece is not None and piece.side == side:
-                    positions.append((row, col))
-        return positions
+        squares = self.squares
+        tag = SIDE_TAGS[side]
+        return [SQUARE_COORDS[square] for square in BOARD_SQUARES if squares[square] & tag]
+
+    def generate_moves(self, side: str) -> list:
+        """获取指定颜色方的所有合法移动，移动以整数编码，供搜索使用。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+
+        Returns:
+            list: 所有合法移动的列表，每个移动为 src << 8 | dest 形式的整数，src 和 dest 为内部数组下标。
+        """
+        if self.winner is not None:
+            return []
+        squares = self.squares
+        tag = SIDE_TAGS[side]
+        moves = []
+        for square in BOARD_SQUARES:
+            piece = squares[square]
+            if piece & tag:
+                for dest in _MOVE_GENERATORS[piece & 7](self, square, tag):
+                    moves.append(square << 8 | dest)
+        return moves
     
+    def generate_captures(self, side: str) -> list:
+        """获取指定颜色方的所有吃子移动，编码与 generate_moves 相同。
+
+        不生成完整的走法列表再筛选：车和炮沿射线只找第一个和第二个棋子，其余棋子只检查走法表中有对方棋子的目标格子。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+
+        Returns:
+            list: 吃子移动的列表，每个移动为 src << 8 | dest 形式的整数。
+        """
+        if self.winner is not None:
+            return []
+        squares = self.squares
+        tag = SIDE_TAGS[side]
+        enemy = tag ^ SIDE_MASK
+        captures = []
+        for square in BOARD_SQUARES:
+            piece = squares[square]
+            if not piece & tag:
+                continue
+            kind = piece & 7
+            if kind == ROOK:
+                for ray in RAYS[square]:
+                    for dest in ray:
+                        target = squares[dest]
+                        if target != 0:
+                            if target & enemy:
+                                captures.append(square << 8 | dest)
+                            break
+            elif kind == CANNON:
+                for ray in CANNON_RAYS[square]:
+                    screen = False
+                    for dest in ray:
+                        target = squares[dest]
+                        if target != 0:
+                            if screen:
+                                if target & enemy:
+                                    captures.append(square << 8 | dest)
+                                break
+                            screen = True  # 找到跳板
+            elif kind == KNIGHT:
+                for dest, leg in KNIGHT_MOVES[square]:
+                    if squares[dest] & enemy and squares[leg] == 0:
+                        captures.append(square << 8 | dest)
+            elif kind == ELEPHANT:
+                for dest, eye in ELEPHANT_MOVES[tag][square]:
+                    if squares[dest] & enemy and squares[eye] == 0:
+                        captures.append(square << 8 | dest)
+            else:
+                if kind == KING:
+                    dests = KING_MOVES[tag][square]
+                    # 将帅对面
+                    for dest in RAYS[square][KING_FACING_RAY[tag]]:
+                        target = squares[dest]
+                        if target != 0:
+                            if target == enemy | KING:
+                                captures.append(square << 8 | dest)
+                            break
+                elif kind == GUARD:
+                    dests = GUARD_MOVES[tag][square]
+                else:
+                    dests = PAWN_MOVES[tag][square]
+                for dest in dests:
+                    if squares[dest] & enemy:
+                        captures.append(square << 8 | dest)
+        return captures
+
+    def get_capture_moves(self, side: str) -> list:
+        """获取指定颜色方的所有吃子移动。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+
+        Returns:
+            list: 吃子移动的列表，每个移动为 (src, dest) 形式的元组。
+        """
+        return [(SQUARE_COORDS[move >> 8], SQUARE_COORDS[move & 0xFF]) for move in self.generate_captures(side)]
+
+    def _king_square(self, tag: int):
+        """返回一方将（帅）所在的格子下标，已被吃掉时返回 None。"""
+        squares = self.squares
+        king = tag | KING
+        for square in PALACE_SQUARES[tag]:
+            if squares[square] == king:
+                return square
+        return None
+
+    def _is_attacked(self, square: int, tag: int) -> bool:
+        """判断 tag 一方位于 square 的棋子是否能被对方吃掉。
+
+        从该格子向外扫描：四条射线上的第一个棋子是对方的车或将帅（将帅对面），第二个棋子是对方的炮；
+        按反向走法表检查马（马脚为空）和兵。士和象不能离开本方九宫或半场，攻击不到对方的将帅，不需要检查。
+        """
+        squares = self.squares
+        enemy = tag ^ SIDE_MASK
+        rook, cannon, king = enemy | ROOK, enemy | CANNON, enemy | KING
+        for ray in RAYS[square]:
+            screen = False
+            for dest in ray:
+                piece = squares[dest]
+                if piece != 0:
+                    if screen:
+                        if piece == cannon:
+                            return True
+                        break
+                    if piece == rook or piece == king:
+                        return True
+                    screen = True
+        knight = enemy | KNIGHT
+        for src, leg in KNIGHT_ATTACKS[square]:
+            if squares[src] == knight and squares[leg] == 0:
+                return True
+        pawn = enemy | PAWN
+        for src in PAWN_ATTACKS[enemy][square]:
+            if squares[src] == pawn:
+                return True
+        return False
+
+    def is_in_check(self, side: str) -> bool:
+        """判断一方是否被将军，即对方下一步能否吃掉它的将（帅）。将（帅）已被吃掉时也返回 True。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+        """
+        tag = SIDE_TAGS[side]
+        king = self._king_square(tag)
+        return king is None or self._is_attacked(king, tag)
+
+    def generate_strictly_legal_moves(self, side: str) -> list:
+        """获取指定颜色方不会让己方将（帅）被吃的移动，编码与 generate_moves 相同。
+
+        没有被将军时先从将（帅）出发找出可能改变攻击的格子：射线上的挡子后面有对方的车、将帅或炮时，移走挡子会暴露；
+        射线上第一个棋子是对方的炮时，在它和将（帅）之间放一个棋子会成为炮架；对方的马后面的马脚被移走时会暴露。
+        起点和终点都不是这些格子的移动（将帅本身的移动除外）直接视为合法，其余移动才在棋盘上临时走一步，
+        再从将（帅）所在格子向外检查攻击。被将军时每个移动都需要检查。吃掉对方将（帅）的移动总是合法的。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+
+        Returns:
+            list: 合法移动的列表，每个移动为 src << 8 | dest 形式的整数。已经分出胜负或者己方没有将（帅）时为空列表。
+        """
+        if self.winner is not None:
+            return []
+        squares = self.squares
+        tag = SIDE_TAGS[side]
+        enemy = tag ^ SIDE_MASK
+        enemy_king = enemy | KING
+        king = self._king_square(tag)
+        if king is None:
+            # 手工摆放或从 FEN 读入的局面可能没有己方的将（帅），与 is_in_check 一致，视为无法解除的被将军
+            return []
+        # 从将（帅）出发扫描一遍射线和马的位置，同时判断是否被将军并找出需要检查的格子
+        in_check = False
+        sensitive = {king}  # 作为起点时需要检查的格子：将（帅）、挡住对方车炮的棋子和马脚
+        screens = set()  # 作为终点时需要检查的格子：将（帅）与对方的炮之间的空位
+        rook, cannon = enemy | ROOK, enemy | CANNON
+        for ray in RAYS[king]:
+            first = second = 0
+            for index, dest in enumerate(ray):
+                piece = squares[dest]
+                if piece == 0:
+                    continue
+                if not first:
+                    first = dest
+                    if piece == rook or piece == enemy_king:
+                        in_check = True
+                        break
+                    if piece == cannon:
+                        screens.update(ray[:index])
+                elif not second:
+                    second = dest
+                    if piece == cannon:
+                        in_check = True
+                        break
+                    if piece == rook or piece == enemy_king:
+                        sensitive.add(first)
+                else:
+                    if piece == cannon:
+                        sensitive.add(first)
+                        sensitive.add(second)
+                    break
+        knight = enemy | KNIGHT
+        for src, leg in KNIGHT_ATTACKS[king]:
+            if squares[src] == knight:
+                if squares[leg] == 0:
+                    in_check = True
+                else:
+                    sensitive.add(leg)
+        if not in_check:
+            pawn = enemy | PAWN
+            for src in PAWN_ATTACKS[enemy][king]:
+                if squares[src] == pawn:
+                    in_check = True
+                    break
+
+        moves = []
+        for square in BOARD_SQUARES:
+            piece = squares[square]
+            if not piece & tag:
+                continue
+            dests = _MOVE_GENERATORS[piece & 7](self, square, tag)
+            if not in_check and square not in sensitive and (not screens or screens.isdisjoint(dests)):
+                for dest in dests:
+                    moves.append(square << 8 | dest)
+                continue
+            target_king = king
+            for dest in dests:
+                captured = squares[dest]
+                if captured == enemy_king:
+                    moves.append(square << 8 | dest)
+                    continue
+                # 在棋盘上临时走这一步，检查后立即恢复，不更新键值和分值
+                squares[dest] = piece
+                squares[square] = 0
+                if square == king:
+                    target_king = dest
+                if not self._is_attacked(target_king, tag):
+                    moves.append(square << 8 | dest)
+                squares[square] = piece
+                squares[dest] = captured
+        return moves
+
+    def get_strictly_legal_moves(self, side: str) -> list:
+        """获取指定颜色方不会让己方将（帅）被吃的所有移动，见 generate_strictly_legal_moves。
+
+        Args:
+            side (str): 棋子的颜色，"black" 或 "red"。
+
+        Returns:
+            list: 合法移动的列表，每个移动为 (src, dest) 形式的元组。
+        """
+        return [(SQUARE_COORDS[move >> 8], SQUARE_COORDS[move & 0xFF]) for move in self.generate_strictly_legal_moves(side)]
+
     def get_legal_moves(self, side: str) -> list:
         """获取指定颜色方的所有合法移动。
 
@@ -362,15 +877,7 @@ class ChessBoard:
         Returns:
             list: 所有合法移动的列表，每个移动为 (src, dest) 形式的元组。
         """
-        if self.winner is not None:
-            return []
-        positions = self.get_pieces_positions(side)
-        legal_moves = []
-        for position in positions:
-            possible_moves = self.get_possible_moves_with_coords(position)
-            for move in possible_moves:
-                legal_moves.append((position, move))
-        return legal_moves
+        return [(SQUARE_COORDS[move >> 8], SQUARE_COORDS[move & 0xFF]) for move in self.generate_moves(side)]
     
     def copy(self):
         """复制棋盘。
@@ -378,10 +885,99 @@ class ChessBoard:
         Returns:
             ChessBoard: 复制的棋盘。
         """
-        new_board = ChessBoard()
-        new_board.board = [row[:] for row in self.board]
+        new_board = ChessBoard.__new__(ChessBoard)
+        new_board.squares = self.squares[:]
         new_board.winner = self.winner
+        new_board.zobrist = self.zobrist
+        new_board.eval_table = self.eval_table
+        new_board.red_score = self.red_score
+        new_board.black_score = self.black_score
         return new_board
+
+    @classmethod
+    def from_fen(cls, fen: str) -> tuple:
+        """根据 FEN 串创建棋盘。
+
+        使用象棋通用引擎协议（UCCI）的 FEN 格式：棋盘部分从第 9 行（黑方底线）写到第 0 行，
+        每行从 a 列写到 i 列，红方棋子大写、黑方小写（K 帅将 A 仕士 B 相象 N 马 R 车 C 炮 P 兵卒），
+        数字表示连续的空位；其后是走棋方，"w" 或 "r" 表示红方，"b" 表示黑方，省略时为红方。其余字段被忽略。
+
+        Args:
+            fen (str): FEN 串，例如 "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w"。
+
+        Returns:
+            tuple: (棋盘, 走棋方)。
+        """
+        fields = fen.split()
+        rows = fields[0].split('/')
+        if len(rows) != 10:
+            raise ValueError(f"FEN 应包含 10 行: {fen}")
+        pieces = []
+        for i, text in enumerate(rows):
+            row = 9 - i
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                kind = FEN_LETTERS.find(char.lower())
+                if kind < 0 or col > 8:
+                    raise ValueError(f"无效的 FEN: {fen}")
+                side = 'red' if char.isupper() else 'black'
+                pieces.append(ChessPiece(PIECE_NAMES[SIDE_TAGS[side]][kind], side, chr(col + ord('a')) + str(row)))
+                col += 1
+            if col != 9:
+                raise ValueError(f"FEN 第 {i + 1} 行应有 9 列: {fen}")
+        chessboard = cls()
+        chessboard.place_pieces(pieces)
+        side = 'black' if len(fields) > 1 and fields[1] == 'b' else 'red'
+        return chessboard, side
+
+    def to_fen(self, side: str = 'red') -> str:
+        """将局面转换为 FEN 串，格式见 from_fen。"""
+        squares = self.squares
+        rows = []
+        for row in range(9, -1, -1):
+            text = ''
+            empty = 0
+            for col in range(9):
+                piece = squares[coords_to_square(row, col)]
+                if piece == 0:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[piece & 7]
+                text += letter.upper() if piece & RED_TAG else letter
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return '/'.join(rows) + (' b' if side == 'black' else ' w')
+
+    def __getstate__(self):
+        # 使用默认分值表时不随棋盘序列化，减小发送到其他进程的数据量
+        state = self.__dict__.copy()
+        if state['eval_table'] is DEFAULT_EVAL_TABLE:
+            del state['eval_table']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'eval_table' not in state:
+            self.eval_table = DEFAULT_EVAL_TABLE
+
+    @staticmethod
+    def encode_move(move: tuple) -> int:
+        """将 (src, dest) 形式的移动编码为 16 位整数，0 表示没有移动。"""
+        (src_row, src_col), (dest_row, dest_col) = move
+        return coords_to_square(src_row, src_col) << 8 | coords_to_square(dest_row, dest_col)
+
+    @staticmethod
+    def decode_move(code: int) -> tuple:
+        """将 encode_move 得到的整数还原为 (src, dest) 形式的移动。"""
+        return SQUARE_COORDS[code >> 8], SQUARE_COORDS[code & 0xFF]
+
     @classmethod
     def coords_to_alphanumeric(cls, coords: list) -> list:
         """
@@ -398,6 +994,14 @@ class ChessBoard:
             # 拼接字母和数字形成坐标
             result.append(col_letter + row_number)
         return result
+
+
+# 按棋子种类编号索引的走法函数
+_MOVE_GENERATORS = (
+    ChessBoard._get_king_moves, ChessBoard._get_guard_moves, ChessBoard._get_elephant_moves,
+    ChessBoard._get_knight_moves, ChessBoard._get_rook_moves, ChessBoard._get_cannon_moves,
+    ChessBoard._get_pawn_moves,
+)
         
 
 if __name__ == '__main__':
@@ -0,0 +1,257 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from ChessBoard import ChessBoard
+from OpeningBook import parse_move, move_to_string
+
+# 对局记录文件格式：8 字节文件头，之后是逐局追加的记录。每局记录为：
+#   "<HBBBH" 局头：步数、结果、红方名称长度、黑方名称长度、起始局面 FEN 长度（0 表示标准初始局面）
+#   红方名称、黑方名称（UTF-8）、起始局面 FEN（ASCII）
+#   每步 16 位的移动（ChessBoard.encode_move 的编码，高 8 位为起点、低 8 位为终点），小端序
+# 同名的 .idx 索引文件保存每局记录在文件中的偏移量（"<Q"），用于按编号随机访问；
+# 索引缺失或与记录文件不一致时，读取时会扫描局头重新建立。
+RECORD_MAGIC = b'XQGAMES1'
+INDEX_MAGIC = b'XQGIDX1\0'
+INDEX_SUFFIX = '.idx'
+GAME_HEADER = struct.Struct('<HBBBH')
+OFFSET_FORMAT = struct.Struct('<Q')
+MAX_MOVES = 0xFFFF
+# 结果编码，与 OpeningBook.BookBuilder.add_game 的 winner 参数一致
+RESULT_CODES = {None: 0, 'red': 1, 'black': 2, 'draw': 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+# 读取得到的一局棋。moves 为整数编码的移动（array('H')），winner 为 "red"、"black"、"draw" 或 None
+GameRecord = namedtuple('GameRecord', ('winner', 'red', 'black', 'start_fen', 'moves'))
+
+
+def _record_end(data, offset: int) -> int:
+    """返回从 offset 开始的一局记录的结束位置；记录不完整时返回 -1。"""
+    if offset + GAME_HEADER.size > len(data):
+        return -1
+    moves, _, red_length, black_length, fen_length = GAME_HEADER.unpack_from(data, offset)
+    end = offset + GAME_HEADER.size + red_length + black_length + fen_length + 2 * moves
+    return end if end <= len(data) else -1
+
+
+def _scan_offsets(data) -> tuple:
+    """逐个跳过局头，找出所有完整记录的偏移量。
+
+    Returns:
+        tuple: (偏移量 array('Q'), 最后一局完整记录的结束位置)。
+    """
+    offsets = array('Q')
+    offset = len(RECORD_MAGIC)
+    while True:
+        end = _record_end(data, offset)
+        if end < 0:
+            return offsets, offset
+        offsets.append(offset)
+        offset = end
+
+
+def _load_index(path: str, data) -> array:
+    """读取索引文件，并检查它与记录文件一致（最后一局正好结束在文件末尾）；否则返回 None。"""
+    try:
+        with open(path + INDEX_SUFFIX, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    if not content.startswith(INDEX_MAGIC) or (len(content) - len(INDEX_MAGIC)) % OFFSET_FORMAT.size:
+        return None
+    offsets = array('Q')
+    offsets.frombytes(content[len(INDEX_MAGIC):])
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    end = _record_end(data, offsets[-1]) if offsets else len(RECORD_MAGIC)
+    if end != len(data):
+        return None
+    return offsets
+
+
+class GameWriter:
+    """追加写入对局记录。已有的文件不会被改写，新对局总是追加在末尾。"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): 记录文件，不存在时创建。文件末尾不完整的记录（例如写入时进程被终止）会被截掉。
+        """
+        self.path = path
+        self.file = open(path, 'a+b')
+        size = self.file.seek(0, 2)
+        if size == 0:
+            self.file.write(RECORD_MAGIC)
+            offsets, index_valid = array('Q'), False
+        else:
+            with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+                    self.file.close()
+                    raise ValueError(f"不是有效的对局记录文件: {path}")
+                offsets = _load_index(path, data)
+                index_valid = offsets is not None
+                if not index_valid:
+                    offsets, end = _scan_offsets(data)
+                    if end != size:
+                        self.file.truncate(end)
+        self.file.seek(0, 2)
+        self.games = len(offsets)
+        if index_valid:
+            self.index = open(path + INDEX_SUFFIX, 'ab')
+        else:
+            # 重写索引，使它与记录文件一致，之后同样只追加
+            self.index = open(path + INDEX_SUFFIX, 'wb')
+            self.index.write(INDEX_MAGIC)
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            self.index.write(offsets.tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+    def flush(self):
+        self.file.flush()
+        self.index.flush()
+
+    def write_game(self, moves: list, winner: str = None, red: str = '', black: str = '', start_fen: str = None):
+        """追加一局棋。
+
+        Args:
+            moves (list): 按顺序的移动，格式见 OpeningBook.parse_move；最多 65535 步。
+            winner (str): 胜者 "red" 或 "black"，和棋为 "draw"，未知为 None。
+            red (str): 红方名称，例如机器人的描述。
+            black (str): 黑方名称。
+            start_fen (str): 起始局面的 FEN，为 None 时为标准初始局面。
+        """
+        encoded = array('H', (parse_move(move) for move in moves))
+        if len(encoded) > MAX_MOVES:
+            raise ValueError(f"一局最多记录 {MAX_MOVES} 步")
+        if sys.byteorder != 'little':
+            encoded.byteswap()
+        red_bytes = red.encode('utf-8')[:255]
+        black_bytes = black.encode('utf-8')[:255]
+        fen_bytes = start_fen.encode('ascii') if start_fen else b''
+        offset = self.file.tell()
+        self.file.write(GAME_HEADER.pack(len(encoded), RESULT_CODES[winner], len(red_bytes), len(black_bytes),
+                                         len(fen_bytes)) + red_bytes + black_bytes + fen_bytes + encoded.tobytes())
+        self.index.write(OFFSET_FORMAT.pack(offset))
+        self.games += 1
+
+
+class GameReader:
+    """只读的对局记录，用 mmap 映射文件，逐局解码，不把整个文件读入内存。
+
+    支持 len()、按编号随机访问（reader[i]，支持负数）和迭代；iter_games 可以从任意一局开始顺序读取。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        if size < len(RECORD_MAGIC):
+            self.file.close()
+            raise ValueError(f"不是有效的对局记录文件: {path}")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的对局记录文件: {path}")
+        offsets = _load_index(path, self.data)
+        if offsets is None:
+            offsets, _ = _scan_offsets(self.data)
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __getitem__(self, index: int) -> GameRecord:
+        return self.read_game(self.offsets[index])
+
+    def __iter__(self):
+        return self.iter_games()
+
+    def read_game(self, offset: int) -> GameRecord:
+        """解码从 offset 开始的一局记录。"""
+        data = self.data
+        count, result, red_length, black_length, fen_length = GAME_HEADER.unpack_from(data, offset)
+        position = offset + GAME_HEADER.size
+        red = data[position:position + red_length].decode('utf-8', 'replace')
+        position += red_length
+        black = data[position:position + black_length].decode('utf-8', 'replace')
+        position += black_length
+        start_fen = data[position:position + fen_length].decode('ascii') if fen_length else None
+        position += fen_length
+        moves = array('H')
+        moves.frombytes(data[position:position + 2 * count])
+        if sys.byteorder != 'little':
+            moves.byteswap()
+        return GameRecord(RESULTS.get(result), red, black, start_fen, moves)
+
+    def iter_games(self, start: int = 0, stop: int = None):
+        """按顺序逐局生成 GameRecord。
+
+        Args:
+            start (int): 第一局的编号。
+            stop (int): 在这一局之前停止，为 None 时读到文件末尾。
+        """
+        for offset in self.offsets[start:stop]:
+            yield self.read_game(offset)
+
+
+def replay(record: GameRecord):
+    """重放一局棋，逐步生成 (执行移动前的棋盘, 走棋方, 移动)。棋盘对象在各步之间复用，需要保留时请复制。"""
+    if record.start_fen is not None:
+        board, side = ChessBoard.from_fen(record.start_fen)
+    else:
+        board, side = ChessBoard(), 'red'
+        board.set_initial_pieces()
+    for move in record.moves:
+        yield board, side, move
+        board.make_move(move)
+        side = 'black' if side == 'red' else 'red'
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="对局记录文件工具。")
+    parser.add_argument('path', help='对局记录文件')
+    parser.add_argument('--show', type=int, nargs='*', default=None, help='打印指定编号的对局，不给编号时打印全部')
+    args = parser.parse_args(argv)
+
+    with GameReader(args.path) as reader:
+        if args.show is None:
+            results = {}
+            plies = 0
+            for record in reader:
+                results[record.winner] = results.get(record.winner, 0) + 1
+                plies += len(record.moves)
+            print(f"{len(reader)} 局，{plies} 步，结果 {results}，文件 {os.path.getsize(args.path)} 字节")
+            return
+        indices = args.show if args.show else range(len(reader))
+        for index in indices:
+            record = reader[index]
+            moves = ' '.join(move_to_string(move) for move in record.moves)
+            print(f"#{index} {record.red} vs {record.black} winner={record.winner} {record.start_fen or ''}")
+            print(moves)
+
+
+if __name__ == '__main__':
+    main()
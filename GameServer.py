@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from ChessBoard import ChessBoard, SIDE_MASK, SIDE_TAGS, coords_to_square
+from AlphaBetaBot import AlphaBetaBot
+from MCTSBot import MCTSBot
+from Arena import parse_bot_spec, create_bot
+
+# 人机对弈服务：每行一个文本命令，每个命令回复一行 JSON。
+# 所有对局的棋盘保存在服务进程的内存中，人的走子在事件循环中校验并执行；
+# 机器人的思考放进有界队列，由固定数量的分发协程交给进程池计算。
+#
+#   new [机器人描述] [red|black]   开始新的一局，人执红或执黑（默认执红），执黑时机器人先走
+#   move <对局编号> <起点> <终点>  人走一步（例如 "move 1 h2 e2"，也可以写作 "move 1 h2e2"），回复中包含机器人的应着
+#   go <对局编号>                  机器人的上一次思考超时后，重新请求它走棋
+#   show <对局编号>                查看对局的局面（FEN）和状态
+#   close <对局编号>               结束并删除对局
+#   stats                          服务状态：对局数、队列深度、走棋延迟的 p50/p99 等
+DEFAULT_PORT = 9090
+DEFAULT_QUEUE_SIZE = 64  # 等待思考的请求数上限，队列满时新的请求在 put 处等待，从而不再读取该连接的后续命令
+DEFAULT_TIMEOUT = 30.0  # 每个机器人走棋请求从入队到得到结果的时间上限，单位秒
+THINK_TIME_SHARE = 0.8  # 机器人最多用掉请求剩余时间的这个比例，其余留给进程间通信和回复
+LATENCY_WINDOW = 10000  # 计算延迟分位数时只保留最近这么多次走棋
+
+
+def _opposite(side: str) -> str:
+    return 'black' if side == 'red' else 'red'
+
+
+def _think(spec: tuple, fen: str, time_limit_ms: float) -> tuple:
+    """进程池工作进程入口：根据 FEN 还原局面，创建机器人并返回它选择的移动 (起点坐标, 终点坐标)。
+
+    工作进程不保存任何对局状态，同一局的相邻两步可以由不同的进程计算。
+    Alpha-Beta 和 MCTS 机器人在原有的深度或迭代次数之外还受 time_limit_ms 限制，
+    使请求超时后工作进程也能尽快空出来。
+    """
+    board, side = ChessBoard.from_fen(fen)
+    bot = create_bot(spec, board, side)
+    try:
+        if isinstance(bot, AlphaBetaBot):
+            return ChessBoard.decode_move(bot.find_best_move(time_limit_ms, max_depth=bot.depth))
+        if isinstance(bot, MCTSBot):
+            return ChessBoard.decode_move(bot.find_best_move(time_limit_ms, iterations=bot.iteration_limit))
+        return bot.make_move()
+    finally:
+        if hasattr(bot, 'close'):
+            bot.close()
+
+
+def percentile(values, fraction: float) -> float:
+    """最近秩法计算分位数，values 为空时返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Game:
+    """服务端的一局人机对弈。"""
+
+    def __init__(self, game_id: int, bot_spec: tuple, human_side: str):
+        self.game_id = game_id
+        self.bot_spec = bot_spec
+        self.human_side = human_side
+        self.bot_side = _opposite(human_side)
+        self.board = ChessBoard()
+        self.board.set_initial_pieces()
+        self.side = 'red'  # 当前走棋方
+        self.plies = 0
+        self.result = None  # 对局结束的原因，"king_captured" 或 "no_moves"；进行中为 None
+        self.winner = None  # 胜者，进行中为 None
+        self.thinking = False  # 机器人的走棋请求是否在队列中或正在计算
+
+    def play(self, move: tuple):
+        """执行一步已经校验过的移动。"""
+        self.board.make_move(move)
+        self.record_move()
+
+    def record_move(self):
+        """棋盘上已经走了一步之后，轮到对方走棋，并判断对局是否结束。"""
+        self.plies += 1
+        self.side = _opposite(self.side)
+        if self.board.winner is not None:
+            self.result = 'king_captured'
+            self.winner = self.board.winner
+        elif not self.board.generate_moves(self.side):
+            # 没有可行的移动（困毙或被将死）的一方判负
+            self.result = 'no_moves'
+            self.winner = _opposite(self.side)
+
+    def state(self) -> dict:
+        return {
+            'game': self.game_id,
+            'fen': self.board.to_fen(self.side),
+            'side': self.side,
+            'human': self.human_side,
+            'plies': self.plies,
+            'winner': self.winner,
+            'result': self.result,
+        }
+
+
+class GameServer:
+    """托管多局人机对弈的 asyncio 服务。"""
+
+    def __init__(self, workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 default_bot: str = 'alphabeta'):
+        """
+        Args:
+            workers (int): 进程池的进程数，也是同时思考的机器人数。
+            queue_size (int): 等待思考的请求队列的容量。
+            timeout (float): 每个机器人走棋请求的超时时间，单位秒，包括排队时间。
+            default_bot (str): new 命令省略机器人描述时使用的机器人，格式见 Arena.parse_bot_spec。
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.default_bot = default_bot
+        self.games = {}
+        self.game_ids = itertools.count(1)
+        self.queue = asyncio.Queue(queue_size)
+        # 每个工作进程重新设置随机种子，避免 fork 出的进程产生相同的随机序列
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=random.seed)
+        self.dispatchers = []
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)  # 最近的机器人走棋延迟，单位秒
+        self.counters = {'moves': 0, 'timeouts': 0, 'errors': 0}
+        self.start_time = time.perf_counter()
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """启动分发协程并开始监听。"""
+        self.dispatchers = [asyncio.ensure_future(self.dispatch()) for _ in range(self.workers)]
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def close(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def dispatch(self):
+        """从队列中取出请求交给进程池。已经超时（future 被取消）的请求直接丢弃，不占用工作进程；
+        其余请求把剩余的时间作为机器人的思考时间上限。"""
+        loop = asyncio.get_running_loop()
+        while True:
+            spec, fen, deadline, future = await self.queue.get()
+            try:
+                remaining = deadline - time.time()
+                if future.cancelled() or remaining <= 0:
+                    continue
+                try:
+                    move = await loop.run_in_executor(self.executor, _think, spec, fen,
+                                                     remaining * 1000 * THINK_TIME_SHARE)
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    if not future.done():
+                        future.set_result(move)
+            finally:
+                self.queue.task_done()
+
+    async def request_bot_move(self, game: Game):
+        """把机器人的走棋请求放入队列并等待结果，然后在事件循环中执行这步棋。
+
+        Returns:
+            tuple: 机器人的移动 (起点坐标, 终点坐标)。超时抛出 asyncio.TimeoutError，此时局面不变，可以用 go 命令重试。
+        """
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        future = loop.create_future()
+        fen = game.board.to_fen(game.side)
+        game.thinking = True
+        try:
+            # put 和等待结果共用一个超时；超时时 future 随之取消，分发协程会跳过它
+            await asyncio.wait_for(self._enqueue_and_wait(game.bot_spec, fen, time.time() + self.timeout, future),
+                                   self.timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise
+        except Exception:
+            self.counters['errors'] += 1
+            raise
+        finally:
+            game.thinking = False
+        move = future.result()
+        if game.game_id in self.games and game.result is None:
+            game.play(move)
+        self.counters['moves'] += 1
+        self.latencies.append(time.perf_counter() - start_time)
+        return move
+
+    async def _enqueue_and_wait(self, spec: tuple, fen: str, deadline: float, future: asyncio.Future):
+        await self.queue.put((spec, fen, deadline, future))
+        return await future
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接：依次读取命令并回复。一个连接上的命令按顺序处理，多个连接之间并发。"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.handle_command(line.decode('utf-8', 'replace').split())
+                except Exception as error:
+                    reply = {'ok': False, 'error': str(error) or type(error).__name__}
+                if reply is None:
+                    continue
+                writer.write((json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def get_game(self, tokens: list) -> Game:
+        if len(tokens) < 2 or not tokens[1].isdigit() or int(tokens[1]) not in self.games:
+            raise ValueError("对局不存在")
+        return self.games[int(tokens[1])]
+
+    async def bot_reply(self, game: Game, reply: dict):
+        """请求机器人走棋，把它的移动写入回复；超时时在回复中注明，客户端仍然会得到对局的状态。"""
+        try:
+            reply['bot_move'] = ChessBoard.coords_to_alphanumeric(await self.request_bot_move(game))
+        except asyncio.TimeoutError:
+            reply['ok'] = False
+            reply['error'] = 'timeout'
+
+    async def handle_command(self, tokens: list) -> dict:
+        """处理一条命令。
+
+        Returns:
+            dict: 回复，成功时包含 "ok": true；空行返回 None。
+        """
+        if not tokens:
+            return None
+        command = tokens[0].lower()
+        if command == 'new':
+            arguments = tokens[1:]
+            human_side = 'red'
+            if arguments and arguments[-1] in ('red', 'black'):
+                human_side = arguments.pop()
+            spec = parse_bot_spec(arguments[0] if arguments else self.default_bot)
+            game = Game(next(self.game_ids), spec, human_side)
+            self.games[game.game_id] = game
+            reply = {'ok': True, 'bot': spec[0]}
+            if game.side == game.bot_side:
+                await self.bot_reply(game, reply)
+            reply.update(game.state())
+            return reply
+        if command == 'move':
+            game = self.get_game(tokens)
+            text = ''.join(tokens[2:])
+            if game.result is not None:
+                raise ValueError("对局已经结束")
+            if game.side != game.human_side:
+                raise ValueError("现在不是人走棋")
+            if len(text) != 4:
+                raise ValueError("移动的格式应为 <起点> <终点>，例如 h2 e2")
+            src, dest = text[:2], text[2:]
+            if not (src[0] in 'abcdefghi' and src[1].isdigit() and dest[0] in 'abcdefghi' and dest[1].isdigit()):
+                raise ValueError(f"无效的移动: {text}")
+            piece = game.board.squares[coords_to_square(int(src[1]), ord(src[0]) - ord('a'))]
+            if piece & SIDE_MASK != SIDE_TAGS[game.human_side]:
+                raise ValueError("起点不是自己的棋子")
+            if not game.board.move_piece(src, dest):
+                raise ValueError(f"不合法的移动: {src} {dest}")
+            game.record_move()
+            reply = {'ok': True}
+            if game.result is None:
+                await self.bot_reply(game, reply)
+            reply.update(game.state())
+            return reply
+        if command == 'go':
+            game = self.get_game(tokens)
+            if game.result is not None or game.thinking or game.side != game.bot_side:
+                raise ValueError("现在不是机器人走棋")
+            reply = {'ok': True}
+            await self.bot_reply(game, reply)
+            reply.update(game.state())
+            return reply
+        if command == 'show':
+            return dict(ok=True, **self.get_game(tokens).state())
+        if command == 'close':
+            game = self.get_game(tokens)
+            del self.games[game.game_id]
+            return {'ok': True, 'game': game.game_id}
+        if command == 'stats':
+            return dict(ok=True, **self.stats())
+        raise ValueError(f"未知的命令: {command}")
+
+    def stats(self) -> dict:
+        """服务状态：对局数、队列深度、正在思考的对局数、走棋计数，以及最近走棋延迟的 p50/p99（毫秒）。"""
+        latencies = list(self.latencies)
+        return {
+            'games': len(self.games),
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'thinking': sum(1 for game in self.games.values() if game.thinking),
+            'workers': self.workers,
+            'bot_moves': self.counters['moves'],
+            'timeouts': self.counters['timeouts'],
+            'errors': self.counters['errors'],
+            'latency_p50_ms': percentile(latencies, 0.5) * 1000,
+            'latency_p99_ms': percentile(latencies, 0.99) * 1000,
+            'uptime': time.perf_counter() - self.start_time,
+        }
+
+
+async def serve(host: str, port: int, workers: int, queue_size: int, timeout: float, default_bot: str):
+    game_server = GameServer(workers, queue_size, timeout, default_bot)
+    server = await game_server.start(host, port)
+    print(f"listening on {host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await game_server.close()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="同时托管多局人机对弈的服务，使用逐行文本命令、逐行 JSON 回复的协议。")
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='机器人思考使用的进程数')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='等待思考的请求队列容量')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='每个机器人走棋请求的超时时间（秒）')
+    parser.add_argument('--bot', default='alphabeta', help='默认机器人，例如 "alphabeta:depth=3" 或 "mcts:iteration_limit=500"')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue_size, args.timeout, args.bot))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("LeafEvaluator（MCTSBot 的 evaluator 选项）需要 NumPy，请先运行 pip install -r requirements.txt") from error
+from ChessBoard import BOARD_SQUARES, RED_TAG, BLACK_TAG, DEFAULT_EVAL_TABLE
+
+# MCTSBot 的批量叶子估值。局面编码为 14 个棋子平面（形状 (N, 14, 10, 9) 的 float32）：
+# 前 7 个平面为红方的将帅、士、象、马、车、炮、兵，后 7 个为黑方，棋子所在格子为 1，第 row 行第 col 列对应 ChessBoard 的 (row, col)。
+# 估值器接收一批平面，一次返回形状 (N,) 的分值，取值范围 [-1, 1]，以红方视角计算（1 为红方必胜）。
+PLANE_CODES = np.array([RED_TAG | kind for kind in range(7)] + [BLACK_TAG | kind for kind in range(7)], dtype=np.uint8)
+PLANES = len(PLANE_CODES)
+FEATURES = PLANES * 90
+VALUE_SCALE = 0.01  # 默认线性估值器把 ChessBoard 的子力与位置分值乘以这个系数后取 tanh，一个车的优势约为 0.7
+_BOARD_INDEX = np.array(BOARD_SQUARES, dtype=np.int64)
+
+
+def encode_squares(positions: list) -> np.ndarray:
+    """将一批 ChessBoard.squares 的快照（bytes）编码为棋子平面。"""
+    codes = np.frombuffer(b''.join(positions), dtype=np.uint8).reshape(len(positions), -1)[:, _BOARD_INDEX]
+    planes = codes[:, None, :] == PLANE_CODES[None, :, None]
+    return planes.astype(np.float32).reshape(len(positions), PLANES, 10, 9)
+
+
+def encode_planes(chessboards: list) -> np.ndarray:
+    """将 ChessBoard 列表编码为棋子平面。"""
+    return encode_squares([bytes(chessboard.squares) for chessboard in chessboards])
+
+
+class Evaluator:
+    """叶子估值器的基类。子类实现 __call__，把形状 (N, 14, 10, 9) 的平面映射为红方视角的 (N,) 分值。"""
+
+    def __call__(self, planes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def evaluate_positions(self, positions: list) -> np.ndarray:
+        """对一批 ChessBoard.squares 的快照估值。"""
+        return self(encode_squares(positions))
+
+
+class LinearEvaluator(Evaluator):
+    """线性估值器：tanh(平面 · weights + bias)。"""
+
+    def __init__(self, weights: np.ndarray, bias: float = 0.0):
+        """
+        Args:
+            weights (np.ndarray): 形状为 (14, 10, 9) 或 (1260,) 的权重。
+            bias (float): 偏置。
+        """
+        self.weights = np.asarray(weights, dtype=np.float32).reshape(FEATURES)
+        self.bias = float(bias)
+
+    @classmethod
+    def from_eval_table(cls, eval_table: list = DEFAULT_EVAL_TABLE, scale: float = VALUE_SCALE):
+        """用 ChessBoard 的子力与位置分值表构造权重，使估值等于 tanh(scale * (红方分值 - 黑方分值))。"""
+        weights = np.zeros((PLANES, 90), dtype=np.float32)
+        for plane, code in enumerate(PLANE_CODES.tolist()):
+            sign = 1.0 if code & RED_TAG else -1.0
+            weights[plane] = [sign * scale * eval_table[code][square] for square in BOARD_SQUARES]
+        return cls(weights)
+
+    def __call__(self, planes: np.ndarray) -> np.ndarray:
+        return np.tanh(planes.reshape(len(planes), FEATURES) @ self.weights + self.bias)
+
+
+class MLPEvaluator(Evaluator):
+    """带一个 ReLU 隐藏层的小型多层感知机：tanh(relu(x · w1 + b1) · w2 + b2)。"""
+
+    def __init__(self, w1: np.ndarray, b1: np.ndarray, w2: np.ndarray, b2: float = 0.0):
+        """
+        Args:
+            w1 (np.ndarray): 形状 (1260, H) 的第一层权重。
+            b1 (np.ndarray): 形状 (H,) 的第一层偏置。
+            w2 (np.ndarray): 形状 (H,) 的输出层权重。
+            b2 (float): 输出层偏置。
+        """
+        self.w1 = np.asarray(w1, dtype=np.float32).reshape(FEATURES, -1)
+        self.b1 = np.asarray(b1, dtype=np.float32).reshape(-1)
+        self.w2 = np.asarray(w2, dtype=np.float32).reshape(-1)
+        self.b2 = float(b2)
+
+    @classmethod
+    def random(cls, hidden: int = 64, seed: int = None):
+        """随机初始化的网络，用作训练的起点。"""
+        rng = np.random.default_rng(seed)
+        w1 = rng.normal(0.0, np.sqrt(2.0 / FEATURES), (FEATURES, hidden))
+        w2 = rng.normal(0.0, np.sqrt(1.0 / hidden), hidden)
+        return cls(w1, np.zeros(hidden), w2)
+
+    def __call__(self, planes: np.ndarray) -> np.ndarray:
+        hidden = np.maximum(planes.reshape(len(planes), FEATURES) @ self.w1 + self.b1, 0.0)
+        return np.tanh(hidden @ self.w2 + self.b2)
+
+
+def save_evaluator(evaluator: Evaluator, path: str):
+    """把线性或 MLP 估值器的参数保存为 .npz 文件。"""
+    if isinstance(evaluator, LinearEvaluator):
+        np.savez(path, kind='linear', weights=evaluator.weights, bias=evaluator.bias)
+    elif isinstance(evaluator, MLPEvaluator):
+        np.savez(path, kind='mlp', w1=evaluator.w1, b1=evaluator.b1, w2=evaluator.w2, b2=evaluator.b2)
+    else:
+        raise ValueError(f"无法保存的估值器: {type(evaluator).__name__}")
+
+
+def load_evaluator(path: str) -> Evaluator:
+    """读取 save_evaluator 保存的估值器。"""
+    with np.load(path) as data:
+        kind = str(data['kind'])
+        if kind == 'linear':
+            return LinearEvaluator(data['weights'], data['bias'])
+        if kind == 'mlp':
+            return MLPEvaluator(data['w1'], data['b1'], data['w2'], data['b2'])
+    raise ValueError(f"未知的估值器类型: {kind}")
+
+
+def open_evaluator(evaluator):
+    """MCTSBot 的 evaluator 参数可以是 Evaluator、"linear"（使用默认的子力与位置分值）或 .npz 文件路径；为 None 时不使用。"""
+    if evaluator is None or isinstance(evaluator, Evaluator):
+        return evaluator
+    if evaluator == 'linear':
+        return LinearEvaluator.from_eval_table()
+    return load_evaluator(evaluator)
@@ -1,85 +1,722 @@
 import random
 import math
+import time
+import multiprocessing
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait
 from ChessBoard import ChessBoard
+from PlayoutEngine import PlayoutEngine
+from OpeningBook import open_book
 
-class MCTSNode:
-    def __init__(self, chessboard: ChessBoard, move=None, parent=None, side=None):
-        self.chessboard = chessboard.copy()  # 假设ChessBoard有一个复制自身的方法
-        self.move = move  # 导致此节点的移动
-        self.parent = parent  # 父节点
-        self.children = []  # 子节点
-        self.wins = 0  # 赢的模拟次数
-        self.visits = 0  # 访问次数
-        self.side = side  # 当前节点代表的玩家
-        if move:
-            self.chessboard.move_piece_with_coords(move[0], move[1])
-        self.untried_moves = self.chessboard.get_legal_moves(side)  # 尚未尝试的移动
-
-    def select_child(self):
+MAX_ITERATIONS = 1 << 62  # 限时或无限搜索时的迭代次数上限，实际由截止时间或 stop 结束
+NO_NODE = -1  # 表示没有节点（根节点的父节点、链表的末尾）
+FREE = -2  # 空闲槽位的 parent 值
+SIDES = ('red', 'black')  # 节点池中走棋方的编码：0 为红方，1 为黑方
+SIDE_CODES = {'red': 0, 'black': 1}
+INITIAL_CAPACITY = 1024  # 不限节点数时节点池的初始槽位数，用满后倍增
+NODE_BYTES = 80  # 估算的每个节点平均占用的内存（各字段数组约 40 字节，加上部分节点的未尝试移动列表），用于把 max_memory_mb 换算为节点数
+EVICT_FRACTION = 0.25  # 节点池用满时一次淘汰的节点比例，使淘汰的开销分摊到多次迭代上
+WORKER_CHECK_ITERATIONS = 16  # 根并行的工作进程每完成这么多次迭代（批量估值时至少一批）检查一次停止事件
+STOP_POLL_INTERVAL = 0.01  # 根并行时主进程检查截止时间和 stop 的间隔，单位秒
+
+
+class MCTSTree:
+    """搜索树的节点池。节点是整数编号（槽位），各字段按结构数组（struct-of-arrays）分别存放在 array 中；
+    子节点用 first_child / next_sibling 串成链表，新的子节点插在链表头部。节点只保存移动和统计信息，
+    不保存棋盘，局面在选择阶段从根节点重放移动得到。
+
+    max_nodes 为 None 时节点池按需倍增；否则一次分配 max_nodes 个槽位，用满后由 evict 淘汰访问次数最少的子树并回收其槽位，
+    因此搜索时间再长，占用的内存也不变。
+    """
+
+    def __init__(self, side: str, max_nodes: int = None):
+        """
+        Args:
+            side (str): 根节点的走棋方。
+            max_nodes (int): 节点数上限，为 None 时不限。
+        """
+        self.max_nodes = max_nodes
+        capacity = max_nodes if max_nodes is not None else INITIAL_CAPACITY
+        self.move = array('H', bytes(2 * capacity))  # 导致此节点的移动，ChessBoard.generate_moves 的整数编码
+        self.parent = array('i', [FREE]) * capacity  # 父节点，根节点为 NO_NODE
+        self.first_child = array('i', [NO_NODE]) * capacity  # 最后扩展的子节点
+        self.next_sibling = array('i', [NO_NODE]) * capacity  # 下一个兄弟节点；空闲槽位用它串成空闲链表
+        self.wins = array('d', bytes(8 * capacity))  # 节点一方赢的模拟次数
+        self.visits = array('q', bytes(8 * capacity))  # 访问次数
+        self.side = array('B', bytes(capacity))  # 节点代表的玩家（轮到走棋的一方），见 SIDES
+        # 尚未尝试的移动（array('H')），第一次扩展该节点时才生成；为 None 时尚未生成，全部尝试过后换成空元组以释放内存
+        self.untried = [None] * capacity
+        self.capacity = capacity
+        self.high_water = 0  # 从未使用过的槽位从这里开始
+        self.free_head = NO_NODE  # 空闲链表的头部
+        self.count = 0  # 正在使用的节点数
+        self.evicted = 0  # 累计淘汰的节点数
+        self.root = self.new_node(0, NO_NODE, SIDE_CODES[side])
+
+    def new_node(self, move: int, parent: int, side: int) -> int:
+        """分配一个槽位作为 parent 的新子节点。限制了节点数时调用方应先用 reserve 确保有空闲槽位。"""
+        if self.free_head != NO_NODE:
+            node = self.free_head
+            self.free_head = self.next_sibling[node]
+        else:
+            if self.high_water == self.capacity:
+                self._grow()
+            node = self.high_water
+            self.high_water += 1
+        self.move[node] = move
+        self.parent[node] = parent
+        self.first_child[node] = NO_NODE
+        self.wins[node] = 0
+        self.visits[node] = 0
+        self.side[node] = side
+        self.untried[node] = None
+        if parent != NO_NODE:
+            self.next_sibling[node] = self.first_child[parent]
+            self.first_child[parent] = node
+        else:
+            self.next_sibling[node] = NO_NODE
+        self.count += 1
+        return node
+
+    def _grow(self):
+        """槽位数翻倍。各数组原地扩展，搜索循环中保存的数组引用仍然有效。"""
+        extra = self.capacity
+        self.move.extend(array('H', bytes(2 * extra)))
+        self.parent.extend(array('i', [FREE]) * extra)
+        self.first_child.extend(array('i', [NO_NODE]) * extra)
+        self.next_sibling.extend(array('i', [NO_NODE]) * extra)
+        self.wins.extend(array('d', bytes(8 * extra)))
+        self.visits.extend(array('q', bytes(8 * extra)))
+        self.side.extend(array('B', bytes(extra)))
+        self.untried.extend([None] * extra)
+        self.capacity += extra
+
+    def reserve(self, nodes: int):
+        """确保还能分配 nodes 个节点，节点池不够时淘汰访问次数最少的子树。"""
+        if self.max_nodes is not None and self.count + nodes > self.max_nodes:
+            self.evict(nodes)
+
+    def evict(self, needed: int = 1):
+        """淘汰访问次数最少的子树，空出至少 max(needed, max_nodes * EVICT_FRACTION) 个槽位。
+
+        节点的访问次数不超过父节点，因此访问次数不超过某个阈值的节点正好组成若干棵完整的子树。先用访问次数的分布找出
+        能空出足够槽位的最小阈值，再按子树根节点的访问次数从少到多整棵淘汰，直到空出的槽位足够。
+        被淘汰的子树的移动放回父节点未尝试的移动中（排在最后才会再次扩展），父节点的统计保持不变。根节点不会被淘汰。
+        """
+        target = max(needed, int(self.max_nodes * EVICT_FRACTION)) - (self.capacity - self.count)
+        if target <= 0:
+            return
+        parent, visits = self.parent, self.visits
+        root = self.root
+        histogram = Counter(visits[node] for node in range(self.high_water) if parent[node] >= 0)
+        remaining = target
+        threshold = -1
+        for threshold in sorted(histogram):
+            remaining -= histogram[threshold]
+            if remaining <= 0:
+                break
+        # 访问次数不超过阈值、而父节点超过阈值（或是根节点）的节点，即可以整棵淘汰的最大子树的根
+        candidates = sorted((visits[node], node) for node in range(self.high_water)
+                            if parent[node] >= 0 and visits[node] <= threshold
+                            and (parent[node] == root or visits[parent[node]] > threshold))
+        for _, node in candidates:
+            if target <= 0:
+                break
+            owner = parent[node]
+            self._unlink(owner, node)
+            untried = self.untried[owner]
+            if untried:
+                untried.insert(0, self.move[node])
+            else:
+                self.untried[owner] = array('H', [self.move[node]])
+            freed = self._free_subtree(node)
+            self.evicted += freed
+            target -= freed
+
+    def _unlink(self, owner: int, node: int):
+        """把 node 从 owner 的子节点链表中摘掉。"""
+        next_sibling = self.next_sibling
+        child = self.first_child[owner]
+        if child == node:
+            self.first_child[owner] = next_sibling[node]
+            return
+        while next_sibling[child] != node:
+            child = next_sibling[child]
+        next_sibling[child] = next_sibling[node]
+
+    def _free_subtree(self, node: int, keep: int = NO_NODE) -> int:
+        """回收以 node 为根的子树中除 keep 的子树以外的所有槽位，不修改 node 父节点的子节点链表。返回回收的节点数。"""
+        parent, first_child, next_sibling, untried = self.parent, self.first_child, self.next_sibling, self.untried
+        freed = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current == keep:
+                continue
+            child = first_child[current]
+            while child != NO_NODE:
+                stack.append(child)
+                child = next_sibling[child]
+            parent[current] = FREE
+            untried[current] = None
+            next_sibling[current] = self.free_head
+            self.free_head = current
+            freed += 1
+        self.count -= freed
+        return freed
+
+    def reroot(self, node: int):
+        """以 node 为新的根节点，回收树中其余的节点。"""
+        self._free_subtree(self.root, keep=node)
+        self.parent[node] = NO_NODE
+        self.next_sibling[node] = NO_NODE
+        self.root = node
+
+    def children(self, node: int):
+        """按扩展顺序从新到旧生成 node 的子节点。"""
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def side_of(self, node: int) -> str:
+        """节点代表的玩家，"red" 或 "black"。"""
+        return SIDES[self.side[node]]
+
+    def set_untried(self, node: int, moves: list):
+        """保存 node 尚未尝试的移动。"""
+        self.untried[node] = array('H', moves) if moves else ()
+
+    def select_child(self, node: int) -> int:
         """选择子节点, 使用UCT算法."""
-        s = sorted(self.children, key=lambda c: c.wins / c.visits + math.sqrt(2 * math.log(self.visits) / c.visits))[-1]
-        return s
+        visits, wins, next_sibling, sqrt = self.visits, self.wins, self.next_sibling, math.sqrt
+        exploration = 2 * math.log(visits[node])
+        best_child = NO_NODE
+        best_value = float('-inf')
+        # 链表从新到旧排列，分值相同时取第一个，即最后扩展的一个
+        child = self.first_child[node]
+        while child != NO_NODE:
+            child_visits = visits[child]
+            value = wins[child] / child_visits + sqrt(exploration / child_visits)
+            if value > best_value:
+                best_child = child
+                best_value = value
+            child = next_sibling[child]
+        return best_child
 
-    def expand(self):
+    def expand(self, node: int) -> int:
         """扩展一个新的子节点."""
-        move = self.untried_moves.pop()
-        next_side = 'red' if self.side == 'black' else 'black'
-        child_node = MCTSNode(self.chessboard, move, self, next_side)
-        self.children.append(child_node)
-        return child_node
-
-    def update(self, result):
-        """更新节点的信息."""
-        self.visits += 1
-        if self.side == result:
-            self.wins += 1
-
-    def is_terminal_node(self):
-        """判断是否为终止节点，即游戏结束的节点."""
-        return self.chessboard.winner is not None
+        untried = self.untried[node]
+        move = untried.pop()
+        if not untried:
+            self.untried[node] = ()
+        return self.new_node(move, node, self.side[node] ^ 1)
+
+    def backpropagate(self, node: int, result: str):
+        """从 node 到根节点依次更新访问次数和胜局，result 为胜者，和棋为 None."""
+        parent, visits, wins, side = self.parent, self.visits, self.wins, self.side
+        winner = SIDE_CODES.get(result, NO_NODE)
+        while node != NO_NODE:
+            visits[node] += 1
+            if side[node] == winner:
+                wins[node] += 1
+            node = parent[node]
+
+
+class MCTSStats:
+    """一次 make_move 的搜索统计，只在 MCTSBot 开启 collect_stats 时收集。
+
+    根并行时各阶段在工作进程中执行，只统计迭代次数、根节点的子节点数和总时间。
+    """
+
+    def __init__(self):
+        self.iterations = 0  # 完成的迭代次数
+        self.tree_size = 1  # 搜索树的节点数（包括根节点）
+        self.max_depth = 0  # 选择和扩展阶段到达的最大深度
+        self.rollout_plies = 0  # 模拟阶段走过的总步数
+        self.root_children = 0  # 根节点已展开的子节点数
+        self.reused_visits = 0  # 从上一次搜索的树中继承的根节点访问次数
+        self.evicted_nodes = 0  # 节点池用满时淘汰的节点数
+        # 各阶段耗时，单位秒
+        self.selection_time = 0.0
+        self.expansion_time = 0.0
+        self.simulation_time = 0.0
+        self.backpropagation_time = 0.0
+        self.best_move = None  # 最终选择的移动，(起点坐标, 终点坐标)
+        self.best_visits = 0  # 最终选择的移动的访问次数
+        self.elapsed = 0.0  # 到目前为止的搜索时间，单位秒
+
+    @property
+    def average_rollout_length(self) -> float:
+        return self.rollout_plies / self.iterations if self.iterations else 0.0
+
+    def as_dict(self) -> dict:
+        """转换为可以直接序列化为 JSON 的字典。"""
+        return {
+            'iterations': self.iterations,
+            'tree_size': self.tree_size,
+            'max_depth': self.max_depth,
+            'rollout_plies': self.rollout_plies,
+            'average_rollout_length': self.average_rollout_length,
+            'root_children': self.root_children,
+            'reused_visits': self.reused_visits,
+            'evicted_nodes': self.evicted_nodes,
+            'selection_time': self.selection_time,
+            'expansion_time': self.expansion_time,
+            'simulation_time': self.simulation_time,
+            'backpropagation_time': self.backpropagation_time,
+            'best_move': self.best_move,
+            'best_visits': self.best_visits,
+            'elapsed': self.elapsed,
+            'iterations_per_second': self.iterations / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
 
 class MCTSBot:
-    def __init__(self, chessboard: ChessBoard, side: str, iteration_limit=10000):
+    def __init__(self, chessboard: ChessBoard, side: str, iteration_limit=10000, workers: int = 1,
+                 max_playout_plies: int = 300, collect_stats: bool = False, on_iteration=None, book=None,
+                 reuse_tree: bool = True, evaluator=None, batch_size: int = 32, max_nodes: int = None,
+                 max_memory_mb: float = None):
         self.chessboard = chessboard
         self.side = side
         self.iteration_limit = iteration_limit
+        # 开局库，可以是 OpeningBook 或文件路径；当前局面在开局库中时直接走库中的移动，不再搜索
+        self.book = open_book(book)
+        # 模拟阶段使用的随机对局引擎，超过 max_playout_plies 步或出现重复局面时按和棋结束
+        self.playout = PlayoutEngine(max_playout_plies)
+        # 根并行的进程数，为 1 时在当前进程内串行搜索；进程池在第一次需要时创建，并在整盘棋中复用
+        self.workers = workers
+        self.executor = None
+        self.stop_event = None  # 根并行时与工作进程共享的停止事件，由主进程在超过截止时间或者 stop 时设置
+        # 搜索统计：开启后每次 make_move 的统计保存在 last_stats 中；on_iteration(stats) 在每次迭代结束时调用。
+        # 未开启时使用不计时的搜索循环，没有额外开销
+        self.collect_stats = collect_stats or on_iteration is not None
+        self.on_iteration = on_iteration
+        self.last_stats = None
+        self.iterations = 0  # 最近一次 find_best_move 完成的迭代次数，走开局库中的移动时为 0
+        self.deadline = None  # 限时搜索的截止时间（time.perf_counter 的时刻）
+        # 是否在多次搜索之间保留搜索树：下一次搜索从上次的树中与当前局面对应的节点继续，迭代次数在已有的统计上累加。
+        # 只用于串行搜索，根并行的树在工作进程中，不会保留
+        self.reuse_tree = reuse_tree
+        self.root = None  # 上一次搜索的树（MCTSTree）
+        self.root_board = None  # 上一次搜索的根节点对应的局面
+        self.stopped = False  # 由 stop 设置，要求当前搜索尽快结束
+        # 叶子估值器，可以是 LeafEvaluator.Evaluator、"linear" 或 .npz 文件路径；设置后不再随机模拟，
+        # 而是每批选出 batch_size 个叶子，用估值器一次向量化估值（见 search_batched）。估值器依赖 NumPy，只在使用时导入
+        if evaluator is not None:
+            from LeafEvaluator import open_evaluator
+            evaluator = open_evaluator(evaluator)
+        self.evaluator = evaluator
+        self.batch_size = batch_size
+        # 搜索树的节点数上限，max_memory_mb 按 NODE_BYTES 换算为节点数，两者都给出时取较小者；都为 None 时不限。
+        # 达到上限后淘汰访问次数最少的子树（见 MCTSTree.evict）。根并行时每个工作进程各自使用这个上限
+        if max_memory_mb is not None:
+            memory_nodes = int(max_memory_mb * 1024 * 1024) // NODE_BYTES
+            max_nodes = memory_nodes if max_nodes is None else min(max_nodes, memory_nodes)
+        # 每次迭代在根节点之外至少要分配一个新节点；批量估值时一批要同时分配 batch_size 个
+        if max_nodes is not None:
+            if evaluator is not None and max_nodes <= batch_size:
+                raise ValueError(f"使用 evaluator 时 max_nodes 必须大于 batch_size ({batch_size})")
+            if max_nodes < 2:
+                raise ValueError("max_nodes 至少为 2")
+        self.max_nodes = max_nodes
 
-    def make_move(self):
-        root = MCTSNode(chessboard=self.chessboard, side=self.side)
+    def new_tree(self) -> MCTSTree:
+        """以当前走棋方为根节点新建一棵搜索树。"""
+        return MCTSTree(self.side, self.max_nodes)
+
+    def search(self, board: ChessBoard, iterations: int, tree: MCTSTree = None) -> MCTSTree:
+        """从给定局面出发运行若干次迭代，返回搜索树.
 
-        for _ in range(self.iteration_limit):
+        Args:
+            board (ChessBoard): 搜索的起始局面。整个搜索只使用这一个棋盘，每次迭代从根节点执行移动到达叶子，
+                结束后再撤销，因此搜索结束后局面保持不变。
+            iterations (int): 迭代次数。超过 self.deadline 或者被 stop 打断时提前结束。
+            tree (MCTSTree): 在这棵已有的树上继续搜索，它的根节点必须对应 board 的局面；为 None 时新建。
+
+        Returns:
+            MCTSTree: 搜索树。
+        """
+        if tree is None:
+            tree = self.new_tree()
+        root = tree.root
+        untried, first_child, moves = tree.untried, tree.first_child, tree.move
+
+        for _ in range(iterations):
+            if self.stopped or self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+            tree.reserve(1)
             # 选择阶段
             node = root
-            while node.untried_moves == [] and node.children != []:
-                node = node.select_child()
+            undo_tokens = []
+            while True:
+                if untried[node] is None:
+                    tree.set_untried(node, board.generate_moves(tree.side_of(node)))
+                if untried[node] or first_child[node] == NO_NODE:
+                    break
+                node = tree.select_child(node)
+                undo_tokens.append(board.make_move(moves[node]))
+
+            # 扩展阶段
+            if untried[node]:
+                node = tree.expand(node)
+                undo_tokens.append(board.make_move(moves[node]))
+
+            # 模拟阶段
+            outcome = self.simulate_random_game(board, tree.side_of(node))
+
+            # 回溯阶段
+            tree.backpropagate(node, outcome)
+            for undo_token in reversed(undo_tokens):
+                board.unmake_move(undo_token)
+        return tree
+
+    def search_with_stats(self, board: ChessBoard, iterations: int, stats: MCTSStats, tree: MCTSTree = None) -> MCTSTree:
+        """与 search 相同，但分阶段计时并把统计累加到 stats 中。"""
+        perf_counter = time.perf_counter
+        start_time = perf_counter()
+        if tree is None:
+            tree = self.new_tree()
+        root = tree.root
+        untried, first_child, moves = tree.untried, tree.first_child, tree.move
+        stats.reused_visits = tree.visits[root]
+        evicted = tree.evicted
+        playout_plies = self.playout.plies
+
+        for _ in range(iterations):
+            if self.stopped or self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+            # 选择阶段（包括节点池用满时的淘汰）
+            phase_start = perf_counter()
+            tree.reserve(1)
+            node = root
+            undo_tokens = []
+            while True:
+                if untried[node] is None:
+                    tree.set_untried(node, board.generate_moves(tree.side_of(node)))
+                if untried[node] or first_child[node] == NO_NODE:
+                    break
+                node = tree.select_child(node)
+                undo_tokens.append(board.make_move(moves[node]))
+            phase_end = perf_counter()
+            stats.selection_time += phase_end - phase_start
 
             # 扩展阶段
-            if node.untried_moves != []:
-                node = node.expand()
+            phase_start = phase_end
+            if untried[node]:
+                node = tree.expand(node)
+                undo_tokens.append(board.make_move(moves[node]))
+            stats.max_depth = max(stats.max_depth, len(undo_tokens))
+            phase_end = perf_counter()
+            stats.expansion_time += phase_end - phase_start
 
             # 模拟阶段
-            outcome = self.simulate_random_game(node.chessboard.copy(), node.side)
+            phase_start = phase_end
+            outcome = self.simulate_random_game(board, tree.side_of(node))
+            phase_end = perf_counter()
+            stats.simulation_time += phase_end - phase_start
 
             # 回溯阶段
-            while node is not None:
-                node.update(outcome)
-                node = node.parent
+            phase_start = phase_end
+            tree.backpropagate(node, outcome)
+            for undo_token in reversed(undo_tokens):
+                board.unmake_move(undo_token)
+            phase_end = perf_counter()
+            stats.backpropagation_time += phase_end - phase_start
+
+            stats.iterations += 1
+            stats.tree_size = tree.count
+            stats.evicted_nodes = tree.evicted - evicted
+            stats.rollout_plies = self.playout.plies - playout_plies
+            stats.elapsed = phase_end - start_time
+            if self.on_iteration is not None:
+                self.on_iteration(stats)
+        stats.root_children = sum(1 for _ in tree.children(root))
+        return tree
+
+    def search_batched(self, board: ChessBoard, iterations: int, tree: MCTSTree = None,
+                       stats: MCTSStats = None) -> MCTSTree:
+        """与 search 相同，但不做随机模拟：每批选出最多 self.batch_size 个叶子，用 self.evaluator 一次估值后再回溯.
+
+        选择时沿途节点的访问次数立即加一（虚拟损失），使同一批中后续的选择避开已经选中的路径；回溯时只累加胜局，
+        估值 v（红方视角，[-1, 1]）折算为红方胜局 (1 + v) / 2，黑方胜局 (1 - v) / 2。已分出胜负的叶子直接记为胜负，
+        无子可动的叶子记为走棋方负。stats 不为 None 时分阶段计时并累加统计，扩展计入选择阶段，估值计入模拟阶段，
+        on_iteration 在每批结束时调用。
+        """
+        perf_counter = time.perf_counter
+        start_time = perf_counter()
+        if tree is None:
+            tree = self.new_tree()
+        root = tree.root
+        untried, first_child, moves = tree.untried, tree.first_child, tree.move
+        parent, visits, wins, side = tree.parent, tree.visits, tree.wins, tree.side
+        if stats is not None:
+            stats.reused_visits = visits[root]
+        evicted = tree.evicted
+        shuffle = random.shuffle
+        remaining = iterations
+
+        while remaining > 0:
+            if self.stopped or self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+            batch = min(self.batch_size, remaining)
+            remaining -= batch
+            # 选择和扩展阶段：收集一批叶子，values 中待估值的叶子先记为 None。
+            # 整批需要的节点一次预留，淘汰不会发生在一批叶子回溯之前
+            phase_start = perf_counter()
+            tree.reserve(batch)
+            leaves = []
+            values = []
+            positions = []
+            for _ in range(batch):
+                node = root
+                visits[node] += 1
+                undo_tokens = []
+                while True:
+                    if untried[node] is None:
+                        # 扩展顺序随机，使根并行的各工作进程建出不同的树
+                        legal_moves = board.generate_moves(tree.side_of(node))
+                        shuffle(legal_moves)
+                        tree.set_untried(node, legal_moves)
+                    if untried[node] or first_child[node] == NO_NODE:
+                        break
+                    node = tree.select_child(node)
+                    visits[node] += 1
+                    undo_tokens.append(board.make_move(moves[node]))
+                if untried[node]:
+                    node = tree.expand(node)
+                    visits[node] += 1
+                    undo_tokens.append(board.make_move(moves[node]))
+                if board.winner is not None:
+                    values.append(1.0 if board.winner == 'red' else -1.0)
+                elif untried[node] == ():
+                    values.append(-1.0 if side[node] == SIDE_CODES['red'] else 1.0)  # 无子可动，走棋方判负
+                else:
+                    values.append(None)
+                    positions.append(bytes(board.squares))
+                leaves.append(node)
+                if stats is not None:
+                    stats.max_depth = max(stats.max_depth, len(undo_tokens))
+                for undo_token in reversed(undo_tokens):
+                    board.unmake_move(undo_token)
+            phase_end = perf_counter()
+            if stats is not None:
+                stats.selection_time += phase_end - phase_start
+
+            # 估值阶段：整批局面一次估值
+            phase_start = phase_end
+            if positions:
+                evaluated = iter(self.evaluator.evaluate_positions(positions).tolist())
+                values = [next(evaluated) if value is None else value for value in values]
+            phase_end = perf_counter()
+            if stats is not None:
+                stats.simulation_time += phase_end - phase_start
+
+            # 回溯阶段：访问次数已在选择时累加，这里只累加胜局
+            phase_start = phase_end
+            for node, value in zip(leaves, values):
+                red_share = (1.0 + value) / 2
+                while node != NO_NODE:
+                    wins[node] += 1.0 - red_share if side[node] else red_share
+                    node = parent[node]
+            if stats is not None:
+                phase_end = perf_counter()
+                stats.backpropagation_time += phase_end - phase_start
+                stats.iterations += batch
+                stats.tree_size = tree.count
+                stats.evicted_nodes = tree.evicted - evicted
+                stats.elapsed = phase_end - start_time
+                if self.on_iteration is not None:
+                    self.on_iteration(stats)
+        if stats is not None:
+            stats.root_children = sum(1 for _ in tree.children(root))
+        return tree
+
+    def search_parallel(self, chessboard: ChessBoard, iterations: int) -> dict:
+        """根并行：各工作进程用不同的随机种子独立建树，迭代次数平均分配，最后合并根节点各子节点的统计.
+
+        工作进程按剩余时间设置自己的截止时间，并在迭代之间检查共享的停止事件；主进程等待结果时
+        检查 self.deadline（可能在 ponderhit 时才设置）和 stop，需要结束时设置停止事件。
+
+        Returns:
+            dict: 移动到 [访问次数, 子节点一方的胜局数] 的映射。
+        """
+        if self.executor is None:
+            self.stop_event = multiprocessing.Event()
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_search_worker,
+                                                initargs=(self.stop_event,))
+        self.stop_event.clear()
+        time_limit = self.deadline - time.perf_counter() if self.deadline is not None else None
+        iterations, remainder = divmod(iterations, self.workers)
+        futures = [
+            self.executor.submit(_search_worker, chessboard, self.side, iterations + (i < remainder),
+                                 self.playout.max_plies, random.getrandbits(64), self.evaluator, self.batch_size,
+                                 self.max_nodes, time_limit)
+            for i in range(self.workers)
+        ]
+        pending = futures
+        while pending:
+            if self.stopped or self.deadline is not None and time.perf_counter() > self.deadline:
+                self.stop_event.set()
+            pending = wait(pending, timeout=STOP_POLL_INTERVAL).not_done
+        statistics = {}
+        for future in futures:
+            for move, (visits, wins) in future.result().items():
+                merged = statistics.setdefault(move, [0, 0])
+                merged[0] += visits
+                merged[1] += wins
+        return statistics
+
+    def close(self):
+        """关闭根并行使用的进程池。"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.stop_event = None
+
+    def reuse_root(self, chessboard: ChessBoard) -> MCTSTree:
+        """在上一次搜索的树中找到当前局面对应的节点，作为这一次搜索的根节点。
+
+        依次检查上次的根节点本身和它的孙节点（本方走一步、对方再走一步后的局面），通过局面键值匹配。
+        找到后以它为根节点并保留它的访问和胜局统计，树的其余节点被回收。
+
+        Returns:
+            MCTSTree: 根节点对应当前局面的树；不在树中时返回 None。
+        """
+        tree, board = self.root, self.root_board
+        self.root = self.root_board = None
+        if tree is None:
+            return None
+        key = chessboard.hash_key(self.side)
+        if board.hash_key(self.side) == key:
+            return tree
+        moves = tree.move
+        for child in tree.children(tree.root):
+            undo_token = board.make_move(moves[child])
+            for grandchild in tree.children(child):
+                reply_token = board.make_move(moves[grandchild])
+                found = board.hash_key(self.side) == key
+                board.unmake_move(reply_token)
+                if found:
+                    board.unmake_move(undo_token)
+                    tree.reroot(grandchild)
+                    return tree
+            board.unmake_move(undo_token)
+        return None
+
+    def stop(self):
+        """请求正在进行的搜索尽快结束，可以从其他线程调用。调用方在开始下一次搜索前需要把 stopped 恢复为 False。"""
+        self.stopped = True
+        if self.stop_event is not None:
+            self.stop_event.set()
 
-        best_move = sorted(root.children, key=lambda c: (c.visits - c.wins) / c.visits)[-1].move
+    def find_best_move(self, time_limit_ms: float = None, iterations: int = None) -> int:
+        """搜索当前局面的最佳移动，但不执行它。开启 collect_stats 时，本次搜索的 MCTSStats 保存在 self.last_stats 中。
+
+        Args:
+            time_limit_ms (float): 时间预算，单位毫秒。为 None 时不限时。
+            iterations (int): 最大迭代次数。为 None 时，不限时为 self.iteration_limit，限时则直到时间用完。
+
+        Returns:
+            int: 整数编码的最佳移动。开局库中有当前局面时直接返回库中的移动。
+        """
+        self.iterations = 0
+        if self.book is not None:
+            book_move = self.book.choose_move(self.chessboard, self.side)
+            if book_move is not None:
+                return book_move
+
+        start_time = time.perf_counter()
+        if iterations is None:
+            iterations = self.iteration_limit if time_limit_ms is None else MAX_ITERATIONS
+        if time_limit_ms is not None:
+            self.deadline = start_time + time_limit_ms / 1000
+        stats = MCTSStats() if self.collect_stats else None
+        try:
+            if self.workers > 1:
+                statistics = self.search_parallel(self.chessboard, iterations)
+                self.iterations = sum(visits for visits, _ in statistics.values())
+                if stats is not None:
+                    stats.iterations = self.iterations
+                    stats.root_children = len(statistics)
+            else:
+                board = self.chessboard.copy()
+                tree = self.reuse_root(board) if self.reuse_tree else None
+                reused_visits = tree.visits[tree.root] if tree is not None else 0
+                if self.evaluator is not None:
+                    tree = self.search_batched(board, iterations, tree, stats)
+                elif stats is not None:
+                    tree = self.search_with_stats(board, iterations, stats, tree)
+                else:
+                    tree = self.search(board, iterations, tree)
+                if self.reuse_tree:
+                    self.root, self.root_board = tree, board
+                # 每次迭代（包括批量估值的每个叶子）都经过根节点一次
+                self.iterations = tree.visits[tree.root] - reused_visits
+                statistics = root_statistics(tree)
+        finally:
+            self.deadline = None
+
+        if not statistics:
+            # 没有可行的移动，或一次迭代都没有完成就被打断时，随机走一步
+            moves = self.chessboard.generate_moves(self.side)
+            if not moves:
+                raise Exception("没有可行的移动。")
+            return random.choice(moves)
+        # 选择对走出该移动的一方胜率最高的子节点
+        best_move = max(statistics, key=lambda move: (statistics[move][0] - statistics[move][1]) / statistics[move][0])
+        if stats is not None:
+            stats.best_visits = statistics[best_move][0]
+            stats.best_move = ChessBoard.decode_move(best_move)
+            stats.elapsed = time.perf_counter() - start_time
+            self.last_stats = stats
+        return best_move
+
+    def make_move(self):
+        """搜索并执行一个移动。开启 collect_stats 时，本次搜索的 MCTSStats 保存在 self.last_stats 中。"""
+        best_move = ChessBoard.decode_move(self.find_best_move())
         self.chessboard.move_piece_with_coords(best_move[0], best_move[1])
         return best_move
 
     def simulate_random_game(self, chessboard: ChessBoard, side: str):
-        """随机模拟游戏至结束，返回胜者."""
-        while chessboard.winner is None:
-            pieces_positions = chessboard.get_pieces_positions(side)
-            if not pieces_positions:
-                break
-            random_piece = random.choice(pieces_positions)
-            possible_moves = chessboard.get_possible_moves_with_coords(random_piece)
-            if not possible_moves:
-                break
-            random_move = random.choice(possible_moves)
-            chessboard.move_piece_with_coords(random_piece, random_move)
-            side = 'red' if side == 'black' else 'black'
-        return chessboard.winner
+        """随机模拟游戏至结束，返回胜者，和棋时返回 None. 棋盘本身不会被修改."""
+        return self.playout.play(chessboard, side)
+
+
+def root_statistics(tree: MCTSTree) -> dict:
+    """收集根节点各子节点的统计，返回移动到 [访问次数, 子节点一方的胜局数] 的映射."""
+    visits, wins, moves = tree.visits, tree.wins, tree.move
+    return {moves[child]: [visits[child], wins[child]] for child in tree.children(tree.root) if visits[child] > 0}
+
+
+# 根并行工作进程中的停止事件，由 _init_search_worker 在进程启动时设置
+_stop_event = None
+
+
+def _init_search_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _search_worker(chessboard: ChessBoard, side: str, iterations: int, max_playout_plies: int, seed: int,
+                   evaluator=None, batch_size: int = 32, max_nodes: int = None, time_limit: float = None) -> dict:
+    """根并行工作进程入口：用独立的随机种子建树，返回根节点统计.
+
+    time_limit 为剩余的搜索时间（秒），为 None 时不限时。每完成 WORKER_CHECK_ITERATIONS 次迭代检查一次停止事件，
+    设置后提前结束，返回已完成的迭代的统计。
+    """
+    random.seed(seed)
+    bot = MCTSBot(chessboard, side, max_playout_plies=max_playout_plies, evaluator=evaluator, batch_size=batch_size,
+                  max_nodes=max_nodes)
+    if time_limit is not None:
+        bot.deadline = time.perf_counter() + time_limit
+    search = bot.search_batched if evaluator is not None else bot.search
+    chunk = max(WORKER_CHECK_ITERATIONS, batch_size) if evaluator is not None else WORKER_CHECK_ITERATIONS
+    tree = bot.new_tree()
+    while iterations > 0 and not (_stop_event is not None and _stop_event.is_set()):
+        if bot.deadline is not None and time.perf_counter() > bot.deadline:
+            break
+        tree = search(chessboard, min(iterations, chunk), tree)
+        iterations -= chunk
+    return root_statistics(tree)
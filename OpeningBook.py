@@ -0,0 +1,252 @@
+import argparse
+import mmap
+import random
+import struct
+from ChessBoard import ChessBoard, coords_to_square
+
+# 开局库文件格式：8 字节文件头，之后是按 (键值, 移动) 升序排列的定长条目。
+# 每个条目为 "<QHH"：局面键值（ChessBoard.hash_key，包含走棋方）、移动（ChessBoard.encode_move 编码）、权重。
+BOOK_MAGIC = b'XQBOOK1\0'
+ENTRY_FORMAT = struct.Struct('<QHH')
+KEY_FORMAT = struct.Struct('<Q')
+MAX_WEIGHT = 0xFFFF
+# 根据走这步的一方最终的结果给出的权重：胜 2，和或结果未知 1，负 0（只出现在败局中的移动不会进入开局库）
+RESULT_WEIGHTS = {'win': 2, 'draw': 1, None: 1, 'loss': 0}
+# 文本对局记录中表示结果的记号
+RESULT_TOKENS = {'1-0': 'red', '0-1': 'black', '1/2-1/2': 'draw', '*': None}
+
+
+def parse_move(move) -> int:
+    """将移动转换为 ChessBoard.encode_move 的整数编码。
+
+    Args:
+        move: 整数编码、((row, col), (row, col)) 形式的元组，或者 "h2e2" 形式的字符串
+            （起点和终点各为列字母加行号，与 ChessBoard.move_piece 使用的坐标相同）。
+    """
+    if isinstance(move, int):
+        return move
+    if isinstance(move, str):
+        move = move.strip().replace('-', '').lower()
+        if len(move) != 4 or any(move[i] not in 'abcdefghi' for i in (0, 2)) \
+                or any(not move[i].isdigit() for i in (1, 3)):
+            raise ValueError(f"无效的移动: {move}")
+        src = coords_to_square(int(move[1]), ord(move[0]) - ord('a'))
+        dest = coords_to_square(int(move[3]), ord(move[2]) - ord('a'))
+        return src << 8 | dest
+    return ChessBoard.encode_move(move)
+
+
+def move_to_string(move: int) -> str:
+    """将整数编码的移动转换为 "h2e2" 形式的字符串。"""
+    return ''.join(ChessBoard.coords_to_alphanumeric(ChessBoard.decode_move(move)))
+
+
+class BookBuilder:
+    """从对局记录中统计开局库：记录每局前若干步中每个局面下走过的移动及其权重。"""
+
+    def __init__(self, max_plies: int = 20, start_fen: str = None):
+        """
+        Args:
+            max_plies (int): 每局只统计前这么多步。
+            start_fen (str): 对局的起始局面，为 None 时使用 set_initial_pieces 的初始局面。
+        """
+        self.max_plies = max_plies
+        self.start_fen = start_fen
+        self.weights = {}  # (局面键值, 移动) -> 累计权重
+        self.games = 0
+
+    def _start_position(self) -> tuple:
+        if self.start_fen is not None:
+            return ChessBoard.from_fen(self.start_fen)
+        chessboard = ChessBoard()
+        chessboard.set_initial_pieces()
+        return chessboard, 'red'
+
+    def add_game(self, moves: list, winner: str = None):
+        """加入一局棋。
+
+        Args:
+            moves (list): 按顺序的移动，格式见 parse_move。遇到无法解析或不合法的移动时停止统计这一局。
+            winner (str): 胜者 "red" 或 "black"，和棋为 "draw"，未知为 None。
+        """
+        chessboard, side = self._start_position()
+        self.games += 1
+        for move in moves[:self.max_plies]:
+            try:
+                move = parse_move(move)
+            except ValueError:
+                break
+            if move not in chessboard.generate_moves(side):
+                break
+            if winner is None or winner == 'draw':
+                result = winner
+            else:
+                result = 'win' if winner == side else 'loss'
+            weight = RESULT_WEIGHTS[result]
+            if weight:
+                entry = (chessboard.hash_key(side), move)
+                self.weights[entry] = min(self.weights.get(entry, 0) + weight, MAX_WEIGHT)
+            chessboard.make_move(move)
+            side = 'black' if side == 'red' else 'red'
+
+    def add_text(self, lines):
+        """加入文本格式的对局记录：每行一局，移动之间以空格分隔，可以以 "1-0"、"0-1"、"1/2-1/2" 或 "*" 结尾表示结果。
+        空行和以 # 开头的行会被忽略。
+        """
+        for line in lines:
+            tokens = line.split('#', 1)[0].split()
+            if not tokens:
+                continue
+            winner = None
+            if tokens[-1] in RESULT_TOKENS:
+                winner = RESULT_TOKENS[tokens.pop()]
+            self.add_game(tokens, winner)
+
+    def write(self, path: str) -> int:
+        """把开局库写入文件。
+
+        Returns:
+            int: 写入的条目数。
+        """
+        entries = sorted(self.weights.items())
+        with open(path, 'wb') as f:
+            f.write(BOOK_MAGIC)
+            for (key, move), weight in entries:
+                f.write(ENTRY_FORMAT.pack(key, move, weight))
+        return len(entries)
+
+
+class OpeningBook:
+    """只读的开局库，用 mmap 映射文件并按局面键值二分查找，不把整个文件读入内存。"""
+
+    def __init__(self, path: str, rng: random.Random = None):
+        """
+        Args:
+            path (str): BookBuilder.write 生成的文件。
+            rng (random.Random): 按权重随机选择移动时使用的随机数生成器，默认使用 random 模块。
+        """
+        self.path = path
+        self.rng = rng if rng is not None else random
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        if size < len(BOOK_MAGIC) or (size - len(BOOK_MAGIC)) % ENTRY_FORMAT.size:
+            self.file.close()
+            raise ValueError(f"不是有效的开局库文件: {path}")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(BOOK_MAGIC)] != BOOK_MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的开局库文件: {path}")
+        self.size = (size - len(BOOK_MAGIC)) // ENTRY_FORMAT.size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __getstate__(self):
+        # 传给其他进程时只传路径，在对方进程中重新映射文件
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _key_at(self, index: int) -> int:
+        return KEY_FORMAT.unpack_from(self.data, len(BOOK_MAGIC) + index * ENTRY_FORMAT.size)[0]
+
+    def probe(self, key: int) -> list:
+        """查询局面的所有开局库移动。
+
+        Args:
+            key (int): 局面键值，见 ChessBoard.hash_key。
+
+        Returns:
+            list: (移动, 权重) 的列表，移动为整数编码；局面不在开局库中时为空列表。
+        """
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        offset = len(BOOK_MAGIC) + low * ENTRY_FORMAT.size
+        while low < self.size:
+            entry_key, move, weight = ENTRY_FORMAT.unpack_from(self.data, offset)
+            if entry_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+            offset += ENTRY_FORMAT.size
+        return entries
+
+    def choose_move(self, chessboard: ChessBoard, side: str, best: bool = False):
+        """为当前局面选择一个开局库移动。
+
+        Args:
+            chessboard (ChessBoard): 当前局面。
+            side (str): 走棋方，"black" 或 "red"。
+            best (bool): 为 True 时选择权重最大的移动，否则按权重随机选择。
+
+        Returns:
+            int: 整数编码的移动；局面不在开局库中时返回 None。只返回当前局面下合法的移动，以防键值冲突。
+        """
+        entries = self.probe(chessboard.hash_key(side))
+        if not entries:
+            return None
+        legal_moves = set(chessboard.generate_moves(side))
+        entries = [(move, weight) for move, weight in entries if move in legal_moves]
+        if not entries:
+            return None
+        if best:
+            return max(entries, key=lambda entry: entry[1])[0]
+        return self.rng.choices([move for move, _ in entries], weights=[weight for _, weight in entries])[0]
+
+
+def open_book(book):
+    """机器人的 book 参数既可以是 OpeningBook，也可以是开局库文件路径；为 None 时不使用开局库。"""
+    if book is None or isinstance(book, OpeningBook):
+        return book
+    return OpeningBook(book)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="开局库工具。")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='从文本对局记录生成开局库')
+    build.add_argument('games', nargs='+', help='对局记录文件，每行一局，例如 "h2e2 h9g7 h0g2 1-0"')
+    build.add_argument('-o', '--output', required=True, help='输出的开局库文件')
+    build.add_argument('--max-plies', type=int, default=20, help='每局统计的步数')
+    probe = subparsers.add_parser('probe', help='查询局面的开局库移动')
+    probe.add_argument('book', help='开局库文件')
+    probe.add_argument('--fen', default=None, help='局面的 FEN，默认为初始局面')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        builder = BookBuilder(args.max_plies)
+        for path in args.games:
+            with open(path, encoding='utf-8') as f:
+                builder.add_text(f)
+        count = builder.write(args.output)
+        print(f"{builder.games} 局，{count} 个条目")
+    else:
+        if args.fen is None:
+            chessboard, side = ChessBoard(), 'red'
+            chessboard.set_initial_pieces()
+        else:
+            chessboard, side = ChessBoard.from_fen(args.fen)
+        with OpeningBook(args.book) as book:
+            for move, weight in sorted(book.probe(chessboard.hash_key(side)), key=lambda entry: -entry[1]):
+                print(move_to_string(move), weight)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import random
+import time
+from ChessBoard import (ChessBoard, _MOVE_GENERATORS, BOARD_SQUARES, KING, RED_TAG, BLACK_TAG, SIDE_MASK,
+                        SIDE_TAGS, ZOBRIST_KEYS, ZOBRIST_SIDE_KEY)
+
+
+class PlayoutEngine:
+    """MCTS 使用的快速随机对局引擎。
+
+    直接在格子下标上操作：为双方各维护一个随对局增量更新的棋子列表，不再每步扫描整个棋盘；
+    走法由走法表生成后直接执行，不再转换为 'a1' 形式的坐标重新校验。
+    对局在一方的将/帅被吃、走棋方无子可动（判负）、达到步数上限或出现重复局面时结束。
+    """
+
+    def __init__(self, max_plies: int = 300, detect_repetition: bool = True, rng: random.Random = None):
+        """
+        Args:
+            max_plies (int): 单次模拟的最大步数，达到后按和棋处理；为 None 时不限步数。
+            detect_repetition (bool): 是否在出现重复局面时按和棋结束模拟。
+            rng (random.Random): 随机数生成器，默认使用 random 模块的全局状态（可以用 random.seed 复现）。
+        """
+        self.max_plies = max_plies
+        self.detect_repetition = detect_repetition
+        self.rng = rng if rng is not None else random
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清零吞吐量统计。"""
+        self.playouts = 0  # 完成的模拟次数
+        self.plies = 0  # 模拟中走过的总步数
+        self.elapsed = 0.0  # 模拟耗费的总时间，单位秒
+
+    def playouts_per_second(self) -> float:
+        """返回到目前为止的平均吞吐量，单位为每秒模拟次数。"""
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def play(self, chessboard: ChessBoard, side: str):
+        """从给定局面随机模拟至结束，棋盘本身不会被修改。
+
+        Args:
+            chessboard (ChessBoard): 起始局面。
+            side (str): 先走的一方，"black" 或 "red"。
+
+        Returns:
+            str: 胜者 "red" 或 "black"，走棋方无子可动时对方获胜；和棋（达到步数上限或重复局面）时返回 None。
+        """
+        start_time = time.perf_counter()
+        board = chessboard.copy()
+        squares = board.squares
+        winner = board.winner
+        choice = self.rng.choice
+        max_plies = self.max_plies
+        detect_repetition = self.detect_repetition
+
+        # 双方的棋子列表以及每个格子在列表中的位置，用于 O(1) 地更新和删除
+        pieces = {RED_TAG: [], BLACK_TAG: []}
+        index_of = [0] * 256
+        for square in BOARD_SQUARES:
+            piece = squares[square]
+            if piece != 0:
+                own = pieces[piece & SIDE_MASK]
+                index_of[square] = len(own)
+                own.append(square)
+
+        tag = SIDE_TAGS[side]
+        key = chessboard.hash_key(side)
+        seen = {key}
+        ply = 0
+        while winner is None and ply != max_plies:
+            own = pieces[tag]
+            if not own:
+                winner = 'black' if tag == RED_TAG else 'red'
+                break
+            # 随机选一个棋子，如果它无路可走，再按随机顺序依次尝试其余棋子
+            src = choice(own)
+            dests = _MOVE_GENERATORS[squares[src] & 7](board, src, tag)
+            if not dests:
+                candidates = own[:]
+                self.rng.shuffle(candidates)
+                for src in candidates:
+                    dests = _MOVE_GENERATORS[squares[src] & 7](board, src, tag)
+                    if dests:
+                        break
+                else:
+                    winner = 'black' if tag == RED_TAG else 'red'  # 无子可动，判负
+                    break
+            dest = choice(dests)
+
+            moving_piece = squares[src]
+            captured = squares[dest]
+            squares[dest] = moving_piece
+            squares[src] = 0
+            ply += 1
+            if captured != 0:
+                if captured & 7 == KING:
+                    winner = 'red' if tag == RED_TAG else 'black'
+                    break
+                # 从对方棋子列表中删除被吃的棋子：用最后一个元素填补空位
+                opponent = pieces[tag ^ SIDE_MASK]
+                last = opponent.pop()
+                if last != dest:
+                    opponent[index_of[dest]] = last
+                    index_of[last] = index_of[dest]
+            own[index_of[src]] = dest
+            index_of[dest] = index_of[src]
+            if detect_repetition:
+                keys = ZOBRIST_KEYS[moving_piece]
+                key ^= keys[src] ^ keys[dest] ^ ZOBRIST_SIDE_KEY
+                if captured != 0:
+                    key ^= ZOBRIST_KEYS[captured][dest]
+                if key in seen:
+                    break  # 重复局面
+                seen.add(key)
+            tag ^= SIDE_MASK
+
+        self.playouts += 1
+        self.plies += ply
+        self.elapsed += time.perf_counter() - start_time
+        return winner
@@ -15,4 +15,13 @@ class RandomBot:
         random_move = random.choice(possible_moves)
         success = self.chessboard.move_piece_with_coords(random_piece, random_move)
         if not success:
-            raise Exception("移动失败。")
\ No newline at end of file
+            raise Exception("移动失败。")
+
+    def make_move(self):
+        """在本方所有可行的移动中均匀随机地选择一个并执行，返回 (起点坐标, 终点坐标)。"""
+        moves = self.chessboard.generate_moves(self.side)
+        if not moves:
+            raise Exception("没有可行的移动。")
+        move = ChessBoard.decode_move(random.choice(moves))
+        self.chessboard.move_piece_with_coords(move[0], move[1])
+        return move
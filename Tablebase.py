@@ -0,0 +1,409 @@
+import argparse
+import os
+import sys
+import time
+from array import array
+from ChessBoard import (ChessBoard, BOARD_SQUARES, SQUARE_COORDS, FEN_LETTERS, PIECE_VALUES, RED_TAG, BLACK_TAG,
+                        SIDE_MASK, KING, GUARD, ELEPHANT, PAWN, ELEPHANT_MOVES, GUARD_MOVES, KING_MOVES, PAWN_MOVES,
+                        coords_to_square)
+
+# 残局库中的分值以走棋方为视角：0 为和棋；胜为 TB_MATE - d，负为 -(TB_MATE - d)，d 为到对局结束的步数。
+# 对局在一方的将帅被吃时结束；走棋方无子可动时判负，此时 d 为 0。
+TB_MATE = 32000
+TB_MAGIC = b'XQTB1\0\0\0'
+TB_SUFFIX = '.xtb'
+DEFAULT_SIGNATURES = ('KRvK', 'KNvKA', 'KCAvK')
+# 子力组合中棋子的书写顺序，与 ChessBoard.FEN_LETTERS 相同：K 将帅 A 士 B 象 N 马 R 车 C 炮 P 兵卒
+KIND_ORDER = FEN_LETTERS.upper()
+
+
+def _reachable_squares(tag: int, kind: int) -> tuple:
+    """一方某种棋子在对局中可能出现的格子：将帅、士、象、兵从初始位置出发按走法表可以到达的格子，其余棋子为全部格子。"""
+    tables = {KING: KING_MOVES[tag], GUARD: GUARD_MOVES[tag], PAWN: PAWN_MOVES[tag]}
+    if kind not in tables and kind != ELEPHANT:
+        return BOARD_SQUARES
+    initial = ChessBoard()
+    initial.set_initial_pieces()
+    frontier = [square for square in BOARD_SQUARES if initial.squares[square] == tag | kind]
+    reachable = set(frontier)
+    while frontier:
+        square = frontier.pop()
+        if kind == ELEPHANT:
+            dests = [dest for dest, _ in ELEPHANT_MOVES[tag][square]]
+        else:
+            dests = tables[kind][square]
+        for dest in dests:
+            if dest not in reachable:
+                reachable.add(dest)
+                frontier.append(dest)
+    return tuple(square for square in BOARD_SQUARES if square in reachable)
+
+
+_REACHABLE = {(tag, kind): _reachable_squares(tag, kind) for tag in (RED_TAG, BLACK_TAG) for kind in range(7)}
+# 红黑互换时格子的对应关系：第 row 行换到第 9 - row 行
+MIRROR_SQUARE = [0] * 256
+for _square in BOARD_SQUARES:
+    _row, _col = SQUARE_COORDS[_square]
+    MIRROR_SQUARE[_square] = coords_to_square(9 - _row, _col)
+
+
+def _side_signature(kinds: list) -> str:
+    return ''.join(KIND_ORDER[kind] for kind in sorted(kinds))
+
+
+def _side_strength(kinds: list) -> tuple:
+    return sum(PIECE_VALUES[kind] for kind in kinds), len(kinds), _side_signature(kinds)
+
+
+def material_signature(red_kinds: list, black_kinds: list) -> tuple:
+    """计算子力组合的规范名称。
+
+    规范形式中子力较强的一方为红方，因此黑方较强时需要红黑互换（棋盘上下翻转、走棋方互换）后再查表。
+
+    Returns:
+        tuple: (名称, 是否需要红黑互换)，名称形如 "KRvK"。
+    """
+    mirrored = _side_strength(black_kinds) > _side_strength(red_kinds)
+    if mirrored:
+        red_kinds, black_kinds = black_kinds, red_kinds
+    return _side_signature(red_kinds) + 'v' + _side_signature(black_kinds), mirrored
+
+
+def parse_signature(signature: str) -> tuple:
+    """将 "KRvK" 形式的名称解析为 (红方棋子种类列表, 黑方棋子种类列表)。"""
+    red, separator, black = signature.upper().partition('V')
+    if not separator or red.count('K') != 1 or black.count('K') != 1:
+        raise ValueError(f"无效的子力组合: {signature}")
+    return [KIND_ORDER.index(letter) for letter in red], [KIND_ORDER.index(letter) for letter in black]
+
+
+class TableLayout:
+    """一个子力组合中所有局面的编号方式。
+
+    每个棋子占一个槽位，槽位按红方在前、种类编号升序排列；每个槽位只枚举该棋子可能出现的格子。
+    局面编号为各槽位格子序号的混合进制数乘以 2，再加上走棋方（红 0 黑 1）。
+    """
+
+    def __init__(self, signature: str):
+        self.signature = signature
+        red_kinds, black_kinds = parse_signature(signature)
+        self.slots = [(RED_TAG, kind) for kind in sorted(red_kinds)] + [(BLACK_TAG, kind) for kind in sorted(black_kinds)]
+        self.slot_squares = [_REACHABLE[slot] for slot in self.slots]
+        # 每个槽位中格子下标到序号的映射，不可能出现的格子为 -1
+        self.slot_ranks = []
+        for squares in self.slot_squares:
+            ranks = [-1] * 256
+            for rank, square in enumerate(squares):
+                ranks[square] = rank
+            self.slot_ranks.append(ranks)
+        self.strides = []
+        size = 1
+        for squares in reversed(self.slot_squares):
+            self.strides.append(size)
+            size *= len(squares)
+        self.strides.reverse()
+        self.size = size * 2
+
+    def index(self, placement: list, side_bit: int):
+        """根据各槽位的格子下标计算局面编号，有棋子不在可能出现的格子上时返回 None。"""
+        base = 0
+        for ranks, stride, square in zip(self.slot_ranks, self.strides, placement):
+            rank = ranks[square]
+            if rank < 0:
+                return None
+            base += rank * stride
+        return base * 2 + side_bit
+
+    def placement(self, index: int) -> list:
+        """由局面编号还原各槽位的格子下标（不含走棋方）。"""
+        base = index >> 1
+        placement = []
+        for squares, stride in zip(self.slot_squares, self.strides):
+            rank, base = divmod(base, stride)
+            placement.append(squares[rank])
+        return placement
+
+    def locate(self, chessboard: ChessBoard, side: str, mirrored: bool):
+        """计算棋盘在本表中的局面编号，mirrored 表示需要红黑互换。棋盘上的子力必须与本表一致。"""
+        squares = chessboard.squares
+        pieces = sorted(
+            ((squares[square] & SIDE_MASK) ^ (SIDE_MASK if mirrored else 0), squares[square] & 7,
+             MIRROR_SQUARE[square] if mirrored else square)
+            for square in BOARD_SQUARES if squares[square] != 0
+        )
+        side_bit = (side == 'black') ^ mirrored
+        return self.index([square for _, _, square in pieces], side_bit)
+
+
+def _step(score: int) -> int:
+    """子局面的分值（子局面走棋方视角）换算为走出这一步的一方的分值：变号并多计一步。"""
+    if score > 0:
+        return -score + 1
+    if score < 0:
+        return -score - 1
+    return 0
+
+
+class Tablebase:
+    """残局库的读取和查询。每个子力组合保存为目录中的一个 <名称>.xtb 文件，按需加载。"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables = {}  # 名称 -> (TableLayout, 分值数组)，文件不存在时为 None
+        self.max_pieces = 0  # 目录中残局库的最大棋子数，棋子更多的局面无需查询
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(TB_SUFFIX):
+                    self.max_pieces = max(self.max_pieces, len(name) - len(TB_SUFFIX) - 1)
+
+    def table(self, signature: str):
+        if signature not in self.tables:
+            path = os.path.join(self.directory, signature + TB_SUFFIX)
+            if os.path.exists(path):
+                self.tables[signature] = (TableLayout(signature), load_table(path))
+            else:
+                self.tables[signature] = None
+        return self.tables[signature]
+
+    def probe(self, chessboard: ChessBoard, side: str):
+        """查询局面。
+
+        Args:
+            chessboard (ChessBoard): 局面，不能已经分出胜负。
+            side (str): 走棋方，"black" 或 "red"。
+
+        Returns:
+            int: 走棋方视角的分值（见 TB_MATE）；局面不在残局库中时返回 None。
+        """
+        squares = chessboard.squares
+        if 90 - squares.count(0) > self.max_pieces:
+            return None
+        red_kinds = []
+        black_kinds = []
+        for square in BOARD_SQUARES:
+            piece = squares[square]
+            if piece != 0:
+                (red_kinds if piece & RED_TAG else black_kinds).append(piece & 7)
+        if red_kinds.count(KING) != 1 or black_kinds.count(KING) != 1:
+            return None
+        signature, mirrored = material_signature(red_kinds, black_kinds)
+        table = self.table(signature)
+        if table is None:
+            return None
+        layout, values = table
+        index = layout.locate(chessboard, side, mirrored)
+        return None if index is None else values[index]
+
+    def best_move(self, chessboard: ChessBoard, side: str):
+        """根据残局库为局面选择最佳移动：尽快取胜，必败时尽量拖延。
+
+        Returns:
+            tuple: (整数编码的移动, 走棋方视角的分值)；局面或其某个后续局面不在残局库中时返回 None。
+        """
+        if self.probe(chessboard, side) is None:
+            return None
+        other = 'black' if side == 'red' else 'red'
+        board = chessboard.copy()
+        best = None
+        for move in board.generate_moves(side):
+            if board.squares[move & 0xFF] & 7 == KING and board.squares[move & 0xFF] != 0:
+                return move, TB_MATE - 1
+            undo_token = board.make_move(move)
+            score = self.probe(board, other)
+            board.unmake_move(undo_token)
+            if score is None:
+                return None
+            score = _step(score)
+            if best is None or score > best[1]:
+                best = (move, score)
+        return best
+
+
+def load_table(path: str) -> array:
+    with open(path, 'rb') as f:
+        if f.read(len(TB_MAGIC)) != TB_MAGIC:
+            raise ValueError(f"不是有效的残局库文件: {path}")
+        values = array('h', f.read())
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def save_table(path: str, values: array):
+    values = array('h', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    with open(path, 'wb') as f:
+        f.write(TB_MAGIC)
+        values.tofile(f)
+
+
+def open_tablebase(tablebase):
+    """机器人的 tablebase 参数既可以是 Tablebase，也可以是残局库目录；为 None 时不使用残局库。"""
+    if tablebase is None or isinstance(tablebase, Tablebase):
+        return tablebase
+    return Tablebase(tablebase)
+
+
+def subsignatures(signature: str) -> list:
+    """吃掉一个非将帅棋子后可能出现的子力组合（规范名称），不重复。"""
+    red_kinds, black_kinds = parse_signature(signature)
+    result = []
+    for kinds in (red_kinds, black_kinds):
+        for kind in set(kinds) - {KING}:
+            kinds.remove(kind)
+            name = material_signature(red_kinds, black_kinds)[0]
+            if name not in result:
+                result.append(name)
+            kinds.append(kind)
+    return result
+
+
+def solve_table(signature: str, tablebase: Tablebase) -> array:
+    """用逆向分析求解一个子力组合的所有局面。吃子后的子力组合必须已经在 tablebase 中。
+
+    先为每个局面生成走法：吃将帅的局面立即取胜，无子可动的局面判负，吃子进入的局面直接查子表，
+    其余着法记入反向走法图。然后按到对局结束的步数从小到大处理：
+    子局面必败时，所有能走到它的父局面必胜；父局面的所有着法都走向对方必胜的局面时，父局面必败。
+    处理完毕后仍未确定的局面为和棋。
+
+    Returns:
+        array: 按局面编号排列的分值（'h' 数组），不存在的局面（两个棋子在同一格）为 0。
+    """
+    layout = TableLayout(signature)
+    size = layout.size
+    values = array('h', bytes(2 * size))
+    solved = bytearray(size)
+    unresolved = array('i', bytes(4 * size))  # 尚未确定为必败的着法数
+    can_draw = bytearray(size)  # 有着法走向和棋的子表局面，这样的局面不会必败
+    predecessors = [None] * size
+    # 按步数分桶的待处理事件：(是否为取胜事件, 局面编号)
+    buckets = [[]]
+    board = ChessBoard()
+    squares = board.squares
+    slots = layout.slots
+    strides = layout.strides
+    slot_ranks = layout.slot_ranks
+
+    def schedule(distance: int, win: bool, index: int):
+        while len(buckets) <= distance:
+            buckets.append([])
+        buckets[distance].append((win, index))
+
+    for base in range(size >> 1):
+        placement = layout.placement(base << 1)
+        if len(set(placement)) != len(placement):
+            continue
+        for square, (tag, kind) in zip(placement, slots):
+            squares[square] = tag | kind
+        slot_of = {square: slot for slot, square in enumerate(placement)}
+        for side_bit, side in enumerate(('red', 'black')):
+            index = base << 1 | side_bit
+            moves = board.generate_moves(side)
+            if not moves:
+                schedule(0, False, index)  # 无子可动，判负
+                continue
+            count = 0
+            win_now = False
+            for move in moves:
+                src, dest = move >> 8, move & 0xFF
+                captured = squares[dest]
+                if captured == 0:
+                    slot = slot_of[src]
+                    child = (base + (slot_ranks[slot][dest] - slot_ranks[slot][src]) * strides[slot]) << 1 | (side_bit ^ 1)
+                    if predecessors[child] is None:
+                        predecessors[child] = [index]
+                    else:
+                        predecessors[child].append(index)
+                    count += 1
+                    continue
+                if captured & 7 == KING:
+                    win_now = True
+                    break
+                # 吃子后进入子表，子局面的分值已知
+                undo_token = board.make_move(move)
+                score = tablebase.probe(board, 'black' if side == 'red' else 'red')
+                board.unmake_move(undo_token)
+                if score is None:
+                    raise ValueError(f"缺少 {signature} 的子表，请先生成 {subsignatures(signature)}")
+                if score < 0:
+                    schedule(TB_MATE + score + 1, True, index)
+                elif score > 0:
+                    count += 1
+                    schedule(TB_MATE - score + 1, False, index)
+                else:
+                    can_draw[index] = 1
+            if win_now:
+                schedule(1, True, index)
+                count = 0
+            unresolved[index] = count
+        for square in placement:
+            squares[square] = 0
+
+    # 按步数处理事件。取胜事件直接确定局面；失败事件表示局面的一个着法走向了对方必胜的局面
+    distance = 0
+    while distance < len(buckets):
+        for win, index in buckets[distance]:
+            if solved[index]:
+                continue
+            if win:
+                values[index] = TB_MATE - distance
+            else:
+                if distance > 0:
+                    unresolved[index] -= 1
+                if unresolved[index] > 0 or can_draw[index]:
+                    continue
+                values[index] = -(TB_MATE - distance)
+            solved[index] = 1
+            for parent in predecessors[index] or ():
+                if not solved[parent]:
+                    schedule(distance + 1, not win, parent)
+        distance += 1
+    return values
+
+
+def generate(signatures: list, directory: str, verbose: bool = False) -> list:
+    """生成子力组合及其所需的所有子表，已经存在的文件会被跳过。
+
+    Returns:
+        list: 本次生成的子力组合名称。
+    """
+    os.makedirs(directory, exist_ok=True)
+    tablebase = Tablebase(directory)
+    generated = []
+
+    def build(signature: str):
+        signature = material_signature(*parse_signature(signature))[0]
+        path = os.path.join(directory, signature + TB_SUFFIX)
+        if os.path.exists(path):
+            return
+        for child in subsignatures(signature):
+            build(child)
+        start_time = time.perf_counter()
+        values = solve_table(signature, tablebase)
+        save_table(path, values)
+        tablebase.tables.pop(signature, None)
+        tablebase.max_pieces = max(tablebase.max_pieces, len(signature) - 1)
+        generated.append(signature)
+        if verbose:
+            wins = sum(1 for value in values if value > 0)
+            losses = sum(1 for value in values if value < 0)
+            print(f"{signature}: {len(values)} 个局面，胜 {wins}，负 {losses}，"
+                  f"耗时 {time.perf_counter() - start_time:.1f} 秒")
+
+    for signature in signatures:
+        build(signature)
+    return generated
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="用逆向分析生成少子残局库。")
+    parser.add_argument('signatures', nargs='*', default=list(DEFAULT_SIGNATURES),
+                        help=f"子力组合，例如 KRvK（默认: {' '.join(DEFAULT_SIGNATURES)}）")
+    parser.add_argument('-d', '--directory', default='tablebases', help='残局库目录')
+    args = parser.parse_args(argv)
+    generate(args.signatures, args.directory, verbose=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+from array import array
+
+# 置换表条目的边界类型，0 表示空槽
+EXACT = 1  # 精确值
+LOWER_BOUND = 2  # 下界（发生了 beta 截断）
+UPPER_BOUND = 3  # 上界（没有着法超过 alpha）
+
+REPLACEMENT_POLICIES = ('depth', 'always')
+
+
+class TranspositionTable:
+    """固定大小的置换表，以 Zobrist 键值索引搜索过的局面。
+
+    每个条目保存深度、分值、边界类型和最佳移动（ChessBoard.encode_move 编码）。
+    各字段分别存放在定长的 array 中，占用内存在创建时即已确定，不会随搜索增长。
+    """
+    # 每个条目占用的字节数：键值(8) + 分值(8) + 移动(2) + 深度(1) + 边界类型(1) + 代数(1)
+    ENTRY_SIZE = 21
+
+    def __init__(self, size_mb: float = 16, replacement: str = 'depth'):
+        """
+        Args:
+            size_mb (float): 置换表的内存上限，单位 MB。
+            replacement (str): 替换策略。'depth' 表示深度优先，只有新条目深度不低于旧条目、
+                或旧条目来自之前的搜索时才覆盖；'always' 表示总是覆盖。
+        """
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"未知的替换策略: {replacement}")
+        self.replacement = replacement
+        # 条目数取不超过内存上限的最大 2 的幂，便于用位运算取槽位
+        capacity = 1
+        while capacity * 2 * self.ENTRY_SIZE <= size_mb * 1024 * 1024:
+            capacity *= 2
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        """清空所有条目。"""
+        capacity = self.capacity
+        self.keys = array('Q', bytes(8 * capacity))
+        self.scores = array('d', bytes(8 * capacity))
+        self.moves = array('H', bytes(2 * capacity))
+        self.depths = array('b', bytes(capacity))
+        self.flags = array('B', bytes(capacity))
+        self.generations = array('B', bytes(capacity))
+
+    def new_search(self):
+        """开始新一轮搜索，旧的条目在深度优先策略下可以被优先替换。"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key: int):
+        """查询局面。
+
+        Args:
+            key (int): 局面键值，见 ChessBoard.hash_key。
+
+        Returns:
+            tuple: (depth, score, flag, move) 形式的条目，未命中时返回 None。
+        """
+        index = key & self.mask
+        if self.flags[index] == 0 or self.keys[index] != key:
+            return None
+        return self.depths[index], self.scores[index], self.flags[index], self.moves[index]
+
+    def store(self, key: int, depth: int, score: float, flag: int, move: int):
+        """保存局面的搜索结果。
+
+        Args:
+            key (int): 局面键值。
+            depth (int): 搜索深度。
+            score (float): 分值。
+            flag (int): 边界类型，EXACT、LOWER_BOUND 或 UPPER_BOUND。
+            move (int): 最佳移动的编码，0 表示没有。
+        """
+        index = key & self.mask
+        same_position = self.keys[index] == key
+        if self.replacement == 'depth' and self.flags[index] != 0 and not same_position \
+                and self.generations[index] == self.generation and self.depths[index] > depth:
+            return
+        if move == 0 and same_position:
+            move = self.moves[index]  # 保留同一局面之前找到的最佳移动
+        self.keys[index] = key
+        self.scores[index] = score
+        self.moves[index] = move
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.generations[index] = self.generation
@@ -0,0 +1,368 @@
+import sys
+import threading
+import time
+from ChessBoard import ChessBoard
+from AlphaBetaBot import AlphaBetaBot, MAX_SEARCH_DEPTH
+from MCTSBot import MCTSBot, MAX_ITERATIONS
+from OpeningBook import parse_move, move_to_string, open_book
+from Tablebase import open_tablebase
+
+# 象棋通用引擎协议（UCCI）的引擎。引擎进程常驻，通过标准输入输出与界面通信，
+# 两方的机器人在多次 position/go 之间保留，置换表、历史表等搜索状态在整盘棋中复用。
+ENGINE_NAME = 'chinese_chess'
+START_FEN = 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1'
+# 引擎选项：名称 -> (UCCI 选项类型, 默认值, 类型的其他参数)。布尔值对应 check，整数对应 spin
+OPTIONS = {
+    'engine': ('combo', 'alphabeta', 'var alphabeta var mcts'),
+    'usemillisec': ('check', False, ''),
+    'hashsize': ('spin', 16, 'min 1 max 1024'),
+    'threads': ('spin', 1, 'min 1 max 64'),
+    'depth': ('spin', 4, 'min 1 max 64'),
+    'iterations': ('spin', 10000, 'min 1 max 100000000'),
+    'evaluator': ('string', '', ''),  # MCTS 的叶子估值器："linear" 或 .npz 文件，为空时随机模拟；需要 NumPy
+    'batchsize': ('spin', 32, 'min 1 max 4096'),  # 使用叶子估值器时每批估值的叶子数
+    'quiescence': ('check', True, ''),
+    'pvs': ('check', True, ''),
+    'nullmove': ('check', True, ''),
+    'lmr': ('check', True, ''),
+    'usebook': ('check', True, ''),
+    'bookfiles': ('string', '', ''),
+    'tablebase': ('string', '', ''),
+}
+MATE_SCORE = 10000  # info 中用来表示必胜的分值，必败为其相反数
+DEFAULT_MOVES_TO_GO = 30  # 时段制没有给出 movestogo 时，假设剩余时间还要走这么多步
+MOVE_OVERHEAD_MS = 50  # 每步为通信和线程切换预留的时间
+MIN_MOVE_TIME_MS = 10
+
+
+def _opposite(side: str) -> str:
+    return 'black' if side == 'red' else 'red'
+
+
+def parse_go(tokens: list) -> dict:
+    """解析 go 命令的参数，例如 ["ponder", "time", "60000", "increment", "0"]。
+
+    Returns:
+        dict: 出现的参数，数值参数为 float，ponder、infinite、draw 为 True。
+    """
+    params = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('ponder', 'infinite', 'draw'):
+            params[token] = True
+        elif i + 1 < len(tokens):
+            try:
+                params[token] = float(tokens[i + 1])
+            except ValueError:
+                pass
+            i += 1
+        i += 1
+    return params
+
+
+def allocate_time(params: dict, millisec: bool) -> float:
+    """根据 go 命令的时间参数决定这一步的思考时间。
+
+    Args:
+        params (dict): parse_go 的结果。time 为剩余时间，increment 为每步加秒，movestogo 为本时段剩余步数，
+            movetime 为指定的每步时间。
+        millisec (bool): 时间参数的单位是否为毫秒（usemillisec 选项），否则为秒。
+
+    Returns:
+        float: 思考时间，单位毫秒；没有时间参数时返回 None。
+    """
+    scale = 1 if millisec else 1000
+    if 'movetime' in params:
+        return max(params['movetime'] * scale - MOVE_OVERHEAD_MS, MIN_MOVE_TIME_MS)
+    if 'time' not in params:
+        return None
+    remaining = params['time'] * scale
+    moves_to_go = params.get('movestogo') or DEFAULT_MOVES_TO_GO
+    budget = remaining / moves_to_go + params.get('increment', 0) * scale
+    # 无论如何都不用掉超过一半的剩余时间
+    budget = min(budget, remaining / 2) - MOVE_OVERHEAD_MS
+    return max(budget, MIN_MOVE_TIME_MS)
+
+
+def principal_variation(bot: AlphaBetaBot, board: ChessBoard, side: str, first_move: int, max_length: int) -> list:
+    """从置换表中沿着最佳着法取出主要变例。
+
+    Returns:
+        list: 整数编码的着法列表，以 first_move 开头；置换表中的着法不合法时在此截断。
+    """
+    board = board.copy()
+    pv = [first_move]
+    seen = set()
+    board.make_move(first_move)
+    side = _opposite(side)
+    while len(pv) < max_length and board.winner is None:
+        key = board.hash_key(side)
+        entry = bot.tt.probe(key)
+        if key in seen or entry is None or entry[3] not in board.generate_moves(side):
+            break
+        seen.add(key)
+        pv.append(entry[3])
+        board.make_move(entry[3])
+        side = _opposite(side)
+    return pv
+
+
+class UCCIEngine:
+    """常驻进程的 UCCI 引擎。
+
+    命令在主线程中逐行处理，搜索在后台线程中进行，因此搜索时仍然可以响应 isready、stop 和 ponderhit。
+    """
+
+    def __init__(self, input_stream=None, output_stream=None):
+        self.input = input_stream if input_stream is not None else sys.stdin
+        self.output = output_stream if output_stream is not None else sys.stdout
+        self.output_lock = threading.Lock()
+        self.options = {name: default for name, (_, default, _) in OPTIONS.items()}
+        self.board, self.side = ChessBoard.from_fen(START_FEN)
+        # 两方的机器人在整盘棋中保留；选项改变或者 newgame 时重新创建
+        self.bots = {}
+        self.book = None
+        self.tablebase = None
+        self.search_thread = None
+        self.search_bot = None
+        self.search_params = None
+        # 后台思考时，在 ponderhit 或 stop 之前不能输出 bestmove
+        self.ponder_released = threading.Event()
+
+    def send(self, line: str):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def run(self):
+        """处理命令直到收到 quit 或输入结束。"""
+        for line in self.input:
+            if not self.handle(line):
+                break
+        else:
+            self.stop_search()
+            self.close()
+
+    def handle(self, line: str) -> bool:
+        """处理一行命令。
+
+        Returns:
+            bool: 收到 quit 时为 False。
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == 'ucci':
+            self.send(f'id name {ENGINE_NAME}')
+            for name, (option_type, default, extra) in OPTIONS.items():
+                if isinstance(default, bool):
+                    default = 'true' if default else 'false'
+                extra = f' {extra}' if extra else ''
+                self.send(f'option {name} type {option_type}{extra} default {default if default != "" else "<empty>"}')
+            self.send('ucciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'setoption':
+            self.stop_search()
+            self.set_option(arguments)
+        elif command == 'position':
+            self.stop_search()
+            self.set_position(arguments)
+        elif command == 'go':
+            self.stop_search()
+            self.go(parse_go(arguments))
+        elif command == 'ponderhit':
+            self.ponder_hit()
+        elif command == 'stop':
+            self.stop_search()
+        elif command == 'quit':
+            self.stop_search()
+            self.close()
+            self.send('bye')
+            return False
+        # 按照协议，无法识别的命令直接忽略
+        return True
+
+    def set_option(self, arguments: list):
+        """处理 "setoption <名称> [值]"。newgame 表示开始新的一盘，清除所有搜索状态。"""
+        if not arguments:
+            return
+        name = arguments[0].lower()
+        value = ' '.join(arguments[1:])
+        if name == 'newgame':
+            self.close()
+            return
+        if name not in OPTIONS:
+            self.send(f'info string unknown option {name}')
+            return
+        default = OPTIONS[name][1]
+        if isinstance(default, bool):
+            value = value.lower() in ('true', 'on', '1')
+        elif isinstance(default, int):
+            try:
+                value = int(value)
+            except ValueError:
+                self.send(f'info string invalid value for {name}: {value}')
+                return
+        elif value == '<empty>':
+            value = ''
+        self.options[name] = value
+        self.close()  # 机器人的构造参数改变了，下次搜索时重新创建
+
+    def set_position(self, arguments: list):
+        """处理 "position {fen <FEN> | startpos} [moves <移动> ...]"。遇到不合法的移动时停止执行后续移动。"""
+        if 'moves' in arguments:
+            index = arguments.index('moves')
+            setup, moves = arguments[:index], arguments[index + 1:]
+        else:
+            setup, moves = arguments, []
+        try:
+            if setup and setup[0] == 'fen':
+                board, side = ChessBoard.from_fen(' '.join(setup[1:]))
+            else:
+                board, side = ChessBoard.from_fen(START_FEN)
+        except (ValueError, IndexError):
+            self.send(f'info string invalid position: {" ".join(arguments)}')
+            return
+        for text in moves:
+            try:
+                move = parse_move(text)
+            except ValueError:
+                move = None
+            if move is None or move not in board.generate_moves(side):
+                self.send(f'info string illegal move {text}')
+                break
+            board.make_move(move)
+            side = _opposite(side)
+        self.board, self.side = board, side
+
+    def get_bot(self, side: str):
+        """取得走棋方的机器人，不存在时按当前选项创建。"""
+        bot = self.bots.get(side)
+        if bot is None:
+            if self.options['usebook'] and self.options['bookfiles'] and self.book is None:
+                self.book = open_book(self.options['bookfiles'])
+            if self.options['tablebase'] and self.tablebase is None:
+                self.tablebase = open_tablebase(self.options['tablebase'])
+            book = self.book if self.options['usebook'] else None
+            if self.options['engine'] == 'mcts':
+                # hashsize 同时作为 MCTS 搜索树的内存上限
+                bot = MCTSBot(self.board, side, self.options['iterations'], workers=self.options['threads'], book=book,
+                              max_memory_mb=self.options['hashsize'], evaluator=self.options['evaluator'] or None,
+                              batch_size=self.options['batchsize'])
+            else:
+                bot = AlphaBetaBot(self.board, side, self.options['depth'], tt_size_mb=self.options['hashsize'],
+                                   workers=self.options['threads'], book=book, tablebase=self.tablebase,
+                                   quiescence=self.options['quiescence'], pvs=self.options['pvs'],
+                                   null_move=self.options['nullmove'], lmr=self.options['lmr'],
+                                   on_iteration=self.report_iteration)
+            self.bots[side] = bot
+        bot.chessboard = self.board
+        return bot
+
+    def go(self, params: dict):
+        """开始后台搜索。ponder 或 infinite 时一直搜索到 stop（ponder 时也可以是 ponderhit 后用完时间）。"""
+        if not self.board.generate_moves(self.side):
+            self.send('nobestmove')
+            return
+        try:
+            bot = self.get_bot(self.side)
+        except (ImportError, OSError, ValueError) as error:
+            # 例如设置了 evaluator 但没有安装 NumPy，或者估值器文件不存在
+            self.send(f'info string cannot create engine: {error}')
+            self.send('nobestmove')
+            return
+        bot.stopped = False
+        bot.deadline = None
+        time_limit_ms = allocate_time(params, self.options['usemillisec'])
+        if params.get('ponder') or params.get('infinite'):
+            time_limit_ms = None
+            if isinstance(bot, MCTSBot):
+                search_args = {'iterations': MAX_ITERATIONS}
+            else:
+                search_args = {'max_depth': MAX_SEARCH_DEPTH}
+        elif isinstance(bot, MCTSBot):
+            search_args = {'iterations': int(params['nodes']) if 'nodes' in params else None}
+        else:
+            search_args = {'max_depth': int(params['depth']) if 'depth' in params else None}
+            if time_limit_ms is None and search_args['max_depth'] is None:
+                search_args['max_depth'] = self.options['depth']
+        if params.get('ponder'):
+            self.ponder_released.clear()
+        else:
+            self.ponder_released.set()
+        self.search_bot = bot
+        self.search_params = params
+        self.search_thread = threading.Thread(target=self.search, args=(bot, self.board, self.side, time_limit_ms, search_args),
+                                              daemon=True)
+        self.search_thread.start()
+
+    def search(self, bot, board: ChessBoard, side: str, time_limit_ms: float, search_args: dict):
+        """后台线程：搜索并输出 bestmove。"""
+        try:
+            move = bot.find_best_move(time_limit_ms, **search_args)
+        except Exception as error:
+            self.send(f'info string search failed: {error}')
+            move = None
+        self.ponder_released.wait()
+        if move is None:
+            self.send('nobestmove')
+            return
+        line = f'bestmove {move_to_string(move)}'
+        if isinstance(bot, AlphaBetaBot):
+            pv = principal_variation(bot, board, side, move, 2)
+            if len(pv) > 1:
+                line += f' ponder {move_to_string(pv[1])}'
+        self.send(line)
+
+    def report_iteration(self, stats):
+        """AlphaBetaBot 每完成一轮迭代加深时输出 info。"""
+        score = stats.best_score
+        if score == float('inf'):
+            score = MATE_SCORE
+        elif score == float('-inf'):
+            score = -MATE_SCORE
+        move = ChessBoard.encode_move(stats.best_move)
+        pv = principal_variation(self.search_bot, self.board, self.side, move, stats.depth_reached)
+        self.send(f'info depth {stats.depth_reached} score {int(score)} time {int(stats.elapsed * 1000)} '
+                  f'nodes {stats.nodes} pv {" ".join(move_to_string(m) for m in pv)}')
+
+    def ponder_hit(self):
+        """对方走了后台思考所猜测的着法：从现在开始按 go 命令给出的时间限时，并允许输出 bestmove。"""
+        if self.search_thread is None or self.ponder_released.is_set():
+            return
+        time_limit_ms = allocate_time(self.search_params, self.options['usemillisec'])
+        if time_limit_ms is not None:
+            self.search_bot.deadline = time.perf_counter() + time_limit_ms / 1000
+        self.ponder_released.set()
+
+    def stop_search(self):
+        """结束正在进行的搜索并等待后台线程输出 bestmove。"""
+        if self.search_thread is None:
+            return
+        if self.search_thread.is_alive():
+            self.search_bot.stop()
+        self.ponder_released.set()
+        self.search_thread.join()
+        self.search_thread = None
+        self.search_bot = None
+
+    def close(self):
+        """释放机器人、开局库和残局库。"""
+        for bot in self.bots.values():
+            bot.close()
+        self.bots = {}
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        self.tablebase = None
+
+
+def main():
+    UCCIEngine().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+
+# 模块都放在仓库根目录，测试从根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChessBoard import ChessBoard  # noqa: E402
+
+# 各测试共用的辅助函数，测试文件中用 "from conftest import ..." 导入
+
+# 走棋方的将帅还在但无子可动的局面：士和兵互相挡住，将帅也无路可走
+RED_BLOCKED = '4k4/9/9/9/9/9/9/2AAAK3/3PPP3/9 w'
+BLACK_BLOCKED = '9/3ppp3/2aaak3/9/9/9/9/9/9/4K4 b'
+
+
+def initial_board() -> ChessBoard:
+    """标准初始局面的棋盘，红方先走。"""
+    board = ChessBoard()
+    board.set_initial_pieces()
+    return board
+
+
+def start_position(start_fen: str = None) -> tuple:
+    """返回 (棋盘, 走棋方)：start_fen 为 None 时为标准初始局面。"""
+    if start_fen is not None:
+        return ChessBoard.from_fen(start_fen)
+    return initial_board(), 'red'
+
+
+def random_walk(seed: int, games: int = 1, plies: int = 100, start_fen: str = None):
+    """随机对局 games 盘，依次生成途经的 (棋盘, 走棋方, 接下来走的移动)。
+
+    每盘从 start_fen（默认为初始局面）开始，最多走 plies 步；走棋方没有可行的移动（包括将帅被吃）时这一盘结束，
+    最后生成的移动为 None。棋盘在各步之间复用，生成之后才执行移动，需要保留时请复制。
+    """
+    rng = random.Random(seed)
+    for _ in range(games):
+        board, side = start_position(start_fen)
+        for _ in range(plies):
+            moves = board.generate_moves(side)
+            move = rng.choice(moves) if moves else None
+            yield board, side, move
+            if move is None:
+                break
+            board.make_move(move)
+            side = 'black' if side == 'red' else 'red'
+
+
+def random_positions(seed: int, games: int = 1, plies: int = 100, start_fen: str = None) -> list:
+    """random_walk 途经的局面，返回 (棋盘的副本, 走棋方) 的列表。"""
+    return [(board.copy(), side) for board, side, _ in random_walk(seed, games, plies, start_fen)]
+
+
+def random_game(seed: int, plies: int = 100, start_fen: str = None) -> tuple:
+    """随机走一盘，返回 (按顺序的移动, 最终局面的棋盘)。"""
+    board, _ = start_position(start_fen)
+    moves = []
+    for board, _, move in random_walk(seed, 1, plies, start_fen):
+        if move is not None:
+            moves.append(move)
+    return moves, board
@@ -0,0 +1,169 @@
+import time
+from AlphaBetaBot import AlphaBetaBot
+from Benchmark import PERFT_SUITE
+from ChessBoard import ChessBoard
+from TranspositionTable import EXACT
+from conftest import random_positions
+
+
+def test_parallel_search_matches_exact_depth_serial_search():
+    positions = random_positions(0, plies=12)[::4] + [ChessBoard.from_fen(fen) for _, fen, _ in PERFT_SUITE]
+    for board, side in positions:
+        serial = AlphaBetaBot(board.copy(), side, 3, tt_exact_depth=True)
+        parallel = AlphaBetaBot(board.copy(), side, 3, workers=2)
+        try:
+            assert parallel.find_best_move() == serial.find_best_move()
+        finally:
+            parallel.close()
+
+
+def test_serial_search_uses_deeper_tt_entries():
+    board, side = random_positions(0, plies=1)[0]
+    inf = float('inf')
+    serial = AlphaBetaBot(board.copy(), side, 3)
+    serial.tt.store(board.hash_key(side), 5, 12345, EXACT, 0)
+    assert serial.negamax(board.copy(), 2, -inf, inf, side) == 12345
+
+    exact = AlphaBetaBot(board.copy(), side, 3, tt_exact_depth=True)
+    exact.tt.store(board.hash_key(side), 5, 12345, EXACT, 0)
+    assert exact.negamax(board.copy(), 2, -inf, inf, side) != 12345
+
+
+def board_state(board) -> tuple:
+    return bytes(board.squares), board.winner, board.zobrist, board.red_score, board.black_score
+
+
+def test_time_limited_search_returns_legal_move_within_budget():
+    board, side = ChessBoard.from_fen(PERFT_SUITE[1][1])
+    bot = AlphaBetaBot(board, side, 4)
+    start = time.perf_counter()
+    move = bot.find_best_move(time_limit_ms=100)
+    elapsed = time.perf_counter() - start
+    assert move in board.generate_moves(side)
+    # 第一轮总是完整搜索，再加上每 CHECK_TIME_INTERVAL 个节点才检查一次时间，留出余量
+    assert elapsed < 0.1 + 1
+    assert bot.deadline is None
+
+
+def test_board_unchanged_after_timeout():
+    board, side = ChessBoard.from_fen(PERFT_SUITE[1][1])
+    before = board_state(board)
+    bot = AlphaBetaBot(board, side, 4)
+    bot.find_best_move(time_limit_ms=20, max_depth=30)
+    assert board_state(board) == before
+    # make_move 超时后只在棋盘上执行选出的那一步
+    expected = board.copy()
+    expected.make_move(ChessBoard.encode_move(bot.make_move(time_limit_ms=20)))
+    assert board_state(board) == board_state(expected)
+
+
+def test_stats_match_search():
+    board, side = ChessBoard.from_fen(PERFT_SUITE[2][1])
+    depths = []
+    bot = AlphaBetaBot(board.copy(), side, 3, on_iteration=lambda stats: depths.append(stats.depth_reached))
+    move = bot.find_best_move()
+    stats = bot.last_stats.as_dict()
+    assert stats['nodes'] == bot.nodes
+    assert sum(stats['iteration_nodes']) == bot.nodes
+    # 每完成一轮迭代加深回调一次
+    assert depths == [1, 2, 3] and stats['depth_reached'] == 3
+    assert ChessBoard.encode_move(stats['best_move']) == move
+    # 收集统计不影响搜索结果
+    assert AlphaBetaBot(board.copy(), side, 3).find_best_move() == move
+
+
+def quiescence(fen: str, alpha=float('-inf'), beta=float('inf')) -> tuple:
+    """返回 (静态搜索分值, 静态估值, 搜索的节点数)。"""
+    board, side = ChessBoard.from_fen(fen)
+    bot = AlphaBetaBot(board, side, 1)
+    return bot.quiescence_search(board.copy(), alpha, beta, side), bot.evaluate_board(board, side), bot.nodes
+
+
+def after(fen: str, *moves) -> tuple:
+    board, side = ChessBoard.from_fen(fen)
+    for move in moves:
+        board.make_move(ChessBoard.encode_move(move))
+    return board, side
+
+
+def test_quiescence_stand_pat_cutoff():
+    # 红车可以白吃 a4 的黑车，但静态估值已经不低于 beta，不再搜索吃子
+    fen = '3k5/9/9/9/9/r8/9/9/9/R3K4 w'
+    score, stand_pat, nodes = quiescence(fen, beta=-10)
+    assert score == stand_pat >= -10 and nodes == 0
+    score, stand_pat, _ = quiescence(fen)
+    board, side = after(fen, ((0, 0), (4, 0)))
+    assert score == AlphaBetaBot(board, side, 1).evaluate_board(board, side) > stand_pat
+
+
+def test_quiescence_sees_recapture():
+    # 红车吃 a4 的卒会被 a9 的黑车吃回，静态搜索看到吃回后放弃这个吃子
+    fen = 'r2k5/9/9/9/9/p8/9/9/9/R3K4 w'
+    score, stand_pat, nodes = quiescence(fen)
+    assert score == stand_pat and nodes > 1
+    board, side = after(fen, ((0, 0), (4, 0)))
+    bot = AlphaBetaBot(board, 'black', 1)
+    recaptured, _ = after(fen, ((0, 0), (4, 0)), ((9, 0), (4, 0)))
+    inf = float('inf')
+    assert -bot.quiescence_search(board, -inf, inf, 'black') == bot.evaluate_board(recaptured, 'red') < stand_pat
+
+
+def test_quiescence_does_not_stand_pat_in_check():
+    # 帅被黑车将军，三个车封住了所有去路，不能按静态估值停住
+    assert quiescence('5k3/9/9/9/3rrr3/9/9/9/9/4K4 w')[0] == float('-inf')
+    # 只有一个车将军时可以躲开
+    assert quiescence('5k3/9/9/9/4r4/9/9/9/9/4K4 w')[0] != float('-inf')
+
+
+def minimax(bot: AlphaBetaBot, board: ChessBoard, depth: int, side: str):
+    """不剪枝的负极大值搜索，作为对照。"""
+    if depth == 0 or board.winner is not None:
+        return bot.evaluate_board(board, side)
+    other = 'black' if side == 'red' else 'red'
+    best = float('-inf')
+    for move in board.generate_moves(side):
+        undo_token = board.make_move(move)
+        best = max(best, -minimax(bot, board, depth - 1, other))
+        board.unmake_move(undo_token)
+    return best
+
+
+def search(board: ChessBoard, side: str, depth: int, **options) -> tuple:
+    """返回 (最佳分值, 最佳着法)。"""
+    bot = AlphaBetaBot(board.copy(), side, depth, collect_stats=True, **options)
+    move = bot.find_best_move()
+    return bot.last_stats.best_score, move
+
+
+def test_negamax_matches_minimax():
+    for name, fen, _ in PERFT_SUITE:
+        board, side = ChessBoard.from_fen(fen)
+        reference = AlphaBetaBot(board, side, 3)
+        other = 'black' if side == 'red' else 'red'
+        scores = {}
+        for move in board.generate_moves(side):
+            undo_token = board.make_move(move)
+            scores[move] = -minimax(reference, board, 2, other)
+            board.unmake_move(undo_token)
+        score, move = search(board, side, 3, tt_exact_depth=True)
+        # 分值相同的着法之间的选择取决于着法排序，只要求选中的是最佳着法之一
+        assert score == scores[move] == max(scores.values()), name
+
+
+def test_pvs_matches_alpha_beta_score():
+    for name, fen, _ in PERFT_SUITE:
+        board, side = ChessBoard.from_fen(fen)
+        assert search(board, side, 3, tt_exact_depth=True, pvs=True)[0] == \
+            search(board, side, 3, tt_exact_depth=True)[0], name
+
+
+def test_selective_search_finds_tactic():
+    # a5 的黑车没有保护，红车直接吃掉
+    board, side = ChessBoard.from_fen('2bk1a3/4a4/1c5n1/9/r8/6p2/9/4B2C1/9/R1BAKA3 w')
+    capture = ChessBoard.encode_move(((0, 0), (5, 0)))
+    assert search(board, side, 4)[1] == capture
+    for options in ({'null_move': True}, {'lmr': True}, {'pvs': True, 'null_move': True, 'lmr': True}):
+        bot = AlphaBetaBot(board.copy(), side, 4, collect_stats=True, **options)
+        assert bot.find_best_move() == capture, options
+        stats = bot.last_stats
+        assert stats.null_move_tries > 0 or stats.lmr_reductions > 0
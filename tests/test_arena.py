@@ -0,0 +1,52 @@
+from ChessBoard import ChessBoard
+from AlphaBetaBot import AlphaBetaBot
+from MCTSBot import MCTSBot
+from OpeningBook import BookBuilder
+from Arena import play_game, parse_bot_spec, _search_nodes
+from conftest import initial_board
+
+
+def write_book(path) -> str:
+    builder = BookBuilder()
+    builder.add_game(['h2e2', 'h9g7'], 'red')
+    builder.write(str(path))
+    return str(path)
+
+
+def test_side_without_moves_loses(monkeypatch):
+    generate_moves = ChessBoard.generate_moves
+    monkeypatch.setattr(ChessBoard, 'generate_moves',
+                        lambda self, side: generate_moves(self, side) if side == 'red' else [])
+    result = play_game(parse_bot_spec('random'), parse_bot_spec('random'), seed=0)
+    assert result['reason'] == 'no_moves'
+    assert result['winner'] == 'red'
+    assert result['plies'] == 1
+
+
+def test_alphabeta_nodes_reset_on_book_move(tmp_path):
+    book = write_book(tmp_path / 'book.bin')
+    board = initial_board()
+    bot = AlphaBetaBot(board, 'red', 2, book=book)
+    board.make_move(board.generate_moves('red')[0])
+    bot.side = 'black'
+    bot.find_best_move()
+    assert _search_nodes(bot) > 0
+
+    bot.chessboard = initial_board()
+    bot.side = 'red'
+    bot.find_best_move()
+    assert _search_nodes(bot) == 0
+
+
+def test_mcts_reports_iterations_run(tmp_path):
+    board = initial_board()
+    bot = MCTSBot(board, 'red', iteration_limit=1000)
+    bot.find_best_move(iterations=40)
+    assert _search_nodes(bot) == 40
+    # 复用的树中已有的访问次数不计入本次的迭代
+    bot.find_best_move(iterations=25)
+    assert _search_nodes(bot) == 25
+
+    book_bot = MCTSBot(initial_board(), 'red', book=write_book(tmp_path / 'book.bin'))
+    book_bot.find_best_move()
+    assert _search_nodes(book_bot) == 0
@@ -0,0 +1,32 @@
+import pytest
+from conftest import random_positions
+
+np = pytest.importorskip('numpy')
+from BatchMoveGen import encode_boards, decode_board, generate_moves_batch, apply_moves, _index  # noqa: E402
+
+
+def test_batch_moves_match_generate_moves():
+    positions = random_positions(1, games=8, plies=80)
+    boards = encode_boards([board for board, _ in positions])
+    sides = np.array([1 if side == 'red' else -1 for _, side in positions], dtype=np.int8)
+    board_index, from_square, to_square = generate_moves_batch(boards, sides)
+    batch = [set() for _ in positions]
+    for i, src, dest in zip(board_index.tolist(), from_square.tolist(), to_square.tolist()):
+        batch[i].add((src, dest))
+    for (board, side), moves in zip(positions, batch):
+        expected = {(_index(move >> 8), _index(move & 0xFF)) for move in board.generate_moves(side)}
+        assert moves == expected
+
+
+def test_encode_decode_and_apply_moves():
+    positions = random_positions(2, games=2, plies=40)
+    boards = encode_boards([board for board, _ in positions])
+    for (board, _), encoded in zip(positions, boards):
+        assert np.array_equal(encode_boards([decode_board(encoded)])[0], encoded)
+
+    board, side = positions[5]
+    move = board.generate_moves(side)[0]
+    single = encode_boards([board])
+    apply_moves(single, np.array([0]), np.array([_index(move >> 8)]), np.array([_index(move & 0xFF)]))
+    board.make_move(move)
+    assert np.array_equal(single, encode_boards([board]))
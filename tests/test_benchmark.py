@@ -0,0 +1,13 @@
+import pytest
+from Benchmark import PERFT_SUITE, perft
+from ChessBoard import ChessBoard
+
+
+@pytest.mark.parametrize('name, fen, expected', PERFT_SUITE, ids=[name for name, _, _ in PERFT_SUITE])
+def test_perft_suite(name, fen, expected):
+    board, side = ChessBoard.from_fen(fen)
+    before = bytes(board.squares)
+    # 只算到第 3 层，保持测试足够快；更深的层由 Benchmark 检查
+    for depth, count in enumerate(expected[:3], 1):
+        assert perft(board, side, depth) == count
+    assert bytes(board.squares) == before
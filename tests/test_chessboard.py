@@ -0,0 +1,100 @@
+from ChessBoard import ChessBoard, PIECE_VALUES, PIECE_SQUARE_TABLES
+from conftest import random_walk, random_game
+
+
+def brute_force_legal_moves(board: ChessBoard, side: str) -> list:
+    """逐个走出伪合法移动，保留走完后己方没有被将军（或者直接吃掉对方将帅）的移动。"""
+    legal = []
+    for move in board.generate_moves(side):
+        undo_token = board.make_move(move)
+        if board.winner == side or not board.is_in_check(side):
+            legal.append(move)
+        board.unmake_move(undo_token)
+    return legal
+
+
+def test_captures_match_capture_subset_of_moves():
+    for board, side, _ in random_walk(9, games=6, plies=120):
+        for mover in ('red', 'black'):
+            squares = board.squares
+            expected = [move for move in board.generate_moves(mover) if squares[move & 0xFF]]
+            assert board.generate_captures(mover) == expected
+
+
+def test_strictly_legal_moves_match_brute_force():
+    for board, side, _ in random_walk(4, games=6, plies=120):
+        assert sorted(board.generate_strictly_legal_moves(side)) == sorted(brute_force_legal_moves(board, side))
+
+
+def test_side_without_king_has_no_legal_moves():
+    board, side = ChessBoard.from_fen('4k4/9/9/9/9/R8/9/9/9/9 w')
+    assert board.winner is None
+    assert board.is_in_check('red')
+    assert board.generate_moves('red')
+    assert board.generate_strictly_legal_moves('red') == []
+    assert board.generate_strictly_legal_moves('black')
+
+
+def board_state(board: ChessBoard) -> tuple:
+    return bytes(board.squares), board.winner, board.zobrist, board.red_score, board.black_score
+
+
+def test_unmake_move_restores_the_position():
+    for board, side, move in random_walk(11, games=4, plies=150):
+        if move is None:
+            continue
+        for reply in board.generate_moves(side)[:8] + [move]:
+            before = board_state(board)
+            undo_token = board.make_move(reply)
+            # 再走一步对方的移动，按后进先出的顺序撤销
+            after = board_state(board)
+            for answer in board.generate_moves('black' if side == 'red' else 'red')[-2:]:
+                answer_token = board.make_move(answer)
+                board.unmake_move(answer_token)
+                assert board_state(board) == after
+            board.unmake_move(undo_token)
+            assert board_state(board) == before
+
+
+def rebuilt(board: ChessBoard) -> ChessBoard:
+    """用 place_pieces 从头摆出同一局面，得到重新计算的 Zobrist 键值和分值。"""
+    fresh = ChessBoard()
+    fresh.eval_table = board.eval_table
+    fresh.place_pieces([piece for row in board.board for piece in row if piece is not None])
+    return fresh
+
+
+def test_zobrist_matches_recomputation():
+    keys = set()
+    for board, side, move in random_walk(12, games=4, plies=150):
+        assert board.zobrist == rebuilt(board).zobrist
+        assert board.hash_key('red') != board.hash_key('black')
+        keys.add(board.hash_key(side))
+    assert len(keys) > 300
+    # 坐标接口 move_piece 同样增量更新键值
+    board, _ = ChessBoard.from_fen('rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w')
+    for src, dest in (('h2', 'e2'), ('h9', 'g7'), ('e2', 'e6')):
+        assert board.move_piece(src, dest)
+        assert board.zobrist == rebuilt(board).zobrist
+
+
+def test_scores_match_recomputation():
+    for board, _, _ in random_walk(13, games=4, plies=150):
+        fresh = rebuilt(board)
+        assert (board.red_score, board.black_score) == (fresh.red_score, fresh.black_score)
+        assert board.evaluate('red') == -board.evaluate('black') == board.red_score - board.black_score
+
+
+def test_scores_match_recomputation_after_set_evaluation():
+    values = tuple(2 * value for value in PIECE_VALUES)
+    tables = tuple(tuple(reversed(table)) for table in PIECE_SQUARE_TABLES)
+    for seed, fen in enumerate(('rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w',
+                                '2bak4/4a4/4b1n2/p3C3p/2p3p2/9/P1c3P1P/4B1N2/4A4/2BAK4 w')):
+        board, _ = ChessBoard.from_fen(fen)
+        board.set_evaluation(values, tables)
+        assert board.red_score != ChessBoard.from_fen(fen)[0].red_score
+        moves, _ = random_game(seed, 100, start_fen=fen)
+        for move in moves:
+            fresh = rebuilt(board)
+            assert (board.red_score, board.black_score) == (fresh.red_score, fresh.black_score)
+            board.make_move(move)
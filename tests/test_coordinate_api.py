@@ -0,0 +1,161 @@
+from ChessBoard import ChessBoard
+from conftest import random_walk
+
+# 最初基于二维列表的走法生成（只读取 board 视图），作为坐标接口的对照实现。各棋子的方向顺序与原实现相同，
+# 因此不仅比较走法集合，也比较顺序
+ROOK_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+CANNON_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+KNIGHT_VECTORS = ((-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2))
+KNIGHT_LEGS = ((-1, 0), (-1, 0), (1, 0), (1, 0), (0, -1), (0, 1), (0, -1), (0, 1))
+ELEPHANT_DIRECTIONS = ((2, 2), (2, -2), (-2, 2), (-2, -2))
+GUARD_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+KING_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+PALACE_ROWS = {'red': (0, 2), 'black': (7, 9)}
+
+
+def on_board(row: int, col: int) -> bool:
+    return 0 <= row < 10 and 0 <= col < 9
+
+
+def reference_moves(grid: list, row: int, col: int) -> list:
+    piece = grid[row][col]
+    side = piece.side
+
+    def open_to(r, c):
+        return grid[r][c] is None or grid[r][c].side != side
+
+    moves = []
+    if piece.name == '车':
+        for dr, dc in ROOK_DIRECTIONS:
+            r, c = row + dr, col + dc
+            while on_board(r, c):
+                if grid[r][c] is not None:
+                    if grid[r][c].side != side:
+                        moves.append((r, c))
+                    break
+                moves.append((r, c))
+                r, c = r + dr, c + dc
+    elif piece.name == '马':
+        for (dr, dc), (lr, lc) in zip(KNIGHT_VECTORS, KNIGHT_LEGS):
+            r, c = row + dr, col + dc
+            if on_board(r, c) and grid[row + lr][col + lc] is None and open_to(r, c):
+                moves.append((r, c))
+    elif piece.name in ('象', '相'):
+        for dr, dc in ELEPHANT_DIRECTIONS:
+            r, c = row + dr, col + dc
+            own_half = r <= 4 if side == 'red' else r >= 5
+            if on_board(r, c) and grid[row + dr // 2][col + dc // 2] is None and own_half and open_to(r, c):
+                moves.append((r, c))
+    elif piece.name in ('士', '仕'):
+        low, high = PALACE_ROWS[side]
+        for dr, dc in GUARD_DIRECTIONS:
+            r, c = row + dr, col + dc
+            if low <= r <= high and 3 <= c <= 5 and open_to(r, c):
+                moves.append((r, c))
+    elif piece.name in ('将', '帅'):
+        low, high = PALACE_ROWS[side]
+        for dr, dc in KING_DIRECTIONS:
+            r, c = row + dr, col + dc
+            if low <= r <= high and 3 <= c <= 5 and open_to(r, c):
+                moves.append((r, c))
+        # 将帅对面按吃子处理
+        step = 1 if side == 'red' else -1
+        r = row + step
+        while 0 <= r < 10:
+            if grid[r][col] is not None:
+                if grid[r][col].name in ('将', '帅') and grid[r][col].side != side:
+                    moves.append((r, col))
+                break
+            r += step
+    elif piece.name == '炮':
+        for dr, dc in CANNON_DIRECTIONS:
+            screen = False
+            r, c = row + dr, col + dc
+            while on_board(r, c):
+                if grid[r][c] is None:
+                    if not screen:
+                        moves.append((r, c))
+                elif not screen:
+                    screen = True
+                else:
+                    if grid[r][c].side != side:
+                        moves.append((r, c))
+                    break
+                r, c = r + dr, c + dc
+    else:
+        step = 1 if side == 'red' else -1
+        if 0 <= row + step < 10 and open_to(row + step, col):
+            moves.append((row + step, col))
+        if row > 4 if side == 'red' else row < 5:
+            for c in (col - 1, col + 1):
+                if 0 <= c < 9 and open_to(row, c):
+                    moves.append((row, c))
+    return moves
+
+
+def reference_legal_moves(board: ChessBoard, side: str) -> list:
+    if board.winner is not None:
+        return []
+    grid = board.board
+    return [((row, col), dest) for row in range(10) for col in range(9)
+            if grid[row][col] is not None and grid[row][col].side == side
+            for dest in reference_moves(grid, row, col)]
+
+
+def check_position(board: ChessBoard, side: str):
+    expected = reference_legal_moves(board, side)
+    assert board.get_legal_moves(side) == expected
+    assert [ChessBoard.decode_move(move) for move in board.generate_moves(side)] == expected
+    for row, col in board.get_pieces_positions(side):
+        position = ChessBoard.coords_to_alphanumeric([(row, col)])[0]
+        destinations = [dest for src, dest in expected if src == (row, col)]
+        assert board.get_possible_moves(position) == destinations
+        assert board.get_possible_moves_with_coords((row, col)) == destinations
+
+
+def test_coordinate_api_matches_reference_along_random_games():
+    for board, side, _ in random_walk(21, games=6, plies=150):
+        check_position(board, side)
+        check_position(board, 'black' if side == 'red' else 'red')
+
+
+def test_flying_general():
+    board, _ = ChessBoard.from_fen('4k4/9/9/9/9/9/9/9/9/4K4 w')
+    check_position(board, 'red')
+    check_position(board, 'black')
+    assert ((0, 4), (9, 4)) in board.get_legal_moves('red')
+    assert ((9, 4), (0, 4)) in board.get_legal_moves('black')
+    board, _ = ChessBoard.from_fen('4k4/9/9/9/4p4/9/9/9/9/4K4 w')
+    check_position(board, 'red')
+    assert ((0, 4), (9, 4)) not in board.get_legal_moves('red')
+
+
+def test_blocked_knight_leg_and_elephant_eye():
+    # b1 的兵挡住 b0 马向上的马脚，c0 的相挡住它向右的马脚；b1、d1 的兵塞住 c0 相的两个象眼
+    board, _ = ChessBoard.from_fen('3k5/9/9/9/9/9/9/9/1P1P5/1NB1K4 w')
+    check_position(board, 'red')
+    assert board.get_possible_moves('b0') == []
+    assert board.get_possible_moves('c0') == []
+    # 拿掉两个兵后，马只有向右的马脚仍被相挡住
+    board, _ = ChessBoard.from_fen('3k5/9/9/9/9/9/9/9/9/1NB1K4 w')
+    check_position(board, 'red')
+    assert sorted(board.get_possible_moves('b0')) == [(2, 0), (2, 2)]
+    assert sorted(board.get_possible_moves('c0')) == [(2, 0), (2, 4)]
+
+
+def test_board_view_reflects_squares():
+    for board, side, move in random_walk(22, games=2, plies=100):
+        grid = board.board
+        assert len(grid) == 10 and all(len(row) == 9 for row in grid)
+        positions = [(row, col) for row in range(10) for col in range(9)
+                     if grid[row][col] is not None and grid[row][col].side == side]
+        assert positions == board.get_pieces_positions(side)
+        rebuilt = ChessBoard()
+        rebuilt.place_pieces([piece for row in grid for piece in row if piece is not None])
+        assert bytes(rebuilt.squares) == bytes(board.squares)
+    # 视图是快照，修改它不影响棋盘
+    board, _ = ChessBoard.from_fen('4k4/9/9/9/9/9/9/9/9/4K4 w')
+    board.board[0][4] = None
+    assert board.board[0][4].name == '帅'
+    assert board.move_piece('e0', 'e1')
+    assert board.board[0][4] is None and board.board[1][4].name == '帅'
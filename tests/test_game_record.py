@@ -0,0 +1,106 @@
+import os
+import pytest
+from GameRecord import GameWriter, GameReader, replay, INDEX_SUFFIX, GAME_HEADER
+from Arena import run_arena
+from conftest import random_game
+
+ROOK_ENDING = '4k4/9/9/9/9/R8/9/9/9/3K5 w'
+
+
+def write_games(path: str, count: int) -> list:
+    games = [random_game(seed, 20 + seed)[0] for seed in range(count)]
+    with GameWriter(path) as writer:
+        for i, moves in enumerate(games):
+            writer.write_game(moves, ('red', 'black', 'draw', None)[i % 4], f'red{i}', f'black{i}')
+    return games
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'games.xqg')
+    games = write_games(path, 6)
+    end_moves, _ = random_game(99, 10, ROOK_ENDING)
+    with GameWriter(path) as writer:
+        assert writer.games == 6
+        writer.write_game(end_moves, 'red', '车', '将', start_fen=ROOK_ENDING)
+    with GameReader(path) as reader:
+        assert len(reader) == 7
+        for i, record in enumerate(reader.iter_games(0, 6)):
+            assert list(record.moves) == games[i]
+            assert record.winner == ('red', 'black', 'draw', None)[i % 4]
+            assert (record.red, record.black, record.start_fen) == (f'red{i}', f'black{i}', None)
+        last = reader[-1]
+        assert list(last.moves) == end_moves
+        assert (last.red, last.black, last.start_fen) == ('车', '将', ROOK_ENDING)
+        assert [list(record.moves) for record in reader.iter_games(2, 4)] == games[2:4]
+
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    path = str(tmp_path / 'games.xqg')
+    games = write_games(path, 3)
+    size = os.path.getsize(path)
+    # 模拟写入第 4 局时进程被终止：局头完整，移动只写了一部分
+    with open(path, 'ab') as f:
+        f.write(GAME_HEADER.pack(50, 1, 0, 0, 0) + b'\x01\x02\x03')
+    with GameReader(path) as reader:
+        assert len(reader) == 3
+        assert list(reader[-1].moves) == games[-1]
+    with GameWriter(path) as writer:
+        assert writer.games == 3
+        assert os.path.getsize(path) == size
+        writer.write_game(games[0], 'draw')
+    with GameReader(path) as reader:
+        assert len(reader) == 4
+        assert list(reader[3].moves) == games[0]
+
+
+def test_index_rebuilt_when_missing_or_stale(tmp_path):
+    path = str(tmp_path / 'games.xqg')
+    games = write_games(path, 4)
+    os.remove(path + INDEX_SUFFIX)
+    with GameReader(path) as reader:
+        assert [list(record.moves) for record in reader] == games
+    with GameWriter(path) as writer:
+        writer.write_game(games[1])
+    with open(path + INDEX_SUFFIX, 'r+b') as f:
+        f.truncate(os.path.getsize(path + INDEX_SUFFIX) - 8)  # 索引比记录文件少一局
+    with GameReader(path) as reader:
+        assert len(reader) == 5
+        assert list(reader[4].moves) == games[1]
+
+
+def test_invalid_file_rejected(tmp_path):
+    path = tmp_path / 'bogus.xqg'
+    path.write_bytes(b'not a game record')
+    with pytest.raises(ValueError):
+        GameReader(str(path))
+    with pytest.raises(ValueError):
+        GameWriter(str(path))
+
+
+def test_replay_reproduces_the_game(tmp_path):
+    path = str(tmp_path / 'games.xqg')
+    moves, final_board = random_game(7, 60)
+    end_moves, end_board = random_game(8, 12, ROOK_ENDING)
+    with GameWriter(path) as writer:
+        writer.write_game(moves)
+        writer.write_game(end_moves, start_fen=ROOK_ENDING)
+    with GameReader(path) as reader:
+        for record, expected in zip(reader, (final_board, end_board)):
+            board = None
+            for board, side, move in replay(record):
+                assert move in board.generate_moves(side)
+            # 生成器结束时最后一步已经执行
+            assert bytes(board.squares) == bytes(expected.squares)
+
+
+def test_arena_records_games(tmp_path):
+    path = str(tmp_path / 'arena.xqg')
+    summary = run_arena('random', 'random', 3, max_plies=30, seed=1, record=path)
+    with GameReader(path) as reader:
+        assert len(reader) == 3
+        records = list(reader)
+    assert sum(len(record.moves) for record in records) == summary['avg_plies'] * 3
+    assert [record.red for record in records] == ['random'] * 3
+    for record in records:
+        for board, side, move in replay(record):
+            assert move in board.generate_moves(side)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pytest
+from ChessBoard import ChessBoard
+from GameServer import GameServer, Game, percentile
+from Arena import parse_bot_spec
+from conftest import initial_board
+
+
+def run_with_server(coroutine_function, **options):
+    async def main():
+        server = GameServer(default_bot='random', **options)
+        listener = await server.start('127.0.0.1', 0)
+        try:
+            return await coroutine_function(server, listener)
+        finally:
+            listener.close()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_human_move_gets_bot_reply():
+    async def play(server, listener):
+        new = await server.handle_command(['new'])
+        reply = await server.handle_command(['move', str(new['game']), 'h2', 'e2'])
+        return new, reply, server.stats()
+    new, reply, stats = run_with_server(play)
+    assert new['ok'] and new['human'] == 'red' and 'bot_move' not in new
+    assert reply['ok'] and 'bot_move' in reply
+    assert reply['plies'] == 2 and reply['side'] == 'red'
+    assert stats['games'] == 1 and stats['bot_moves'] == 1
+
+
+def test_bot_moves_first_when_human_is_black():
+    async def play(server, listener):
+        return await server.handle_command(['new', 'random', 'black'])
+    reply = run_with_server(play)
+    assert reply['ok'] and 'bot_move' in reply
+    assert reply['plies'] == 1 and reply['side'] == 'black'
+
+
+def test_invalid_commands_are_rejected():
+    async def play(server, listener):
+        game = str((await server.handle_command(['new']))['game'])
+        errors = []
+        for tokens in (['move', game, 'a0', 'a5'], ['move', game, 'h7', 'e7'], ['move', '99', 'h2', 'e2'],
+                       ['go', game], ['bogus']):
+            with pytest.raises(ValueError) as error:
+                await server.handle_command(tokens)
+            errors.append(str(error.value))
+        shown = await server.handle_command(['show', game])
+        closed = await server.handle_command(['close', game])
+        return errors, shown, closed, server.stats()
+    errors, shown, closed, stats = run_with_server(play)
+    assert len(errors) == 5
+    assert shown['plies'] == 0 and shown['fen'] == initial_board().to_fen('red')
+    assert closed['ok'] and stats['games'] == 0
+
+
+def test_timeout_keeps_position_and_go_retries():
+    async def play(server, listener):
+        game = str((await server.handle_command(['new']))['game'])
+        server.timeout = 0
+        timed_out = await server.handle_command(['move', game, 'h2', 'e2'])
+        server.timeout = 30
+        retried = await server.handle_command(['go', game])
+        return timed_out, retried, server.stats()
+    timed_out, retried, stats = run_with_server(play)
+    assert not timed_out['ok'] and timed_out['error'] == 'timeout'
+    assert timed_out['plies'] == 1 and timed_out['side'] == 'black'
+    assert retried['ok'] and retried['plies'] == 2
+    assert stats['timeouts'] == 1 and stats['bot_moves'] == 1
+
+
+def test_connection_protocol():
+    async def play(server, listener):
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        replies = []
+        for line in (b'new\n', b'\n', b'show 1\n', b'nonsense\n'):
+            writer.write(line)
+        await writer.drain()
+        for _ in range(3):
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        return replies
+    replies = run_with_server(play)
+    assert [reply['ok'] for reply in replies] == [True, True, False]
+    assert replies[1]['game'] == 1
+
+
+def test_side_without_moves_loses(monkeypatch):
+    generate_moves = ChessBoard.generate_moves
+    monkeypatch.setattr(ChessBoard, 'generate_moves',
+                        lambda self, side: generate_moves(self, side) if side == 'red' else [])
+    game = Game(1, parse_bot_spec('random'), 'red')
+    game.play(ChessBoard.encode_move(((2, 7), (2, 4))))
+    assert game.state()['result'] == 'no_moves'
+    assert game.state()['winner'] == 'red'
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile(list(range(1, 101)), 0.5) == 50
+    assert percentile(list(range(1, 101)), 0.99) == 99
@@ -0,0 +1,80 @@
+import io
+import sys
+import pytest
+from MCTSBot import MCTSBot
+from UCCIEngine import UCCIEngine
+import Arena
+import Benchmark
+from conftest import initial_board, random_positions
+
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    """让 import numpy 失败，模拟没有安装 NumPy 的环境。"""
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+    monkeypatch.delitem(sys.modules, 'LeafEvaluator', raising=False)
+    monkeypatch.delitem(sys.modules, 'BatchMoveGen', raising=False)
+    monkeypatch.setattr(Benchmark, 'HAS_NUMPY', False)
+
+
+def test_linear_evaluator_matches_board_score():
+    np = pytest.importorskip('numpy')
+    from LeafEvaluator import LinearEvaluator, VALUE_SCALE, encode_planes
+    boards = [board for board, _ in random_positions(0, games=2, plies=30)][:50]
+    values = LinearEvaluator.from_eval_table()(encode_planes(boards))
+    expected = np.tanh([VALUE_SCALE * (board.red_score - board.black_score) for board in boards])
+    assert values.shape == (50,)
+    assert np.allclose(values, expected, atol=1e-4)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    np = pytest.importorskip('numpy')
+    from LeafEvaluator import LinearEvaluator, MLPEvaluator, encode_planes, save_evaluator, open_evaluator
+    planes = encode_planes([board for board, _ in random_positions(1, plies=20)])
+    for name, evaluator in (('linear', LinearEvaluator.from_eval_table()), ('mlp', MLPEvaluator.random(16, seed=1))):
+        path = str(tmp_path / f'{name}.npz')
+        save_evaluator(evaluator, path)
+        loaded = open_evaluator(path)
+        assert type(loaded) is type(evaluator)
+        assert np.array_equal(loaded(planes), evaluator(planes))
+    with pytest.raises(ValueError):
+        save_evaluator(object(), str(tmp_path / 'bogus.npz'))
+
+
+def test_batched_search_with_evaluator():
+    pytest.importorskip('numpy')
+    board = initial_board()
+    bot = MCTSBot(board, 'red', iteration_limit=200, evaluator='linear', batch_size=16)
+    move = bot.find_best_move()
+    assert move in board.generate_moves('red')
+    assert bot.iterations == 200
+
+
+def test_missing_numpy_reported_clearly(without_numpy):
+    board = initial_board()
+    with pytest.raises(ImportError, match='NumPy'):
+        MCTSBot(board, 'red', evaluator='linear')
+    with pytest.raises(ImportError, match='NumPy'):
+        import BatchMoveGen  # noqa: F401
+    # 不使用估值器时不需要 NumPy
+    assert MCTSBot(board, 'red', iteration_limit=10).find_best_move() in board.generate_moves('red')
+
+
+def test_ucci_evaluator_without_numpy(without_numpy):
+    output = io.StringIO()
+    engine = UCCIEngine(io.StringIO(), output)
+    for line in ['setoption engine mcts', 'setoption evaluator linear', 'position startpos', 'go depth 1']:
+        engine.handle(line)
+    engine.handle('quit')
+    lines = output.getvalue().splitlines()
+    assert any(line.startswith('info string') and 'NumPy' in line for line in lines)
+    assert 'nobestmove' in lines
+
+
+def test_arena_and_benchmark_reject_numpy_options_without_numpy(without_numpy, capsys):
+    with pytest.raises(SystemExit):
+        Arena.main(['mcts:evaluator="linear"', 'random', '-n', '1'])
+    assert 'NumPy' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        Benchmark.main(['--only', 'batched_leaves_per_second'])
+    assert 'NumPy' in capsys.readouterr().err
@@ -0,0 +1,204 @@
+import importlib.util
+import io
+import random
+import threading
+import time
+import pytest
+from ChessBoard import ChessBoard
+from MCTSBot import MCTSBot, NO_NODE, FREE, NODE_BYTES
+from UCCIEngine import UCCIEngine
+from conftest import BLACK_BLOCKED, RED_BLOCKED, initial_board
+
+
+def test_parallel_search_respects_time_limit():
+    board = initial_board()
+    bot = MCTSBot(board, 'red', workers=2)
+    try:
+        bot.find_best_move(time_limit_ms=50)  # 预热进程池，不计入下面的耗时
+        start = time.perf_counter()
+        move = bot.find_best_move(time_limit_ms=300)
+        elapsed = time.perf_counter() - start
+    finally:
+        bot.close()
+    assert move in board.generate_moves('red')
+    assert elapsed < 3
+    assert 0 < bot.iterations
+
+
+def test_parallel_search_stops_on_request():
+    board = initial_board()
+    bot = MCTSBot(board, 'red', workers=2)
+    timer = threading.Timer(0.3, bot.stop)
+    try:
+        timer.start()
+        start = time.perf_counter()
+        move = bot.find_best_move(iterations=1 << 62)
+        elapsed = time.perf_counter() - start
+    finally:
+        timer.cancel()
+        bot.close()
+    assert move in board.generate_moves('red')
+    assert elapsed < 5
+
+
+def test_ucci_go_time_with_threads():
+    output = io.StringIO()
+    engine = UCCIEngine(io.StringIO(), output)
+    for line in ['setoption engine mcts', 'setoption threads 2', 'setoption usemillisec true', 'position startpos',
+                 'go movetime 300']:
+        engine.handle(line)
+    engine.search_thread.join(timeout=5)
+    alive = engine.search_thread.is_alive()
+    engine.handle('quit')
+    assert not alive
+    assert 'bestmove' in output.getvalue()
+
+
+def test_tree_reused_after_reply_from_tree():
+    board = initial_board()
+    bot = MCTSBot(board, 'red', iteration_limit=300)
+    move = bot.find_best_move()
+    tree = bot.root
+    child = next(node for node in tree.children(tree.root) if tree.move[node] == move)
+    reply = max(tree.children(child), key=lambda node: tree.visits[node])
+    reused_visits = tree.visits[reply]
+    assert reused_visits > 0
+    board.make_move(move)
+    board.make_move(tree.move[reply])
+    bot.find_best_move(iterations=50)
+    assert bot.iterations == 50
+    assert bot.root.visits[bot.root.root] == reused_visits + 50
+    assert bot.root.parent[bot.root.root] == NO_NODE
+
+
+def test_tree_not_reused_for_unrelated_position():
+    board = initial_board()
+    bot = MCTSBot(board, 'red', iteration_limit=100)
+    bot.find_best_move()
+    other, _ = ChessBoard.from_fen('4k4/9/9/9/9/R8/9/9/9/3K5 w')
+    bot.chessboard = other
+    bot.find_best_move(iterations=30)
+    assert bot.root.visits[bot.root.root] == 30
+
+
+def check_tree(tree):
+    """检查节点池的不变量：父子链接一致、空闲链表与使用中的节点互补、子节点与未尝试的移动不重复。"""
+    reachable = 0
+    stack = [tree.root]
+    assert tree.parent[tree.root] == NO_NODE
+    while stack:
+        node = stack.pop()
+        reachable += 1
+        child_moves = []
+        child_visits = 0
+        for child in tree.children(node):
+            assert tree.parent[child] == node
+            assert tree.side[child] == tree.side[node] ^ 1
+            child_moves.append(tree.move[child])
+            child_visits += tree.visits[child]
+            stack.append(child)
+        assert child_visits <= tree.visits[node]
+        untried = tree.untried[node] or ()
+        assert len(set(child_moves)) == len(child_moves)
+        assert not set(child_moves) & set(untried)
+    assert reachable == tree.count
+    free = 0
+    node = tree.free_head
+    while node != NO_NODE:
+        assert tree.parent[node] == FREE
+        free += 1
+        node = tree.next_sibling[node]
+    assert free + tree.count == tree.high_water
+    if tree.max_nodes is not None:
+        assert tree.high_water <= tree.max_nodes
+
+
+def test_pool_eviction_keeps_node_limit():
+    board = initial_board()
+    bot = MCTSBot(board, 'red', max_nodes=200)
+    tree = bot.search(board.copy(), 2000)
+    assert tree.evicted > 0
+    assert tree.visits[tree.root] == 2000
+    check_tree(tree)
+
+
+def test_pool_eviction_with_batched_evaluation():
+    pytest.importorskip('numpy')
+    board = initial_board()
+    bot = MCTSBot(board, 'red', evaluator='linear', batch_size=16, max_nodes=100)
+    tree = bot.search_batched(board.copy(), 2000)
+    assert tree.evicted > 0
+    assert tree.visits[tree.root] == 2000
+    check_tree(tree)
+
+
+def test_batched_search_scores_no_moves_as_loss():
+    pytest.importorskip('numpy')
+    for fen in (RED_BLOCKED, BLACK_BLOCKED):
+        board, side = ChessBoard.from_fen(fen)
+        bot = MCTSBot(board, side, evaluator='linear', batch_size=8)
+        tree = bot.search_batched(board.copy(), 32)
+        # 根节点就无子可动，每次迭代都是走棋方负
+        assert tree.visits[tree.root] == 32
+        assert tree.wins[tree.root] == 0
+        # 随机模拟也判走棋方负
+        assert MCTSBot(board, side).search(board.copy(), 32).wins[tree.root] == 0
+
+
+def test_reroot_frees_the_rest_of_the_tree():
+    board = initial_board()
+    tree = MCTSBot(board, 'red').search(board.copy(), 500)
+    child = max(tree.children(tree.root), key=lambda node: tree.visits[node])
+    grandchild = max(tree.children(child), key=lambda node: tree.visits[node])
+    size = 0
+    stack = [grandchild]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(tree.children(node))
+    visits = tree.visits[grandchild]
+    tree.reroot(grandchild)
+    assert tree.root == grandchild and tree.count == size
+    assert tree.visits[tree.root] == visits
+    check_tree(tree)
+
+
+def test_node_limit_validation():
+    board = initial_board()
+    assert MCTSBot(board, 'red', max_nodes=16).max_nodes == 16
+    assert MCTSBot(board, 'red', max_memory_mb=1).max_nodes == 1024 * 1024 // NODE_BYTES
+    with pytest.raises(ValueError):
+        MCTSBot(board, 'red', max_nodes=1)
+    tree = MCTSBot(board, 'red', max_nodes=2).search(board.copy(), 50)
+    check_tree(tree)
+    if importlib.util.find_spec('numpy') is not None:
+        with pytest.raises(ValueError):
+            MCTSBot(board, 'red', evaluator='linear', batch_size=32, max_nodes=32)
+
+
+def test_no_moves_raises():
+    # 黑将已被吃掉，对局结束，双方都没有可行的移动
+    board, _ = ChessBoard.from_fen('9/9/9/9/9/9/9/9/9/4K4 b')
+    for kwargs in ({}, {'workers': 2}):
+        bot = MCTSBot(board, 'black', iteration_limit=10, **kwargs)
+        try:
+            with pytest.raises(Exception, match='没有可行的移动'):
+                bot.find_best_move()
+        finally:
+            bot.close()
+
+
+def test_stats_match_search():
+    board = initial_board()
+    iterations = []
+    random.seed(5)
+    bot = MCTSBot(board, 'red', iteration_limit=200, on_iteration=lambda stats: iterations.append(stats.iterations))
+    move = bot.find_best_move()
+    stats = bot.last_stats.as_dict()
+    assert stats['iterations'] == bot.iterations == 200
+    # 每完成一次迭代回调一次
+    assert iterations == list(range(1, 201))
+    assert ChessBoard.encode_move(stats['best_move']) == move
+    # 同样的随机种子下，收集统计不影响选择的移动
+    random.seed(5)
+    assert MCTSBot(board, 'red', iteration_limit=200).find_best_move() == move
@@ -0,0 +1,44 @@
+import pickle
+import pytest
+from OpeningBook import BookBuilder, OpeningBook, parse_move, move_to_string
+from conftest import initial_board
+
+
+def test_book_round_trip(tmp_path):
+    builder = BookBuilder(max_plies=3)
+    builder.add_text([
+        'h2e2 h9g7 h0g2 b9c7 1-0',
+        'h2e2 b9c7 0-1',
+        '# 注释行',
+        'b2e2 h9g7 1/2-1/2',
+    ])
+    path = str(tmp_path / 'book.bin')
+    assert builder.write(path) == len(builder.weights)
+
+    board = initial_board()
+    with OpeningBook(path) as book:
+        assert len(book) == len(builder.weights)
+        # 红方先走：h2e2 一胜一负（2 + 0），b2e2 一和（1）
+        root = dict(book.probe(board.hash_key('red')))
+        assert root == {parse_move('h2e2'): 2, parse_move('b2e2'): 1}
+        assert book.choose_move(board, 'red', best=True) == parse_move('h2e2')
+
+        board.make_move(parse_move('h2e2'))
+        # 黑方在负局中走的 h9g7 权重为 0，不进入开局库
+        assert dict(book.probe(board.hash_key('black'))) == {parse_move('b9c7'): 2}
+        # 只统计前 3 步：第一局的第 4 步 b9c7 不在库中
+        for move in ('h9g7', 'h0g2'):
+            board.make_move(parse_move(move))
+        assert book.choose_move(board, 'black') is None
+
+    # 传给其他进程时重新映射文件
+    with OpeningBook(path) as book, pickle.loads(pickle.dumps(book)) as copy:
+        assert len(copy) == len(builder.weights)
+
+
+def test_rejects_invalid_files(tmp_path):
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(b'not a book')
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+    assert move_to_string(parse_move('h2e2')) == 'h2e2'
@@ -0,0 +1,75 @@
+import random
+import PlayoutEngine as playout_module
+from ChessBoard import ChessBoard, BOARD_SQUARES, SIDE_MASK
+from PlayoutEngine import PlayoutEngine
+from conftest import RED_BLOCKED, initial_board, random_positions
+
+KINGS_ONLY = '3k5/9/9/9/9/9/9/9/9/5K3 w'
+
+
+class FirstChoice(random.Random):
+    """总是选择第一个元素，使模拟完全确定。"""
+
+    def choice(self, seq):
+        return seq[0]
+
+
+class RecordingRandom(random.Random):
+    """记录最近一次传给 choice 或 shuffle 的序列。"""
+
+    def choice(self, seq):
+        self.last = list(seq)
+        return super().choice(seq)
+
+    def shuffle(self, x):
+        self.last = list(x)
+        super().shuffle(x)
+
+
+def test_max_plies_ends_in_a_draw():
+    board, side = ChessBoard.from_fen(KINGS_ONLY)
+    engine = PlayoutEngine(max_plies=50, detect_repetition=False, rng=FirstChoice())
+    assert engine.play(board, side) is None
+    assert engine.plies == 50
+
+
+def test_repeated_position_ends_in_a_draw():
+    board, side = ChessBoard.from_fen(KINGS_ONLY)
+    engine = PlayoutEngine(max_plies=None, rng=FirstChoice())
+    assert engine.play(board, side) is None
+    # 双方的将帅来回走动，很快回到走过的局面
+    assert engine.plies < 50
+    assert engine.playouts == 1
+
+
+def test_no_moves_loses():
+    board, side = ChessBoard.from_fen(RED_BLOCKED)
+    assert board.generate_moves(side) == []
+    engine = PlayoutEngine(rng=random.Random(0))
+    assert engine.play(board, side) == 'black'
+    assert engine.plies == 0
+
+
+def test_piece_lists_stay_consistent_after_captures(monkeypatch):
+    rng = RecordingRandom(3)
+
+    def checked(generator):
+        # 走法生成前，最近一次选择棋子所用的列表应该正好是走棋方在棋盘上的全部棋子
+        def wrapper(board, src, tag):
+            squares = board.squares
+            own = [square for square in BOARD_SQUARES if squares[square] and squares[square] & SIDE_MASK == tag]
+            assert sorted(rng.last) == own
+            return generator(board, src, tag)
+        return wrapper
+
+    generators = [checked(generator) for generator in playout_module._MOVE_GENERATORS]
+    monkeypatch.setattr(playout_module, '_MOVE_GENERATORS', generators)
+    engine = PlayoutEngine(rng=rng)
+    board = initial_board()
+    before = bytes(board.squares)
+    for _ in range(20):
+        engine.play(board, 'red')
+    assert bytes(board.squares) == before
+    assert engine.plies > 200
+    for board, side in random_positions(4, plies=40)[::10]:
+        engine.play(board, side)
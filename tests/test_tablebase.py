@@ -0,0 +1,59 @@
+import random
+import pytest
+from ChessBoard import ChessBoard
+from AlphaBetaBot import AlphaBetaBot
+from Tablebase import Tablebase, generate, TB_MATE
+from conftest import initial_board
+
+PALACE = {'red': [(row, col) for row in range(3) for col in range(3, 6)],
+          'black': [(row, col) for row in range(7, 10) for col in range(3, 6)]}
+
+
+@pytest.fixture(scope='module')
+def tablebase(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('tablebases'))
+    assert generate(['KRvK'], directory) == ['KvK', 'KRvK']
+    return Tablebase(directory)
+
+
+def krk_position(rng: random.Random) -> ChessBoard:
+    """随机摆放红帅、红车和黑将。"""
+    rows = [['.'] * 9 for _ in range(10)]
+    red_king = rng.choice(PALACE['red'])
+    black_king = rng.choice(PALACE['black'])
+    rook = rng.choice([(row, col) for row in range(10) for col in range(9) if (row, col) not in (red_king, black_king)])
+    for (row, col), letter in ((red_king, 'K'), (black_king, 'k'), (rook, 'R')):
+        rows[row][col] = letter
+    fen = '/'.join(''.join(rows[row]) for row in range(9, -1, -1))
+    for digits in range(9, 0, -1):
+        fen = fen.replace('.' * digits, str(digits))
+    return ChessBoard.from_fen(fen + ' w')[0]
+
+
+def test_probe_is_consistent_with_successors(tablebase):
+    rng = random.Random(3)
+    checked = 0
+    while checked < 100:
+        board = krk_position(rng)
+        side = rng.choice(('red', 'black'))
+        score = tablebase.probe(board, side)
+        if score is None:
+            continue
+        if board.generate_moves(side):
+            assert tablebase.best_move(board, side)[1] == score
+        else:
+            assert score == -TB_MATE
+        checked += 1
+
+
+def test_rook_wins_and_bot_uses_tablebase(tablebase):
+    board, side = ChessBoard.from_fen('4k4/9/9/9/9/R8/9/9/9/3K5 w')
+    score = tablebase.probe(board, side)
+    assert 0 < score < TB_MATE
+    move, best_score = tablebase.best_move(board, side)
+    assert best_score == score
+    bot = AlphaBetaBot(board, side, 2, tablebase=tablebase)
+    assert bot.find_best_move() == move
+    assert bot.nodes == 0
+    # 棋子更多的局面不在库中
+    assert tablebase.probe(initial_board(), 'red') is None